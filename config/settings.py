@@ -18,11 +18,95 @@ class Config:
     # API端点
     TIKHUB_BASE_URL = 'https://api.tikhub.io/api/v1'
     GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com/v1beta')
+    GEMINI_STREAMING = os.environ.get('GEMINI_STREAMING', 'True').lower() == 'true'  # 视频分析使用streamGenerateContent
+    # 股票提取分析：一次结构化请求同时生成报告与股票列表，失败时回退为两次请求
+    GEMINI_COMBINED_EXTRACTION = os.environ.get('GEMINI_COMBINED_EXTRACTION', 'True').lower() == 'true'
+    # 结构化结果不符合要求时，用于文本修复重试的轻量模型
+    GEMINI_REPAIR_MODEL = os.environ.get('GEMINI_REPAIR_MODEL', 'gemini-2.5-flash')
+    # 上下文缓存（cachedContents）：同一视频的后续请求复用已处理的视频内容
+    GEMINI_CONTEXT_CACHE = os.environ.get('GEMINI_CONTEXT_CACHE', 'False').lower() == 'true'
+    GEMINI_CONTEXT_CACHE_TTL = int(os.environ.get('GEMINI_CONTEXT_CACHE_TTL', 3600))  # 缓存有效期（秒）
+    GEMINI_CONTEXT_CACHE_RETRY = int(os.environ.get('GEMINI_CONTEXT_CACHE_RETRY', 600))  # 创建失败后多久再尝试（秒）
     
     # 限制配置
     MAX_VIDEO_COUNT = 10  # 最大批量处理视频数
     MAX_VIDEO_DURATION = 8 * 60 * 60  # 8小时限制（秒）
     DEFAULT_STOCK_DAYS = 30  # 默认股票数据天数
 
+    # HTTP连接池配置
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))  # 单个主机的最大连接数
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 10))  # 连接超时（秒）
+
+    # 各端点读取超时（秒）
+    GEMINI_VIDEO_TIMEOUT = float(os.environ.get('GEMINI_VIDEO_TIMEOUT', 1800))  # 视频分析/股票提取
+    GEMINI_TEXT_TIMEOUT = float(os.environ.get('GEMINI_TEXT_TIMEOUT', 180))  # 文本生成（含搜索工具）
+    TIKHUB_TIMEOUT = float(os.environ.get('TIKHUB_TIMEOUT', 30))  # TikHub元数据接口
+
+    # 后台分析任务配置
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 4))  # 并发执行的分析任务数
+    ANALYSIS_QUEUE_SIZE = int(os.environ.get('ANALYSIS_QUEUE_SIZE', 32))  # 最多排队的任务数
+    JOB_EVENT_BUFFER = int(os.environ.get('JOB_EVENT_BUFFER', 2000))  # 每个任务保留的进度事件数
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', 3600))  # 已完成任务的保留时间（秒）
+
+    # 缓存存储后端：file（cache/analysis 下每个键一个JSON文件）或 sqlite（写入 SQLITE_DB_PATH）
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file').lower()
+    CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'auto').lower()  # auto（优先zstd）/zstd/gzip/none
+    CACHE_COMPRESS_LEVEL = int(os.environ.get('CACHE_COMPRESS_LEVEL', 6))  # 压缩级别
+    CACHE_READ_RETRIES = int(os.environ.get('CACHE_READ_RETRIES', 3))  # 缓存解析失败时的重读次数
+
+    # 磁盘缓存淘汰策略：TTL 按最近访问时间计算（秒，0 表示不过期），总大小超出预算时按LRU淘汰
+    CACHE_ANALYSIS_TTL = int(os.environ.get('CACHE_ANALYSIS_TTL', 90 * 24 * 3600))  # 分析结果
+    CACHE_DOWNLOAD_TTL = int(os.environ.get('CACHE_DOWNLOAD_TTL', CACHE_ANALYSIS_TTL))  # 下载用Markdown（不应短于分析结果）
+    CACHE_PDF_TTL = int(os.environ.get('CACHE_PDF_TTL', 7 * 24 * 3600))  # PDF报告
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))  # 三层总预算（0 表示不限）
+    CACHE_SWEEP_INTERVAL = int(os.environ.get('CACHE_SWEEP_INTERVAL', 3600))  # 后台清理间隔（秒，0 表示不启动）
+    CHART_MAX_AGE_HOURS = int(os.environ.get('CHART_MAX_AGE_HOURS', 24))  # 图表文件保留时间（小时）
+
+    # Tushare 调用限制与多股票并发拉取
+    TUSHARE_RATE_LIMIT = int(os.environ.get('TUSHARE_RATE_LIMIT', 50))  # 每分钟最多调用次数（0 表示不限）
+    TUSHARE_BULK_QUERY = os.environ.get('TUSHARE_BULK_QUERY', 'True').lower() == 'true'  # 多只股票合并为一次 us_daily 请求
+    TUSHARE_MAX_ROWS = int(os.environ.get('TUSHARE_MAX_ROWS', 6000))  # us_daily 单次返回的最大行数
+    STOCK_FETCH_WORKERS = int(os.environ.get('STOCK_FETCH_WORKERS', 10))  # 并发拉取的股票数（股票提取最多10只）
+
+    # 走势图格式：svg（矢量，体积小）或 png（300 DPI 位图）
+    CHART_FORMAT = os.environ.get('CHART_FORMAT', 'svg').lower()
+
+    # PDF报告：默认在首次下载时生成并缓存；开启 PDF_PRERENDER 后在分析结果保存后于后台预生成
+    PDF_PRERENDER = os.environ.get('PDF_PRERENDER', 'False').lower() == 'true'
+    PDF_PRERENDER_WORKERS = int(os.environ.get('PDF_PRERENDER_WORKERS', 1))  # 后台预生成的并发数
+
+    # 下载文件发送方式：默认由 WSGI 服务器的 file_wrapper（sendfile）发送并支持 Range；
+    # 前置 Nginx 时可设置 DOWNLOAD_ACCEL_REDIRECT_PREFIX（对应 cache 目录的 internal location），
+    # Apache/lighttpd 可设置 USE_X_SENDFILE（Flask 配置项）
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX = os.environ.get('DOWNLOAD_ACCEL_REDIRECT_PREFIX', '')
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'False').lower() == 'true'
+
+    # PDF渲染进程池：常驻工作进程预先解析报告样式表，排版不占用请求线程
+    PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', min(2, os.cpu_count() or 1)))  # 0 表示在当前进程内渲染
+    PDF_RENDER_QUEUE = int(os.environ.get('PDF_RENDER_QUEUE', 16))  # 最多排队的PDF生成任务数
+    PDF_RENDER_TIMEOUT = float(os.environ.get('PDF_RENDER_TIMEOUT', 120))  # 单个PDF生成的超时（秒），0 表示不限
+    PDF_RENDER_MEMORY_MB = int(os.environ.get('PDF_RENDER_MEMORY_MB', 1024))  # 每个工作进程可额外使用的内存（MB），0 表示不限
+
+    # 图表渲染进程池（0 表示在当前进程内串行渲染）
+    CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+    CHART_RENDER_QUEUE = int(os.environ.get('CHART_RENDER_QUEUE', 32))  # 最多排队的渲染任务数
+    CHART_RENDER_TIMEOUT = float(os.environ.get('CHART_RENDER_TIMEOUT', 60))  # 等待单个图表渲染的超时（秒）
+
+    # 股票日线本地存储：早于 STOCK_BAR_SETTLE_DAYS 天的数据视为已稳定，拉取一次后长期复用；
+    # 更近的数据在 STOCK_BAR_RECENT_TTL 秒内复用，之后重新拉取
+    STOCK_BAR_SETTLE_DAYS = int(os.environ.get('STOCK_BAR_SETTLE_DAYS', 2))
+    STOCK_BAR_RECENT_TTL = int(os.environ.get('STOCK_BAR_RECENT_TTL', 3600))
+
+    # 准确性分析缓存有效期（秒）：基于实时搜索，过期后重新生成；0 表示不过期
+    ACCURACY_ANALYSIS_TTL = int(os.environ.get('ACCURACY_ANALYSIS_TTL', 24 * 3600))
+
+    # 分析结果内存缓存（LRU）容量上限（字节）
+    ANALYSIS_MEMORY_CACHE_BYTES = int(os.environ.get('ANALYSIS_MEMORY_CACHE_BYTES', 64 * 1024 * 1024))
+    # Markdown 渲染结果的内存缓存上限（字节），按内容哈希缓存
+    MARKDOWN_RENDER_CACHE_BYTES = int(os.environ.get('MARKDOWN_RENDER_CACHE_BYTES', 16 * 1024 * 1024))
+
     # SQLite数据库配置
     SQLITE_DB_PATH = os.environ.get('SQLITE_DB_PATH', os.path.join('cache', 'analysis_records.db'))
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 30))  # 等待其他连接释放写锁的时间（秒）
+    SQLITE_WRITE_RETRIES = int(os.environ.get('SQLITE_WRITE_RETRIES', 3))  # 等待超时后写事务的重试次数
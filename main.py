@@ -1,13 +1,19 @@
-from flask import Flask, render_template, request, jsonify, Response, send_file
+from flask import Flask, render_template, request, jsonify, Response, send_file, send_from_directory
 from services.youtube_service import YouTubeService
-from services.gemini_service import GeminiService
+from services.gemini_service import GeminiService, StructuredOutputError
 from services.stock_service import StockService
 from services.report_service import ReportService
-from services.cache_service import CacheService
+from services.cache_service import create_cache_service
+from services.cache_manager import CacheManager
 from services.record_service import RecordService
 from services.chart_service import ChartService
+from services.job_service import JobService, JobQueueFullError
+from services.pdf_renderer import PdfRenderQueueFullError
+from services.worker_context import is_worker_process
 from config.settings import Config
 from utils.time_utils import utc_str_to_bj
+from utils.http_client import get_session
+from utils.markdown_utils import get_render_cache_stats
 import os
 import json
 import time
@@ -20,19 +26,54 @@ app = Flask(__name__,
 app.config.from_object(Config)
 
 
-youtube_service = YouTubeService()
-gemini_service = GeminiService()
+http_session = get_session()
+youtube_service = YouTubeService(session=http_session)
+gemini_service = GeminiService(session=http_session)
 stock_service = StockService()
 report_service = ReportService()
-cache_service = CacheService()
-chart_service = ChartService()
-record_service = RecordService()
+cache_service = create_cache_service()
+chart_service = ChartService(stock_service=stock_service)
+record_service = RecordService(youtube_service=youtube_service)
+job_service = JobService()
+# 后台按TTL与总预算淘汰磁盘缓存，并清理旧图表
+cache_manager = CacheManager(cache_service, record_service=record_service, chart_service=chart_service)
+# 渲染工作进程会重新导入本模块，清理任务只在 Web 进程中运行
+if not is_worker_process():
+    cache_manager.start()
+
+# 每份报告最多保留的准确性分析缓存数（不同日期范围/股票组合）
+ACCURACY_ANALYSES_PER_REPORT = 10
 
 @app.route('/')
 def index():
     """首页"""
     return render_template('index.html')
 
+@app.route('/static/charts/<path:filename>')
+def chart_file(filename):
+    """图表文件：文件名含内容哈希，内容不可变，允许浏览器与CDN永久缓存"""
+    response = send_from_directory(
+        chart_service.chart_dir, filename,
+        max_age=365 * 24 * 3600,
+        etag=os.path.splitext(filename)[0],
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# 结果依赖日期范围的分析类型；其余类型忽略请求中的日期
+DATED_ANALYSIS_TYPES = ('stock_extraction', 'manual_stock')
+
+def _job_key(cache_key, analysis_type, report_language, start_date=None, end_date=None):
+    """后台任务去重键
+    
+    由缓存键加上分析类型、报告语言与日期范围组成，所有提交分析任务的端点共用：
+    只有结果完全相同的请求才会加入已有任务（如频道首个视频分析与 content_only 的单视频分析）。
+    """
+    if analysis_type not in DATED_ANALYSIS_TYPES:
+        start_date = end_date = None
+    return '|'.join([cache_key, analysis_type, report_language, start_date or '', end_date or ''])
+
 @app.route('/analyze', methods=['GET', 'POST'])
 def analyze():
     """单视频分析"""
@@ -43,7 +84,7 @@ def analyze():
 
 @app.route('/analyze-stream', methods=['POST'])
 def analyze_stream():
-    """流式分析视频"""
+    """流式分析视频（在后台任务中执行，当前连接仅订阅进度）"""
     # 在请求上下文中获取数据
     data = request.get_json()
     video_url = data.get('video_url')
@@ -53,54 +94,112 @@ def analyze_stream():
     stock_symbol = data.get('stock_symbol', 'AAPL') if analysis_type == 'manual_stock' else None
     report_language = data.get('report_language', 'en')
     
-    def generate_analysis():
-        try:
-            # 发送初始状态
-            yield f"data: {json.dumps({'type': 'status', 'message': '开始分析...', 'progress': 0})}\n\n"
-            time.sleep(0.1)
-            
-            # 创建日志回调函数
-            def log_callback(message, log_type, streaming_text=None):
-                log_data = {
-                    'type': 'log',
-                    'message': message,
-                    'log_type': log_type,
-                    'timestamp': int(time.time() * 1000)
-                }
-                if streaming_text:
-                    log_data['streaming_text'] = streaming_text
-                return f"data: {json.dumps(log_data)}\n\n"
+    # 以缓存键加上分析类型、语言与日期范围去重：只有完全相同的请求才订阅已有任务，避免重复调用Gemini
+    if analysis_type == 'manual_stock':
+        base_key = cache_service._generate_cache_key(
+            _manual_stock_cache_urls(video_url, stock_symbol, start_date, end_date)
+        )
+    else:
+        base_key = cache_service._generate_cache_key(video_url)
+    
+    try:
+        job = job_service.submit(
+            'single_video', _analyze_video_job,
+            video_url, analysis_type, stock_symbol, start_date, end_date, report_language,
+            key=_job_key(base_key, analysis_type, report_language, start_date, end_date)
+        )
+    except JobQueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    shared = job.subscribers > 1
+    
+    def generate_events():
+        # 先告知任务ID，浏览器刷新后可凭此重新附着
+        yield f"data: {json.dumps({'type': 'job', 'job_id': job.id, 'shared': shared})}\n\n"
+        if shared:
+            yield _sse_log_callback("相同视频的分析正在进行中，已加入该任务", "info")
+        yield from job_service.stream(job)
+    
+    # 禁用代理缓冲，保证流式片段及时送达浏览器
+    return Response(generate_events(), mimetype='text/plain',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _sse_log_callback(message, log_type, streaming_text=None):
+    """日志回调：将日志格式化为SSE事件"""
+    log_data = {
+        'type': 'log',
+        'message': message,
+        'log_type': log_type,
+        'timestamp': int(time.time() * 1000)
+    }
+    if streaming_text:
+        log_data['streaming_text'] = streaming_text
+    return f"data: {json.dumps(log_data)}\n\n"
+
+def _analyze_video_job(video_url, analysis_type, stock_symbol, start_date, end_date, report_language):
+    """单视频分析任务（在后台工作线程中执行）
+
+    失败时抛出异常，由 JobService 发送 error 事件并将任务标记为失败。
+    """
+    # 发送初始状态
+    yield f"data: {json.dumps({'type': 'status', 'message': '开始分析...', 'progress': 0})}\n\n"
+    
+    log_callback = _sse_log_callback
+    
+    # 根据分析类型执行不同的逻辑
+    if analysis_type == 'content_only':
+        yield f"data: {json.dumps({'type': 'status', 'message': '仅分析视频内容和投资逻辑', 'progress': 10})}\n\n"
+        
+        # 流式分析视频
+        for log_output in _analyze_content_only_stream(video_url, start_date, end_date, log_callback, report_language):
+            yield log_output
             
-            # 根据分析类型执行不同的逻辑
-            if analysis_type == 'content_only':
-                yield f"data: {json.dumps({'type': 'status', 'message': '仅分析视频内容和投资逻辑', 'progress': 10})}\n\n"
-                
-                # 流式分析视频
-                for log_output in _analyze_content_only_stream(video_url, start_date, end_date, log_callback, report_language):
-                    yield log_output
-                    
-            elif analysis_type == 'stock_extraction':
-                yield f"data: {json.dumps({'type': 'status', 'message': '提取股票并分析数据', 'progress': 10})}\n\n"
-                
-                # 流式股票提取分析
-                for log_output in _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callback, report_language):
-                    yield log_output
-                    
-            else:  # manual_stock
-                yield f"data: {json.dumps({'type': 'status', 'message': '手动指定股票分析', 'progress': 10})}\n\n"
-                
-                for log_output in _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date, log_callback, report_language):
-                    yield log_output
+    elif analysis_type == 'stock_extraction':
+        yield f"data: {json.dumps({'type': 'status', 'message': '提取股票并分析数据', 'progress': 10})}\n\n"
+        
+        # 流式股票提取分析
+        for log_output in _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callback, report_language):
+            yield log_output
             
-        except Exception as e:
-            error_data = {
-                'type': 'error',
-                'message': str(e),
-                'timestamp': int(time.time() * 1000)
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
+    else:  # manual_stock
+        yield f"data: {json.dumps({'type': 'status', 'message': '手动指定股票分析', 'progress': 10})}\n\n"
+        
+        for log_output in _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date, log_callback, report_language):
+            yield log_output
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """查询后台任务状态"""
+    job = job_service.get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
+    
+    response_data = {'success': True, **job.to_dict()}
+    if job.finished and job.result is not None:
+        response_data['result'] = job.result
+    return jsonify(response_data)
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """附着/重新附着到后台任务的事件流，支持 after 参数或 Last-Event-ID 续传"""
+    job = job_service.get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
     
-    return Response(generate_analysis(), mimetype='text/plain')
+    after = request.args.get('after', type=int)
+    if after is None:
+        after = request.headers.get('Last-Event-ID', default=0, type=int)
+    
+    return Response(job_service.stream(job, after=after), mimetype='text/plain',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def _analyze_content_only_stream(video_url,start_date, end_date,  log_callback, report_language='en'):
     """流式分析纯内容"""
@@ -120,7 +219,7 @@ def _analyze_content_only_stream(video_url,start_date, end_date,  log_callback,
             cached_analysis['cache_key'] = cache_key
             print(f"从缓存返回结果，设置cache_key: {cache_key}")
             
-            yield f"data: {json.dumps(cached_analysis)}\n\n"
+            yield f"data: {json.dumps(report_service.with_rendered_html(cached_analysis))}\n\n"
             return
         
         # 分析视频内容
@@ -165,6 +264,8 @@ def _analyze_content_only_stream(video_url,start_date, end_date,  log_callback,
             'video_analysis': video_analysis
         }
         cache_service.save_download_report(cache_key, report, video_url, metadata)
+        # 后台预生成PDF，下载时直接返回
+        report_service.prerender_in_background(_get_pdf_report, cache_key)
         
         # 写入分析记录（单视频分析）
         try:
@@ -181,10 +282,12 @@ def _analyze_content_only_stream(video_url,start_date, end_date,  log_callback,
             # 忽略记录失败，避免影响主流程
             pass
         
-        yield f"data: {json.dumps(result)}\n\n"
+        yield f"data: {json.dumps(report_service.with_rendered_html(result))}\n\n"
         
     except Exception as e:
         yield log_callback(f"分析失败: {str(e)}", "error")
+        # 交由后台任务标记为失败并发送 error 事件
+        raise
 
 def _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callback, report_language='en'):
     """流式股票提取分析"""
@@ -204,60 +307,82 @@ def _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callba
             cached_analysis['cache_key'] = cache_key
             print(f"从缓存返回结果，设置cache_key: {cache_key}")
             
-            yield f"data: {json.dumps(cached_analysis)}\n\n"
+            yield f"data: {json.dumps(report_service.with_rendered_html(cached_analysis))}\n\n"
             return
         
-        # 提取股票信息
-        yield f"data: {json.dumps({'type': 'status', 'message': '正在提取股票信息...', 'progress': 20})}\n\n"
-        
-        # 使用生成器处理股票提取（带日志）
-        extraction_generator = gemini_service.extract_stocks_from_video_with_logging(video_url, log_callback=log_callback)
         stock_extraction = None
+        video_analysis = None
         
-        for result in extraction_generator:
-            if isinstance(result, str):  # 日志输出
-                yield result
-            else:  # 最终结果
-                stock_extraction = result
+        # 一次请求同时生成报告与提取股票，视频只处理一次
+        if Config.GEMINI_COMBINED_EXTRACTION:
+            yield f"data: {json.dumps({'type': 'status', 'message': '正在分析视频并提取股票信息...', 'progress': 20})}\n\n"
+            try:
+                for result in gemini_service.analyze_video_with_stocks_with_logging(
+                    video_url, log_callback=log_callback, language=report_language
+                ):
+                    if isinstance(result, str):  # 日志输出
+                        yield result
+                    else:  # 最终结果
+                        video_analysis, stock_extraction = result
+            except Exception as e:
+                yield log_callback(f"合并分析失败，改为分步分析: {str(e)}", "warning")
+                video_analysis = stock_extraction = None
         
         if stock_extraction is None:
-            yield log_callback("股票提取失败", "error")
-            return
+            # 提取股票信息
+            yield f"data: {json.dumps({'type': 'status', 'message': '正在提取股票信息...', 'progress': 20})}\n\n"
+            
+            # 使用生成器处理股票提取（带日志）
+            extraction_generator = gemini_service.extract_stocks_from_video_with_logging(video_url, log_callback=log_callback)
+            
+            for result in extraction_generator:
+                if isinstance(result, str):  # 日志输出
+                    yield result
+                else:  # 最终结果
+                    stock_extraction = result
+        
+        if stock_extraction is None:
+            raise Exception("股票提取失败")
             
         extracted_stocks = stock_extraction.get('extracted_stocks', [])
         
         if not extracted_stocks:
-            yield log_callback("视频中未检测到明确的股票信息", "error")
-            return
+            raise Exception("视频中未检测到明确的股票信息")
         
         yield f"data: {json.dumps({'type': 'status', 'message': f'找到 {len(extracted_stocks)} 只股票', 'progress': 40})}\n\n"
         
-        # 分析视频内容
-        yield log_callback("分析视频内容...", "step")
-        
-        analysis_generator = gemini_service.analyze_video_with_logging(video_url, log_callback=log_callback, language=report_language)
-        video_analysis = None
-        
-        for result in analysis_generator:
-            if isinstance(result, str):  # 日志输出
-                yield result
-            else:  # 最终结果
-                video_analysis = result
+        if video_analysis is None:
+            # 分析视频内容
+            yield log_callback("分析视频内容...", "step")
+            
+            analysis_generator = gemini_service.analyze_video_with_logging(video_url, log_callback=log_callback, language=report_language)
+            
+            for result in analysis_generator:
+                if isinstance(result, str):  # 日志输出
+                    yield result
+                else:  # 最终结果
+                    video_analysis = result
         
         yield f"data: {json.dumps({'type': 'status', 'message': '获取股票数据...', 'progress': 60})}\n\n"
         
-        # 获取股票数据
-        stock_data_list = []
-        for i, stock in enumerate(extracted_stocks):
-            try:
-                yield log_callback(f"获取 {stock['symbol']} 股票数据...", "info")
-                stock_data = stock_service.get_stock_data_by_date_range(stock['symbol'], start_date, end_date)
-                stock_data['name'] = stock.get('name', '')
-                stock_data_list.append(stock_data)
-                progress = 60 + (i + 1) * 10 / len(extracted_stocks)
-                yield f"data: {json.dumps({'type': 'status', 'message': f'已获取 {i+1}/{len(extracted_stocks)} 股票数据', 'progress': progress})}\n\n"
-            except Exception as e:
-                yield log_callback(f"获取股票 {stock['symbol']} 数据失败: {str(e)}", "warning")
+        # 并发获取股票数据，每完成一只推送一次进度（结果按提取顺序排列）
+        symbols = [stock['symbol'] for stock in extracted_stocks]
+        yield log_callback(f"获取 {', '.join(symbols)} 股票数据...", "info")
+        stock_service.prefetch_by_date_range(symbols, start_date, end_date)
+        fetched = {}
+        completed = 0
+        for i, symbol, stock_data, error in stock_service.iter_stock_data(
+            symbols, stock_service.get_stock_data_by_date_range, start_date, end_date
+        ):
+            completed += 1
+            if error is not None:
+                yield log_callback(f"获取股票 {symbol} 数据失败: {error}", "warning")
+                continue
+            stock_data['name'] = extracted_stocks[i].get('name', '')
+            fetched[i] = stock_data
+            progress = 60 + completed * 10 / len(extracted_stocks)
+            yield f"data: {json.dumps({'type': 'status', 'message': f'已获取 {completed}/{len(extracted_stocks)} 股票数据', 'progress': progress})}\n\n"
+        stock_data_list = [fetched[i] for i in sorted(fetched)]
         
         yield f"data: {json.dumps({'type': 'status', 'message': '生成综合分析报告...', 'progress': 80})}\n\n"
         
@@ -293,6 +418,8 @@ def _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callba
             'stock_data': stock_data_list
         }
         cache_service.save_download_report(cache_key, report, video_url, metadata)
+        # 后台预生成PDF，下载时直接返回
+        report_service.prerender_in_background(_get_pdf_report, cache_key)
         
         # 写入分析记录（单视频分析-股票提取）
         try:
@@ -312,12 +439,18 @@ def _analyze_stock_extraction_stream(video_url, start_date, end_date, log_callba
         
     except Exception as e:
         yield log_callback(f"分析失败: {str(e)}", "error")
+        # 交由后台任务标记为失败并发送 error 事件
+        raise
+
+def _manual_stock_cache_urls(video_url, stock_symbol, start_date, end_date):
+    """手动股票分析的组合缓存键原文（视频URL|股票代码|开始日期|结束日期）"""
+    return f"{video_url}|{stock_symbol}|{start_date}|{end_date}"
 
 def _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date, log_callback, report_language='en'):
     """流式手动股票分析"""
     try:
         # 检查缓存（结合视频URL和股票代码）
-        cache_urls = f"{video_url}|{stock_symbol}|{start_date}|{end_date}"
+        cache_urls = _manual_stock_cache_urls(video_url, stock_symbol, start_date, end_date)
         cache_result = cache_service.get_cached_analysis_result(cache_urls)
         if cache_result['found']:
             yield log_callback("发现缓存结果，直接返回", "info")
@@ -332,7 +465,7 @@ def _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date,
             cached_analysis['cache_key'] = cache_key
             print(f"从缓存返回结果，设置cache_key: {cache_key}")
             
-            yield f"data: {json.dumps(cached_analysis)}\n\n"
+            yield f"data: {json.dumps(report_service.with_rendered_html(cached_analysis))}\n\n"
             return
         
         # 分析视频
@@ -387,6 +520,8 @@ def _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date,
             'end_date': end_date
         }
         cache_service.save_download_report(cache_key, report, cache_urls, metadata)
+        # 后台预生成PDF，下载时直接返回
+        report_service.prerender_in_background(_get_pdf_report, cache_key)
         
         # 写入分析记录（单视频分析）
         try:
@@ -406,6 +541,8 @@ def _analyze_manual_stock_stream(video_url, stock_symbol, start_date, end_date,
         
     except Exception as e:
         yield log_callback(f"分析失败: {str(e)}", "error")
+        # 交由后台任务标记为失败并发送 error 事件
+        raise
 
 @app.route('/batch-analyze', methods=['GET', 'POST'])
 def batch_analyze():
@@ -441,46 +578,27 @@ def batch_analyze():
             if cache_result['found']:
                 cached_result = cache_result['analysis_result']
                 cached_result['from_cache'] = True
-                return jsonify(cached_result)
-            
-            # 使用Gemini批量分析视频
-            batch_analysis_generator = gemini_service.analyze_batch_videos(video_urls)
-            batch_analysis = None
-            
-            for result in batch_analysis_generator:
-                if not isinstance(result, str):  # 最终结果
-                    batch_analysis = result
-                    break
+                return jsonify(report_service.with_rendered_html(cached_result))
             
-            if not batch_analysis:
-                raise Exception("批量分析失败")
-            
-            # 生成批量内容分析报告
-            report = report_service.generate_batch_content_report(batch_analysis, language=report_language)
+            # 提交后台任务；相同视频组合的分析进行中时直接加入该任务
+            try:
+                job = job_service.submit('batch_content', _analyze_batch_job,
+                                         video_urls, report_language, 'batch_content',
+                                         {'video_count': len(videos)},
+                                         key=_job_key(cache_result['cache_key'], 'batch_content',
+                                                      report_language))
+            except JobQueueFullError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 503
             
-            # 构建返回结果
-            result = {
+            # 不占用请求线程等待分析完成，客户端通过 /api/jobs/<job_id> 查询进度与结果
+            return jsonify({
                 'success': True,
-                'report': report,
-                'video_count': len(videos),
-                'from_cache': False
-            }
-            
-            # 保存到缓存
-            cache_key = cache_service.save_analysis_result(video_urls, result)
-            result['cache_key'] = cache_key
-            
-            # 保存下载用的Markdown报告
-            metadata = {
-                'analysis_type': 'batch_content',
-                'batch_analysis': batch_analysis,
-                'video_count': len(videos)
-            }
-            cache_service.save_download_report(cache_key, report, video_urls, metadata)
-            
-            # 批量分析不写入记录（按需保留缓存与报告）
-            
-            return jsonify(result)
+                'job_id': job.id,
+                'status': job.status
+            }), 202
             
         except Exception as e:
             return jsonify({
@@ -572,48 +690,27 @@ def batch_analyze_selected():
         if cache_result['found']:
             cached_result = cache_result['analysis_result']
             cached_result['from_cache'] = True
-            return jsonify(cached_result)
-        
-        # 使用Gemini批量分析视频
-        batch_analysis_generator = gemini_service.analyze_batch_videos(video_urls, language=report_language)
-        batch_analysis = None
+            return jsonify(report_service.with_rendered_html(cached_result))
         
-        for result in batch_analysis_generator:
-            if not isinstance(result, str):  # 最终结果
-                batch_analysis = result
-                break
-        
-        if not batch_analysis:
-            raise Exception("批量分析失败")
-        
-        # 生成批量内容分析报告
-        report = report_service.generate_batch_content_report(batch_analysis, language=report_language)
+        # 提交后台任务，客户端断开不会中断分析
+        try:
+            job = job_service.submit('batch_selected', _analyze_batch_job,
+                                     video_urls, report_language, 'batch_selected',
+                                     {'selected_videos': selected_videos, 'video_count': len(selected_videos)},
+                                     key=_job_key(cache_result['cache_key'], 'batch_selected',
+                                                  report_language))
+        except JobQueueFullError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 503
         
-        # 构建返回结果
-        result = {
+        # 不占用请求线程等待分析完成，客户端通过 /api/jobs/<job_id> 查询进度与结果
+        return jsonify({
             'success': True,
-            'report': report,
-            'video_count': len(selected_videos),
-            'selected_videos': selected_videos,
-            'from_cache': False
-        }
-        
-        # 保存到缓存
-        cache_key = cache_service.save_analysis_result(video_urls, result)
-        result['cache_key'] = cache_key
-        
-        # 保存下载用的Markdown报告
-        metadata = {
-            'analysis_type': 'batch_selected',
-            'batch_analysis': batch_analysis,
-            'selected_videos': selected_videos,
-            'video_count': len(selected_videos)
-        }
-        cache_service.save_download_report(cache_key, report, video_urls, metadata)
-        
-        # 批量分析（选定）不写入记录（按需保留缓存与报告）
-
-        return jsonify(result)
+            'job_id': job.id,
+            'status': job.status
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -621,49 +718,164 @@ def batch_analyze_selected():
             'error': str(e)
         }), 500
 
+def _analyze_batch_job(video_urls, report_language, analysis_type, extra_fields):
+    """批量分析任务（在后台工作线程中执行）
+
+    Args:
+        video_urls: 视频URL列表
+        report_language: 报告语言
+        analysis_type: batch_content（频道批量）/ batch_selected（选定视频）
+        extra_fields: 写入结果与下载元数据的附加字段（如 video_count、selected_videos）
+    """
+    yield f"data: {json.dumps({'type': 'status', 'message': '正在批量分析视频内容...', 'progress': 10})}\n\n"
+    
+    # 使用Gemini批量分析视频
+    batch_analysis_generator = gemini_service.analyze_batch_videos(
+        video_urls, log_callback=_sse_log_callback, language=report_language
+    )
+    batch_analysis = None
+    
+    for result in batch_analysis_generator:
+        if isinstance(result, str):  # 日志输出
+            yield result
+        else:  # 最终结果
+            batch_analysis = result
+    
+    if not batch_analysis:
+        raise Exception("批量分析失败")
+    
+    yield f"data: {json.dumps({'type': 'status', 'message': '正在生成报告...', 'progress': 80})}\n\n"
+    
+    # 生成批量内容分析报告
+    report = report_service.generate_batch_content_report(batch_analysis, language=report_language)
+    
+    # 构建返回结果
+    result = {
+        'success': True,
+        'report': report,
+        **extra_fields,
+        'from_cache': False
+    }
+    
+    # 保存到缓存
+    cache_key = cache_service.save_analysis_result(video_urls, result)
+    result['cache_key'] = cache_key
+    
+    # 保存下载用的Markdown报告
+    metadata = {
+        'analysis_type': analysis_type,
+        'batch_analysis': batch_analysis,
+        **extra_fields
+    }
+    cache_service.save_download_report(cache_key, report, video_urls, metadata)
+    # 后台预生成PDF，下载时直接返回
+    report_service.prerender_in_background(_get_pdf_report, cache_key)
+    
+    # 批量分析不写入记录（按需保留缓存与报告）
+    
+    result = report_service.with_rendered_html(result)
+    yield f"data: {json.dumps({**result, 'type': 'result'})}\n\n"
+    yield result
+
+def _send_cached_file(path, download_name, mimetype):
+    """发送缓存目录中的文件作为附件
+    
+    配置了 DOWNLOAD_ACCEL_REDIRECT_PREFIX 时交给 Nginx 发送（X-Accel-Redirect）；
+    否则由 send_file 发送，支持 Range/条件请求，WSGI 服务器提供 file_wrapper 时走 sendfile
+    """
+    # 相对路径按当前工作目录解析（send_file 会按应用根目录解析）
+    path = os.path.abspath(path)
+    if Config.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+        relative_path = os.path.relpath(path, os.path.abspath(cache_service.cache_dir))
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = Config.DOWNLOAD_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + relative_path.replace(os.sep, '/')
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        return response
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=mimetype,
+        conditional=True,
+        max_age=0
+    )
+
+def _send_bytes(data, download_name, mimetype):
+    """直接发送内存中的内容作为附件（带 Content-Length，支持 Range）"""
+    response = Response(data, mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+
+def _get_pdf_report(cache_key):
+    """获取PDF报告路径：有效的缓存PDF直接返回，否则生成；分析结果不存在时返回 None"""
+    analysis_timestamp = cache_service.get_analysis_timestamp(cache_key)
+    if analysis_timestamp is None:
+        return None
+    
+    def load_report():
+        cached_data = cache_service.get_analysis_result_by_key(cache_key)
+        # 获取视频URL列表，无法获取时使用占位符
+        video_urls = cache_service.get_video_urls_by_cache_key(cache_key) or ["视频URL获取失败"]
+        return cached_data, video_urls
+    
+    return report_service.get_or_generate_pdf_report(cache_key, load_report, analysis_timestamp)
+
 @app.route('/api/download-pdf/<cache_key>')
 def download_pdf(cache_key):
-    """下载PDF报告"""
+    """下载PDF报告（优先返回缓存的PDF）"""
     try:
-        # 从缓存获取分析结果
-        cached_data = cache_service.get_analysis_result_by_key(cache_key)
-        if not cached_data:
+        pdf_file = _get_pdf_report(cache_key)
+        if pdf_file is None:
             return jsonify({
                 'success': False,
                 'error': "缓存文件不存在"
             }), 404
         
-        # 获取视频URL列表
-        video_urls = cache_service.get_video_urls_by_cache_key(cache_key)
-        if not video_urls:
-            # 如果无法获取URL，使用占位符
-            video_urls = ["视频URL获取失败"]
-        
-        # 生成PDF文件
-        pdf_file = report_service.generate_pdf_report(cache_key, cached_data, video_urls)
-        
-        if not os.path.exists(pdf_file):
-            return jsonify({
-                'success': False,
-                'error': "PDF生成失败"
-            }), 500
-        
         # 生成下载文件名
         filename = f"youtube_analysis_{cache_key[:8]}.pdf"
         
-        return send_file(
-            pdf_file,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
-        )
+        return _send_cached_file(pdf_file, filename, 'application/pdf')
         
+    except PdfRenderQueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f"PDF下载失败: {str(e)}"
         }), 500
 
+@app.route('/api/download-md/<cache_key>')
+def download_markdown(cache_key):
+    """下载Markdown报告（cache/download 中的文件直接发送）"""
+    try:
+        filename = f"youtube_analysis_{cache_key[:8]}.md"
+        mimetype = 'text/markdown; charset=utf-8'
+        
+        report_file = cache_service.get_download_report_path(cache_key)
+        if report_file:
+            return _send_cached_file(report_file, filename, mimetype)
+        
+        # 数据库存储：没有对应文件，直接发送内容
+        markdown_content = cache_service.get_download_report(cache_key)
+        if markdown_content is None:
+            # 下载缓存已被淘汰而分析结果仍在时重新生成
+            markdown_content = cache_service.rebuild_download_report(cache_key)
+        if markdown_content is None:
+            return jsonify({
+                'success': False,
+                'error': "缓存文件不存在"
+            }), 404
+        return _send_bytes(markdown_content.encode('utf-8'), filename, mimetype)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f"Markdown下载失败: {str(e)}"
+        }), 500
+
 @app.route('/api/stock-data')
 def get_stock_data():
     """获取股票数据API"""
@@ -691,6 +903,10 @@ def extract_stocks_chart():
         # 新增：从请求中获取日期范围
         request_start_date = data.get('start_date')
         request_end_date = data.get('end_date')
+        # 可选：图表格式（svg/png），默认 Config.CHART_FORMAT
+        chart_format = data.get('chart_format')
+        # 可选：忽略已缓存的准确性分析，重新生成
+        force_refresh = bool(data.get('force_refresh'))
         
         print(f"收到股票提取请求，cache_key: {cache_key}")
         print(f"请求的日期范围: {request_start_date} 到 {request_end_date}")
@@ -708,22 +924,20 @@ def extract_stocks_chart():
         print(f"缓存数据获取结果: {cached_data is not None}")
         if not cached_data:
             print(f"错误：未找到cache_key {cache_key} 对应的分析结果")
-            # 列出所有可用的缓存文件进行调试
-            import os
-            cache_dir = cache_service.analysis_cache_dir
-            if os.path.exists(cache_dir):
-                cache_files = os.listdir(cache_dir)
-                print(f"可用的缓存文件: {cache_files}")
-            else:
-                print(f"缓存目录不存在: {cache_dir}")
             
             return jsonify({
                 'success': False,
                 'error': '未找到对应的分析结果'
             }), 404
         
-        # 提取股票信息
-        extracted_stocks = extract_stocks_from_report(cached_data)
+        # 提取股票信息：优先复用已保存的股票列表，仅在缺失时调用AI
+        try:
+            extracted_stocks = get_or_extract_report_stocks(cache_key, cached_data)
+        except StructuredOutputError as e:
+            return jsonify({
+                'success': False,
+                'error': f'AI返回的股票列表格式无效: {str(e)}'
+            }), 502
         
         if not extracted_stocks:
             return jsonify({
@@ -762,31 +976,28 @@ def extract_stocks_chart():
             else:
                 print("   (来源: 缓存数据)")
         
-        # 生成股票图表
-        stock_charts = []
-        for stock in extracted_stocks:
-            chart_result = chart_service.generate_stock_chart_by_date_range(stock['symbol'], start_date, end_date)
-            # 包含所有结果，不论成功还是失败
-            stock_charts.append(chart_result)
-            
+        # 生成股票图表（并发获取数据），包含所有结果，不论成功还是失败
+        symbols = [stock['symbol'] for stock in extracted_stocks]
+        stock_charts = chart_service.generate_charts_by_date_range(symbols, start_date, end_date, chart_format)
+        for stock, chart_result in zip(extracted_stocks, stock_charts):
             # 打印调试信息
             if chart_result.get('success'):
                 print(f"✅ 成功生成 {stock['symbol']} 的图表")
             else:
                 print(f"❌ 生成 {stock['symbol']} 图表失败: {chart_result.get('error', '未知错误')}")
         
-        # 生成准确性分析
-        accuracy_analysis = generate_accuracy_analysis(extracted_stocks, stock_charts, cached_data)
-        
-        # 清理旧图表
-        chart_service.cleanup_old_charts()
+        # 生成准确性分析（相同报告、日期范围与股票组合在有效期内直接复用）
+        accuracy_analysis, accuracy_from_cache = get_accuracy_analysis(
+            cache_key, cached_data, extracted_stocks, stock_charts, start_date, end_date, force_refresh
+        )
         
         return jsonify({
             'success': True,
             'data': {
                 'extracted_stocks': extracted_stocks,
                 'stock_charts': stock_charts,
-                'accuracy_analysis': accuracy_analysis
+                'accuracy_analysis': accuracy_analysis,
+                'accuracy_from_cache': accuracy_from_cache
             }
         })
         
@@ -796,8 +1007,33 @@ def extract_stocks_chart():
             'error': f'股票提取和图表生成失败: {str(e)}'
         }), 500
 
+def get_or_extract_report_stocks(cache_key, cached_data):
+    """获取报告中的股票列表
+    
+    1. 股票提取分析已有的 extracted_stocks（来自视频）
+    2. 之前从报告中提取并保存的 report_extracted_stocks
+    3. 都没有时调用AI提取，并保存到缓存的分析结果中供后续复用
+    """
+    for field in ('extracted_stocks', 'report_extracted_stocks'):
+        stocks = cached_data.get(field)
+        if stocks:
+            print(f"♻️ 复用已保存的股票列表（{field}），共 {len(stocks)} 只")
+            return stocks
+    
+    extracted_stocks = extract_stocks_from_report(cached_data)
+    if extracted_stocks:
+        try:
+            cache_service.update_analysis_result(cache_key, {'report_extracted_stocks': extracted_stocks})
+        except Exception as e:
+            print(f"保存提取的股票列表失败: {e}")
+    return extracted_stocks
+
 def extract_stocks_from_report(cached_data):
-    """使用AI智能分析从分析报告中提取股票信息"""
+    """使用AI智能分析从分析报告中提取股票信息
+    
+    Raises:
+        StructuredOutputError: AI返回结果修复重试后仍不符合结构
+    """
     try:
         print(f"🤖 开始使用AI智能提取股票信息")
         
@@ -837,99 +1073,86 @@ def extract_stocks_from_report(cached_data):
         
         return extracted_stocks
         
+    except StructuredOutputError:
+        raise
     except Exception as e:
         print(f"❌ AI股票提取失败: {e}")
         return []
 
 
 def analyze_stocks_with_ai(content):
-    """使用AI分析内容并提取股票信息"""
+    """使用AI分析内容并提取股票信息
+    
+    Raises:
+        StructuredOutputError: AI返回结果修复重试后仍不符合结构（不视为“未提取到股票”）
+    """
     try:
-        from services.gemini_service import GeminiService
-        
-        gemini_service = GeminiService()
-        
-        # 构建AI分析提示词
-        prompt = f"""
-作为专业的金融分析师，请仔细分析以下投资报告内容，提取其中提到的所有美股股票信息。
-
-**分析内容：**
-{content}
-
-**请按照以下JSON格式返回结果，只返回JSON，不要添加任何其他文字：**
-
-{{
-    "stocks": [
-        {{
-            "symbol": "股票代码(如AAPL)",
-            "name": "公司全名(如Apple Inc.)",
-            "confidence": "提取置信度(high/medium/low)",
-            "recommendation": "投资建议(买入/卖出/持有/无明确建议)",
-            "context": "在报告中的相关描述(不超过100字)"
-        }}
-    ]
-}}
-
-**重要要求：**
-1. 只提取在美国交易所(NYSE, NASDAQ)交易的股票
-2. 股票代码必须是标准的1-5位大写字母格式
-3. confidence根据在报告中的重要程度设置：详细分析的为high，简单提及的为medium，模糊提及的为low
-4. recommendation根据报告的实际建议设置，如果没有明确建议就写"无明确建议"
-5. 如果没有找到任何股票，返回空的stocks数组
-6. 最多返回10只股票
-"""
-
-        # 调用AI服务
-        response = gemini_service.generate_text(prompt)
-        
-        if not response or not response.get('success') or not response.get('summary'):
-            print("❌ AI返回空响应")
-            return []
-        
-        response_text = response['summary'].strip()
-        print(f"🤖 AI原始响应: {response_text[:200]}...")
-        
-        # 提取JSON部分
-        json_start = response_text.find('{')
-        json_end = response_text.rfind('}') + 1
-        
-        if json_start == -1 or json_end == 0:
-            print("❌ AI响应中未找到JSON格式")
-            return []
-        
-        json_str = response_text[json_start:json_end]
-        
-        try:
-            result = json.loads(json_str)
-            stocks = result.get('stocks', [])
-            
-            # 验证和清理结果
-            valid_stocks = []
-            for stock in stocks:
-                if (stock.get('symbol') and stock.get('name') and 
-                    isinstance(stock.get('symbol'), str) and 
-                    stock['symbol'].isupper() and 
-                    len(stock['symbol']) <= 5):
-                    valid_stocks.append({
-                        'symbol': stock['symbol'],
-                        'name': stock['name'],
-                        'confidence': stock.get('confidence', 'medium'),
-                        'recommendation': stock.get('recommendation', '无明确建议')
-                    })
-            
-            return valid_stocks[:10]  # 最多返回10只股票
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON解析失败: {e}")
-            print(f"尝试解析的内容: {json_str}")
-            return []
-            
+        # 结构化输出，解析失败时由 GeminiService 做一次文本修复重试
+        stocks = gemini_service.extract_stocks_from_text(content)
+    except StructuredOutputError:
+        raise
     except Exception as e:
         print(f"❌ AI分析异常: {e}")
         return []
+    
+    # 验证和清理结果
+    valid_stocks = []
+    for stock in stocks:
+        symbol = stock['symbol'].strip().upper()
+        if symbol and stock['name'] and len(symbol) <= 5 and symbol.isupper():
+            valid_stocks.append({
+                'symbol': symbol,
+                'name': stock['name'],
+                'confidence': stock['confidence'],
+                'recommendation': stock['recommendation'] or '无明确建议'
+            })
+    
+    return valid_stocks[:10]  # 最多返回10只股票
+
+def get_accuracy_analysis(cache_key, cached_data, extracted_stocks, stock_charts, start_date, end_date,
+                          force_refresh=False):
+    """获取准确性分析，按 (日期范围, 股票组合) 缓存在分析结果中
+    
+    缓存超过 ACCURACY_ANALYSIS_TTL 秒（搜索结果会过时）或 force_refresh 时重新生成；
+    AI分析失败时返回备用结果，且不写入缓存。
+    
+    Returns:
+        tuple: (准确性分析结果, 是否来自缓存)
+    """
+    symbols = sorted({stock['symbol'] for stock in extracted_stocks})
+    variant_key = f"{start_date}|{end_date}|{','.join(symbols)}"
+    now = int(time.time())
+    
+    cached_analyses = cached_data.get('accuracy_analyses') or {}
+    entry = cached_analyses.get(variant_key)
+    if (entry and not force_refresh
+            and (Config.ACCURACY_ANALYSIS_TTL <= 0 or now - entry['generated_at'] < Config.ACCURACY_ANALYSIS_TTL)):
+        print(f"♻️ 复用准确性分析缓存: {variant_key}")
+        return entry['result'], True
+    
+    accuracy_analysis = generate_accuracy_analysis_with_ai(extracted_stocks, stock_charts, cached_data)
+    if accuracy_analysis is None:
+        return generate_fallback_accuracy_analysis(extracted_stocks, stock_charts), False
+    
+    def merge_analyses(analysis_result):
+        # 基于存储中最新的条目合并（其他进程可能同时写入了别的组合），
+        # 去掉过期条目，并只保留最近的若干个组合
+        analyses = {
+            key: value for key, value in (analysis_result.get('accuracy_analyses') or {}).items()
+            if Config.ACCURACY_ANALYSIS_TTL <= 0 or now - value['generated_at'] < Config.ACCURACY_ANALYSIS_TTL
+        }
+        analyses[variant_key] = {'result': accuracy_analysis, 'generated_at': now}
+        analyses = dict(sorted(analyses.items(), key=lambda item: item[1]['generated_at'])[-ACCURACY_ANALYSES_PER_REPORT:])
+        return {'accuracy_analyses': analyses}
+    
+    try:
+        cache_service.update_analysis_result(cache_key, merge_analyses)
+    except Exception as e:
+        print(f"保存准确性分析失败: {e}")
+    return accuracy_analysis, False
 
-def generate_accuracy_analysis(extracted_stocks, stock_charts, cached_data):
-    """生成准确性分析"""
+def generate_accuracy_analysis_with_ai(extracted_stocks, stock_charts, cached_data):
+    """使用带搜索工具的Gemini生成准确性分析，失败时返回 None"""
     try:
         # 从不同字段获取报告摘要
         report = cached_data.get('report', {})
@@ -1021,11 +1244,11 @@ def generate_accuracy_analysis(extracted_stocks, stock_charts, cached_data):
             }
         else:
             print(f"Gemini分析失败: {gemini_result.get('error')}")
-            return generate_fallback_accuracy_analysis(extracted_stocks, stock_charts)
+            return None
         
     except Exception as e:
         print(f"准确性分析失败: {e}")
-        return generate_fallback_accuracy_analysis(extracted_stocks, stock_charts)
+        return None
 
 def generate_fallback_accuracy_analysis(extracted_stocks, stock_charts):
     """生成备用的准确性分析"""
@@ -1125,66 +1348,28 @@ def analyze_channel_first_video():
                 'cache_key': cache_service._generate_cache_key(video_url)
             })
         
-        # 进行视频分析（仅内容分析）
-        analysis_generator = gemini_service.analyze_video_with_logging(video_url, language=report_language)
-        video_analysis = None
-        
-        for result in analysis_generator:
-            if not isinstance(result, str):  # 最终结果
-                video_analysis = result
-                break
-        
-        if not video_analysis:
+        # 提交后台任务进行视频分析（仅内容分析）
+        try:
+            job = job_service.submit('channel_first_video', _analyze_channel_first_video_job,
+                                     video_url, channel_name, report_language,
+                                     key=_job_key(cache_result['cache_key'], 'content_only',
+                                                  report_language))
+        except JobQueueFullError as e:
             return jsonify({
                 'success': False,
-                'error': '视频分析失败'
-            }), 500
-        
-        # 生成报告
-        report = report_service.generate_content_only_report(video_analysis, language=report_language)
-        
-        # 构建分析结果
-        result = {
-            'type': 'result',
-            'success': True,
-            'analysis_type': 'content_only',
-            'report': report,
-            'video_analysis': video_analysis,
-            'from_cache': False
-        }
-        
-        # 保存到缓存
-        cache_key = cache_service.save_analysis_result(video_url, result)
-        
-        # 保存下载用的Markdown报告
-        metadata = {
-            'analysis_type': 'content_only',
-            'video_analysis': video_analysis
-        }
-        cache_service.save_download_report(cache_key, report, video_url, metadata)
+                'error': str(e)
+            }), 503
         
-        # 写入分析记录（单视频分析-频道首个视频）
-        try:
-            record_service.add_record(
-                video_url=video_url,
-                channel_name=channel_name,
-                cache_key=cache_key,
-                analysis_type='单视频分析',
-                start_date=None,
-                end_date=None,
-                report_language=report_language,
-            )
-        except Exception as _:
-            pass
-
+        # 不占用请求线程等待分析完成，客户端通过 /api/jobs/<job_id> 查询进度与结果
         return jsonify({
             'success': True,
-            'message': f'频道 {channel_name} 的第一个视频分析完成',
+            'message': f'频道 {channel_name} 的第一个视频已提交分析',
             'video_title': first_video.get('title', ''),
             'video_url': video_url,
-            'from_cache': False,
-            'cache_key': cache_key
-        })
+            'cache_key': cache_result['cache_key'],
+            'job_id': job.id,
+            'status': job.status
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -1192,32 +1377,89 @@ def analyze_channel_first_video():
             'error': f'分析失败: {str(e)}'
         }), 500
 
+def _analyze_channel_first_video_job(video_url, channel_name, report_language):
+    """频道首个视频分析任务（在后台工作线程中执行）"""
+    analysis_generator = gemini_service.analyze_video_with_logging(
+        video_url, log_callback=_sse_log_callback, language=report_language
+    )
+    video_analysis = None
+    
+    for result in analysis_generator:
+        if isinstance(result, str):  # 日志输出
+            yield result
+        else:  # 最终结果
+            video_analysis = result
+    
+    if not video_analysis:
+        raise Exception('视频分析失败')
+    
+    # 生成报告
+    report = report_service.generate_content_only_report(video_analysis, language=report_language)
+    
+    # 构建分析结果
+    result = {
+        'type': 'result',
+        'success': True,
+        'analysis_type': 'content_only',
+        'report': report,
+        'video_analysis': video_analysis,
+        'from_cache': False
+    }
+    
+    # 保存到缓存
+    cache_key = cache_service.save_analysis_result(video_url, result)
+    result['cache_key'] = cache_key
+    
+    # 保存下载用的Markdown报告
+    metadata = {
+        'analysis_type': 'content_only',
+        'video_analysis': video_analysis
+    }
+    cache_service.save_download_report(cache_key, report, video_url, metadata)
+    # 后台预生成PDF，下载时直接返回
+    report_service.prerender_in_background(_get_pdf_report, cache_key)
+    
+    # 写入分析记录（单视频分析-频道首个视频）
+    try:
+        record_service.add_record(
+            video_url=video_url,
+            channel_name=channel_name,
+            cache_key=cache_key,
+            analysis_type='单视频分析',
+            start_date=None,
+            end_date=None,
+            report_language=report_language,
+        )
+    except Exception as _:
+        pass
+    
+    yield f"data: {json.dumps(report_service.with_rendered_html(result))}\n\n"
+    yield {'cache_key': cache_key}
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """查询内存缓存命中统计与最近一次磁盘缓存清理结果"""
+    return jsonify({
+        'success': True,
+        'memory_cache': cache_service.get_memory_cache_stats(),
+        'markdown_render_cache': get_render_cache_stats(),
+        'gemini_context_cache': gemini_service.context_cache.stats(),
+        'disk_cache': cache_manager.last_sweep
+    })
+
 @app.route('/api/clear-cache/<cache_key>', methods=['DELETE'])
 def clear_cache(cache_key):
     """清理指定cache_key的缓存文件"""
     try:
-        # 定义各种缓存文件路径
-        analysis_cache_file = os.path.join('cache', 'analysis', f'{cache_key}.json')
         pdf_cache_file = os.path.join('cache', 'pdf', f'{cache_key}.pdf')
-        download_cache_file = os.path.join('cache', 'download', f'{cache_key}.md')
-        
-        # 记录删除的文件
-        deleted_files = []
         
-        # 删除分析缓存文件
-        if os.path.exists(analysis_cache_file):
-            os.remove(analysis_cache_file)
-            deleted_files.append('分析缓存')
+        # 删除分析缓存与下载缓存（由缓存服务按存储后端处理）
+        deleted_files = cache_service.delete_cache(cache_key)
         
         # 删除PDF文件
         if os.path.exists(pdf_cache_file):
             os.remove(pdf_cache_file)
             deleted_files.append('PDF报告')
-        
-        # 删除下载缓存文件
-        if os.path.exists(download_cache_file):
-            os.remove(download_cache_file)
-            deleted_files.append('下载缓存')
         # 同步删除数据库记录
         deleted_db = 0
         try:
@@ -10,11 +10,11 @@
 - 若数据库中已存在相同 cache_key 的记录，则跳过，避免重复
 """
 
-import json
 import os
 from typing import Optional, Tuple
 
 from services.record_service import RecordService
+from utils.cache_codec import decode_cache_data
 from utils.db import get_connection, init_db
 
 
@@ -59,15 +59,15 @@ def migrate() -> None:
         print(f"未找到目录：{ANALYSIS_DIR}")
         return
 
-    files = [f for f in os.listdir(ANALYSIS_DIR) if f.endswith(".json")]
+    files = [f for f in os.listdir(ANALYSIS_DIR) if f.endswith((".json", ".json.gz", ".json.zst"))]
 
     inserted, skipped_batch, skipped_invalid, skipped_exists = 0, 0, 0, 0
 
     for fname in files:
         fpath = os.path.join(ANALYSIS_DIR, fname)
         try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(fpath, "rb") as f:
+                data, _ = decode_cache_data(f.read())
 
             video_urls = data.get("video_urls", [])
             if not isinstance(video_urls, list) or len(video_urls) == 0:
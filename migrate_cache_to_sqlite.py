@@ -0,0 +1,31 @@
+"""迁移脚本：将 cache/analysis 与 cache/download 下的缓存文件批量导入 SQLite 缓存表。
+
+使用说明：
+    python migrate_cache_to_sqlite.py [--overwrite]
+
+规则：
+- 分析结果写入 analysis_cache 表，下载用 Markdown 写入 download_cache 表（均为压缩存储）
+- 默认跳过数据库中已存在的 cache_key，传入 --overwrite 时覆盖
+- 导入完成后将 .env 中的 CACHE_BACKEND 设为 sqlite 即可切换后端；原文件不会被删除
+"""
+
+import sys
+
+from services.cache_service import SQLiteCacheService
+
+
+def migrate(overwrite: bool = False) -> None:
+    svc = SQLiteCacheService()
+    stats = svc.import_from_directory(overwrite=overwrite)
+
+    print(
+        "迁移完成：\n"
+        f"  分析缓存导入: {stats['analysis']}\n"
+        f"  下载缓存导入: {stats['download']}\n"
+        f"  已存在跳过: {stats['skipped']}\n"
+        f"  无效/失败: {stats['failed']}"
+    )
+
+
+if __name__ == "__main__":
+    migrate(overwrite="--overwrite" in sys.argv[1:])
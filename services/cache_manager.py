@@ -0,0 +1,198 @@
+"""缓存管理服务：按层级TTL与总字节预算淘汰磁盘缓存
+
+管理的缓存层：
+- analysis：分析结果（CacheService，文件或SQLite后端）
+- download：下载用Markdown（同上）
+- pdf：cache/pdf 下的PDF报告（可随时由分析结果重新生成）
+
+淘汰规则：
+1. 最近访问时间超过该层 TTL 的条目删除（TTL 为 0 表示不过期）
+2. 剩余总大小仍超过 CACHE_MAX_BYTES 时，按最近访问时间从旧到新删除，直到回到预算内
+
+analysis_records 中仍引用的 cache_key，其分析缓存与下载缓存不参与淘汰；PDF 总是可以淘汰。
+清理在后台守护线程中周期执行（CACHE_SWEEP_INTERVAL），顺带清理旧图表与崩溃遗留的临时文件，
+不占用请求处理时间。多进程部署时各进程各自清理，删除操作是幂等的。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from config.settings import Config
+
+# 原子写入遗留的临时文件超过该时间（秒）视为崩溃残留
+_TEMP_FILE_MAX_AGE = 3600
+
+
+class CacheManager:
+    """磁盘缓存淘汰与后台清理"""
+
+    def __init__(
+        self,
+        cache_service,
+        record_service=None,
+        chart_service=None,
+        pdf_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        interval: Optional[int] = None,
+    ) -> None:
+        self.cache_service = cache_service
+        self.record_service = record_service
+        self.chart_service = chart_service
+        self.pdf_dir = pdf_dir or os.path.join(cache_service.cache_dir, 'pdf')
+        self.max_bytes = Config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttls = ttls or {
+            'analysis': Config.CACHE_ANALYSIS_TTL,
+            'download': Config.CACHE_DOWNLOAD_TTL,
+            'pdf': Config.CACHE_PDF_TTL,
+        }
+        self.interval = Config.CACHE_SWEEP_INTERVAL if interval is None else interval
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+        self._sweep_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """启动后台清理线程（interval 为 0 时不启动）。"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台清理线程。"""
+        self._stop_event.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"缓存清理失败: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def sweep(self) -> Dict[str, Any]:
+        """执行一次淘汰，返回统计信息。"""
+        with self._sweep_lock:
+            started = time.time()
+            protected = self._get_protected_keys()
+            entries = self.cache_service.list_cache_entries() + self._list_pdf_entries()
+
+            evicted = {'analysis': 0, 'download': 0, 'pdf': 0}
+            freed_bytes = 0
+            remaining = []
+
+            # 1. 按层级TTL过期
+            for entry in entries:
+                ttl = self.ttls.get(entry['tier'], 0)
+                expired = ttl and started - entry['last_access'] > ttl
+                if expired and not self._is_protected(entry, protected) and self._evict(entry):
+                    evicted[entry['tier']] += 1
+                    freed_bytes += entry['size']
+                else:
+                    remaining.append(entry)
+
+            # 2. 超出总预算时按最近访问时间淘汰
+            total_bytes = sum(entry['size'] for entry in remaining)
+            if self.max_bytes and total_bytes > self.max_bytes:
+                candidates = sorted(
+                    (entry for entry in remaining if not self._is_protected(entry, protected)),
+                    key=lambda entry: entry['last_access'],
+                )
+                for entry in candidates:
+                    if total_bytes <= self.max_bytes:
+                        break
+                    if self._evict(entry):
+                        evicted[entry['tier']] += 1
+                        freed_bytes += entry['size']
+                        total_bytes -= entry['size']
+
+            temp_files = self._cleanup_temp_files()
+            if self.chart_service is not None:
+                self.chart_service.cleanup_old_charts(Config.CHART_MAX_AGE_HOURS)
+
+            self.last_sweep = {
+                'finished_at': int(time.time()),
+                'duration_ms': int((time.time() - started) * 1000),
+                'entries': len(entries) - sum(evicted.values()),
+                'bytes': total_bytes,
+                'max_bytes': self.max_bytes,
+                'protected': len(protected) if protected is not None else None,
+                'evicted': evicted,
+                'freed_bytes': freed_bytes,
+                'temp_files_removed': temp_files,
+            }
+            if freed_bytes or temp_files:
+                print(f"缓存清理完成: 淘汰 {evicted}，释放 {freed_bytes} 字节，临时文件 {temp_files} 个")
+            return self.last_sweep
+
+    def _get_protected_keys(self) -> Optional[Set[str]]:
+        """返回分析记录引用的 cache_key；读取失败返回 None（本轮不淘汰分析与下载缓存）。"""
+        if self.record_service is None:
+            return set()
+        try:
+            return self.record_service.list_cache_keys()
+        except Exception as e:
+            print(f"读取分析记录失败，本轮仅清理PDF: {e}")
+            return None
+
+    @staticmethod
+    def _is_protected(entry: Dict[str, Any], protected: Optional[Set[str]]) -> bool:
+        if entry['tier'] == 'pdf':
+            return False
+        return protected is None or entry['cache_key'] in protected
+
+    def _evict(self, entry: Dict[str, Any]) -> bool:
+        try:
+            if entry['tier'] == 'pdf':
+                os.remove(os.path.join(self.pdf_dir, f"{entry['cache_key']}.pdf"))
+                return True
+            return self.cache_service.evict_entry(entry['tier'], entry['cache_key'])
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"淘汰缓存 {entry['tier']}/{entry['cache_key']} 失败: {e}")
+            return False
+
+    def _list_pdf_entries(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.pdf_dir):
+            return []
+        entries = []
+        for entry in os.scandir(self.pdf_dir):
+            if entry.name.startswith('.') or not entry.name.endswith('.pdf'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append({
+                'tier': 'pdf',
+                'cache_key': entry.name[:-len('.pdf')],
+                'size': stat.st_size,
+                'last_access': max(stat.st_atime, stat.st_mtime),
+            })
+        return entries
+
+    def _cleanup_temp_files(self) -> int:
+        """删除原子写入中断后遗留的 .*.tmp 文件。"""
+        removed = 0
+        now = time.time()
+        directories = (self.cache_service.analysis_cache_dir, self.cache_service.download_cache_dir, self.pdf_dir)
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if not (entry.name.startswith('.') and entry.name.endswith('.tmp')):
+                    continue
+                try:
+                    if now - entry.stat().st_mtime > _TEMP_FILE_MAX_AGE:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
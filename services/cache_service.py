@@ -1,11 +1,20 @@
+import copy
 import os
 import hashlib
 import json
 from datetime import datetime
 import time
+from config.settings import Config
+from utils import db as db_util
+from utils import cache_codec
+from utils.file_utils import atomic_write_bytes, atomic_write_text, file_lock, touch_atime
+from utils.memory_cache import MemoryLRUCache
 
 class CacheService:
-    def __init__(self, cache_dir='cache'):
+    # 同一条目记录访问时间的最小间隔（秒），避免每次命中都写磁盘
+    ACCESS_TOUCH_INTERVAL = 300
+    
+    def __init__(self, cache_dir='cache', memory_cache_bytes=None):
         """初始化缓存服务"""
         self.cache_dir = cache_dir
         self.analysis_cache_dir = os.path.join(cache_dir, 'analysis')
@@ -14,6 +23,11 @@ class CacheService:
         # 确保缓存目录存在
         os.makedirs(self.analysis_cache_dir, exist_ok=True)
         os.makedirs(self.download_cache_dir, exist_ok=True)
+        
+        # 内存LRU层：热点分析结果免去磁盘读取与JSON解析，按文件 mtime/大小 校验是否过期
+        self.memory_cache = MemoryLRUCache(memory_cache_bytes or Config.ANALYSIS_MEMORY_CACHE_BYTES)
+        # (层级, cache_key) -> 上次记录访问的时间
+        self._last_touch = {}
     
     def _generate_cache_key(self, video_urls):
         """生成缓存键（MD5）"""
@@ -28,8 +42,13 @@ class CacheService:
         return md5_hash
     
     def _get_analysis_cache_file_path(self, cache_key):
-        """获取分析结果缓存文件路径"""
-        return os.path.join(self.analysis_cache_dir, f"{cache_key}.json")
+        """获取分析结果缓存文件路径（当前写入格式）"""
+        return os.path.join(self.analysis_cache_dir, f"{cache_key}.json{cache_codec.get_file_suffix()}")
+    
+    def _get_analysis_cache_file_candidates(self, cache_key):
+        """按读取优先级列出分析缓存可能的文件路径（含旧版 .json）"""
+        base = os.path.join(self.analysis_cache_dir, f"{cache_key}.json")
+        return [base + '.zst', base + '.gz', base]
     
     def _get_download_cache_file_path(self, cache_key):
         """获取下载缓存文件路径"""
@@ -38,7 +57,6 @@ class CacheService:
     def save_analysis_result(self, video_urls, analysis_result):
         """保存分析结果到缓存"""
         cache_key = self._generate_cache_key(video_urls)
-        cache_file = self._get_analysis_cache_file_path(cache_key)
         
         cache_data = {
             'cache_key': cache_key,
@@ -47,30 +65,274 @@ class CacheService:
             'timestamp': int(time.time())
         }
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        self._write_analysis_cache(cache_key, cache_data)
+        self.memory_cache.invalidate(cache_key)
         
         return cache_key
     
+    def update_analysis_result(self, cache_key, fields):
+        """在已缓存的分析结果中补充字段（保留原保存时间，已生成的PDF仍然有效）
+        
+        读-改-写在存储层的写锁内完成（文件后端为 file_lock，SQLite 后端为写事务），
+        多个进程同时补充同一条缓存时不会丢失更新。
+        
+        Args:
+            cache_key: 缓存键
+            fields: 要写入 analysis_result 的字段；也可以是函数，参数为存储中最新的
+                analysis_result，返回要写入的字段（需基于已有字段合并时使用）
+        
+        Returns:
+            bool: 是否已更新（缓存不存在时返回 False）
+        """
+        updated = self._update_analysis_cache(cache_key, fields)
+        self.memory_cache.invalidate(cache_key)
+        return updated
+    
+    @staticmethod
+    def _apply_fields(analysis_result, fields):
+        analysis_result.update(fields(analysis_result) if callable(fields) else fields)
+    
+    def _update_analysis_cache(self, cache_key, fields):
+        """在写锁内从磁盘读取最新内容、合并字段并写回"""
+        with file_lock(os.path.join(self.analysis_cache_dir, '.write.lock')):
+            loaded = self._read_analysis_cache(cache_key)
+            if loaded is None:
+                return False
+            # 解码得到的是新对象，不影响内存缓存中的内容
+            cache_data = loaded[0]
+            self._apply_fields(cache_data['analysis_result'], fields)
+            self._write_analysis_cache_file(cache_key, cache_data)
+        return True
+    
+    def _load_analysis_cache_data(self, cache_key):
+        """读取分析缓存的完整内容（优先命中内存层）
+        
+        Returns:
+            dict: 缓存内容；不存在时返回 None
+        
+        Raises:
+            ValueError: 缓存内容损坏（含 cache_codec.CacheDecodeError）
+        """
+        retries = Config.CACHE_READ_RETRIES
+        for attempt in range(retries + 1):
+            version = self._stat_analysis_cache(cache_key)
+            if version is None:
+                self.memory_cache.invalidate(cache_key)
+                return None
+            
+            cache_data = self.memory_cache.get(cache_key, version)
+            if cache_data is not None:
+                self._record_access('analysis', cache_key)
+                return cache_data
+            
+            try:
+                loaded = self._read_analysis_cache(cache_key)
+            except ValueError:
+                # 可能读到了并发写入中的旧格式文件，稍后重读而不是删除
+                if attempt >= retries:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+                continue
+            
+            if loaded is None:
+                return None
+            # 以解压后的JSON大小计入内存预算
+            cache_data, size = loaded
+            self.memory_cache.put(cache_key, cache_data, size, version)
+            self._record_access('analysis', cache_key)
+            return cache_data
+    
+    def _record_access(self, tier, cache_key):
+        """节流地记录条目最近访问时间，供 CacheManager 按LRU淘汰"""
+        now = time.time()
+        if now - self._last_touch.get((tier, cache_key), 0) < self.ACCESS_TOUCH_INTERVAL:
+            return
+        self._last_touch[(tier, cache_key)] = now
+        try:
+            self._touch_cache_entry(tier, cache_key)
+        except Exception as e:
+            print(f"记录缓存访问时间失败 {tier}/{cache_key}: {e}")
+    
+    def evict_entry(self, tier, cache_key):
+        """淘汰单个缓存条目（tier 为 analysis 或 download），返回是否已删除"""
+        self._last_touch.pop((tier, cache_key), None)
+        if tier == 'analysis':
+            self.memory_cache.invalidate(cache_key)
+            return self._delete_analysis_cache(cache_key)
+        return self._delete_download_report(cache_key)
+    
+    # ---- 存储原语（文件后端），SQLiteCacheService 覆盖这些方法 ----
+    
+    def _find_analysis_cache_file(self, cache_key):
+        """返回 (路径, stat)，不存在时返回 None"""
+        for cache_file in self._get_analysis_cache_file_candidates(cache_key):
+            try:
+                return cache_file, os.stat(cache_file)
+            except FileNotFoundError:
+                continue
+        return None
+    
+    def _stat_analysis_cache(self, cache_key):
+        """返回版本标记，不存在时返回 None"""
+        found = self._find_analysis_cache_file(cache_key)
+        if found is None:
+            return None
+        cache_file, stat = found
+        return cache_file, stat.st_mtime_ns, stat.st_size
+    
+    def _read_analysis_cache(self, cache_key):
+        """读取并解码分析缓存，返回 (内容, JSON字节数)，不存在时返回 None"""
+        found = self._find_analysis_cache_file(cache_key)
+        if found is None:
+            return None
+        try:
+            with open(found[0], 'rb') as f:
+                return cache_codec.decode_cache_data(f.read())
+        except FileNotFoundError:
+            return None
+    
+    def _write_analysis_cache(self, cache_key, cache_data):
+        """写入分析缓存（紧凑、去重、压缩格式），并清理其他格式的旧文件
+        
+        先写临时文件再原子替换，并发读者不会读到不完整的内容。
+        """
+        with file_lock(os.path.join(self.analysis_cache_dir, '.write.lock')):
+            self._write_analysis_cache_file(cache_key, cache_data)
+    
+    def _write_analysis_cache_file(self, cache_key, cache_data):
+        """写入分析缓存文件（调用方持有写锁）"""
+        cache_file = self._get_analysis_cache_file_path(cache_key)
+        payload = cache_codec.encode_cache_data(cache_data)
+        atomic_write_bytes(cache_file, payload)
+        for other_file in self._get_analysis_cache_file_candidates(cache_key):
+            if other_file != cache_file:
+                self._remove_file(other_file)
+    
+    def _delete_analysis_cache(self, cache_key):
+        """删除分析缓存（所有格式），返回是否存在并已删除"""
+        deleted = False
+        with file_lock(os.path.join(self.analysis_cache_dir, '.write.lock')):
+            for cache_file in self._get_analysis_cache_file_candidates(cache_key):
+                deleted = self._remove_file(cache_file) or deleted
+        return deleted
+    
+    def _touch_cache_entry(self, tier, cache_key):
+        """更新条目的访问时间（文件后端写 atime，不改变 mtime 版本标记）"""
+        if tier == 'analysis':
+            found = self._find_analysis_cache_file(cache_key)
+            if found is None:
+                return
+            path = found[0]
+        else:
+            path = self._get_download_cache_file_path(cache_key)
+        try:
+            touch_atime(path)
+        except FileNotFoundError:
+            pass
+    
+    def list_cache_entries(self):
+        """列出分析缓存与下载缓存条目
+        
+        Returns:
+            list[dict]: 每项含 tier、cache_key、size（字节）、last_access（秒）
+        """
+        entries = []
+        for tier, directory, suffixes in (
+            ('analysis', self.analysis_cache_dir, ('.json', '.json.gz', '.json.zst')),
+            ('download', self.download_cache_dir, ('.md',)),
+        ):
+            for entry in os.scandir(directory):
+                if entry.name.startswith('.') or not entry.name.endswith(suffixes):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append({
+                    'tier': tier,
+                    'cache_key': entry.name.split('.', 1)[0],
+                    'size': stat.st_size,
+                    'last_access': max(stat.st_atime, stat.st_mtime),
+                })
+        return entries
+    
+    @staticmethod
+    def _remove_file(path):
+        """删除文件，返回是否存在并已删除（并发删除时不报错）"""
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _write_download_report(self, cache_key, markdown_content):
+        """写入下载用Markdown，返回存储位置"""
+        cache_file = self._get_download_cache_file_path(cache_key)
+        with file_lock(os.path.join(self.download_cache_dir, '.write.lock')):
+            atomic_write_text(cache_file, markdown_content)
+        return cache_file
+    
+    def get_download_report(self, cache_key):
+        """获取下载用Markdown内容，不存在时返回 None"""
+        try:
+            with open(self._get_download_cache_file_path(cache_key), 'r', encoding='utf-8') as f:
+                markdown_content = f.read()
+        except FileNotFoundError:
+            return None
+        self._record_access('download', cache_key)
+        return markdown_content
+    
+    def get_download_report_path(self, cache_key):
+        """获取下载用Markdown的文件路径（供直接发送文件），不存在时返回 None"""
+        cache_file = self._get_download_cache_file_path(cache_key)
+        if not os.path.isfile(cache_file):
+            return None
+        self._record_access('download', cache_key)
+        return cache_file
+    
+    def _delete_download_report(self, cache_key):
+        """删除下载用Markdown，返回是否存在并已删除"""
+        with file_lock(os.path.join(self.download_cache_dir, '.write.lock')):
+            return self._remove_file(self._get_download_cache_file_path(cache_key))
+    
+    def delete_cache(self, cache_key):
+        """删除指定cache_key的分析缓存与下载缓存
+        
+        Returns:
+            list: 实际删除的缓存类型名称
+        """
+        deleted = []
+        self.memory_cache.invalidate(cache_key)
+        self._last_touch.pop(('analysis', cache_key), None)
+        self._last_touch.pop(('download', cache_key), None)
+        if self._delete_analysis_cache(cache_key):
+            deleted.append('分析缓存')
+        if self._delete_download_report(cache_key):
+            deleted.append('下载缓存')
+        return deleted
+    
+    def get_memory_cache_stats(self):
+        """获取内存缓存层的命中统计"""
+        return self.memory_cache.stats()
+    
     def get_cached_analysis_result(self, video_urls):
         """获取缓存的分析结果"""
         cache_key = self._generate_cache_key(video_urls)
-        cache_file = self._get_analysis_cache_file_path(cache_key)
         
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                
+        try:
+            cache_data = self._load_analysis_cache_data(cache_key)
+            if cache_data is not None:
                 return {
                     'cache_key': cache_key,
                     'found': True,
-                    'analysis_result': cache_data['analysis_result'],
+                    # 返回深拷贝，调用方修改任意层级的字段都不会污染内存缓存
+                    'analysis_result': copy.deepcopy(cache_data['analysis_result']),
                     'timestamp': cache_data.get('timestamp')
                 }
-            except (json.JSONDecodeError, KeyError):
-                # 如果缓存文件损坏，删除它
-                os.remove(cache_file)
+        except (ValueError, KeyError) as e:
+            # 重试后仍无法解析：按未命中处理，不删除文件（重新分析后会被原子覆盖）
+            print(f"缓存 {cache_key} 读取失败，按未命中处理: {e}")
+            self.memory_cache.invalidate(cache_key)
         
         return {
             'cache_key': cache_key,
@@ -79,16 +341,34 @@ class CacheService:
     
     def save_download_report(self, cache_key, report, video_urls, metadata=None):
         """保存下载用的Markdown报告"""
-        cache_file = self._get_download_cache_file_path(cache_key)
-        
         # 准备Markdown内容
         markdown_content = self._format_report_as_markdown(report, video_urls, metadata)
         
-        # 保存到文件
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        # 保存到存储后端
+        return self._write_download_report(cache_key, markdown_content)
+    
+    def rebuild_download_report(self, cache_key):
+        """下载用Markdown已被淘汰时，按仍然有效的分析结果重新生成并保存
         
-        return cache_file
+        Returns:
+            str: Markdown 内容；分析结果不存在或没有报告时返回 None
+        """
+        cache_data = self._load_analysis_cache_data(cache_key)
+        if cache_data is None:
+            return None
+        analysis_result = cache_data.get('analysis_result') or {}
+        report = analysis_result.get('report')
+        if not report:
+            return None
+        metadata = {
+            field: analysis_result[field]
+            for field in ('analysis_type', 'stock_data', 'extracted_stocks')
+            if analysis_result.get(field)
+        }
+        markdown_content = self._format_report_as_markdown(report, cache_data.get('video_urls', []), metadata)
+        self._write_download_report(cache_key, markdown_content)
+        print(f"已按分析结果重新生成下载用Markdown: {cache_key}")
+        return markdown_content
     
     def get_markdown_file_path(self, cache_key):
         """获取Markdown文件路径"""
@@ -98,11 +378,9 @@ class CacheService:
         """根据cache_key获取视频URL列表"""
         try:
             # 尝试从分析缓存中获取
-            cache_file = self._get_analysis_cache_file_path(cache_key)
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                return cache_data.get('video_urls', [])
+            cache_data = self._load_analysis_cache_data(cache_key)
+            if cache_data is not None:
+                return list(cache_data.get('video_urls', []))
             
             # 如果没有找到，返回空列表
             return []
@@ -158,23 +436,294 @@ class CacheService:
         """获取缓存结果（兼容旧方法）"""
         return self.get_cached_analysis_result(video_urls)
     
+    def get_analysis_timestamp(self, cache_key):
+        """获取分析结果的保存时间（秒），不存在或读取失败时返回 None"""
+        try:
+            cache_data = self._load_analysis_cache_data(cache_key)
+        except Exception as e:
+            print(f"读取缓存文件失败: {e}")
+            return None
+        if cache_data is None:
+            return None
+        return cache_data.get('timestamp') or 0
+    
     def get_analysis_result_by_key(self, cache_key):
         """通过cache_key直接获取分析结果"""
-        cache_file = self._get_analysis_cache_file_path(cache_key)
-        print(f"缓存服务：查找文件 {cache_file}")
+        print(f"缓存服务：查找缓存 {cache_key}")
+        
+        try:
+            cache_data = self._load_analysis_cache_data(cache_key)
+        except Exception as e:
+            print(f"读取缓存文件失败: {e}")
+            return None
+        
+        if cache_data is None:
+            print(f"缓存不存在: {cache_key}")
+            return None
+        
+        result = cache_data.get('analysis_result')
+        print(f"成功读取缓存数据，有结果: {result is not None}")
+        # 与 get_cached_analysis_result 相同，返回深拷贝
+        return copy.deepcopy(result) if result is not None else None
+
+
+class SQLiteCacheService(CacheService):
+    """SQLite 存储后端的缓存服务
+    
+    分析结果、视频URL列表、下载Markdown与时间戳存放在 Config.SQLITE_DB_PATH 中，
+    以 cache_key 为主键（WITHOUT ROWID 聚簇索引），大字段压缩存储（见 utils/cache_codec），
+    避免 cache/analysis 目录下文件数量无限增长。
+    """
+    
+    def __init__(self, cache_dir='cache', memory_cache_bytes=None):
+        super().__init__(cache_dir, memory_cache_bytes)
+        db_util.init_cache_tables()
+    
+    @staticmethod
+    def _compress(text):
+        return cache_codec.compress_bytes(text.encode('utf-8'))
+    
+    @staticmethod
+    def _decompress(blob):
+        # 自动识别 zstd / gzip / zlib（早期写入的数据为 zlib）
+        return cache_codec.decompress_bytes(blob).decode('utf-8')
+    
+    @staticmethod
+    def _encode_payload(analysis_result):
+        deduped = cache_codec.dedupe_analysis_result(analysis_result)
+        return SQLiteCacheService._compress(json.dumps(deduped, ensure_ascii=False, separators=(',', ':')))
+    
+    def _stat_analysis_cache(self, cache_key):
+        conn = db_util.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT updated_at, length(payload) AS size FROM analysis_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row['updated_at'], row['size']
+    
+    def _read_analysis_cache(self, cache_key):
+        conn = db_util.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT video_urls, payload, timestamp FROM analysis_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        payload_text = self._decompress(row['payload'])
+        analysis_result = cache_codec.restore_analysis_result(json.loads(payload_text))
+        return {
+            'cache_key': cache_key,
+            'video_urls': json.loads(row['video_urls']),
+            'analysis_result': analysis_result,
+            'timestamp': row['timestamp']
+        }, len(payload_text)
+    
+    def _write_analysis_cache(self, cache_key, cache_data):
+        payload = self._encode_payload(cache_data['analysis_result'])
+        conn = db_util.get_connection()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO analysis_cache (cache_key, video_urls, payload, timestamp, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    cache_key,
+                    json.dumps(cache_data['video_urls'], ensure_ascii=False),
+                    payload,
+                    cache_data.get('timestamp') or int(time.time()),
+                    time.time_ns(),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _update_analysis_cache(self, cache_key, fields):
+        conn = db_util.get_connection()
+        try:
+            # 立即取得写锁，其他进程的写入在事务结束前等待
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT payload FROM analysis_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return False
+            analysis_result = cache_codec.restore_analysis_result(json.loads(self._decompress(row['payload'])))
+            self._apply_fields(analysis_result, fields)
+            conn.execute(
+                "UPDATE analysis_cache SET payload = ?, updated_at = ? WHERE cache_key = ?",
+                (self._encode_payload(analysis_result), time.time_ns(), cache_key),
+            )
+            conn.commit()
+            return True
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _delete_analysis_cache(self, cache_key):
+        conn = db_util.get_connection()
+        try:
+            cur = conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (cache_key,))
+            conn.commit()
+            return (cur.rowcount or 0) > 0
+        finally:
+            conn.close()
+    
+    def _write_download_report(self, cache_key, markdown_content):
+        conn = db_util.get_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO download_cache (cache_key, markdown, timestamp) VALUES (?, ?, ?)",
+                (cache_key, self._compress(markdown_content), int(time.time())),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return None
+    
+    def get_download_report(self, cache_key):
+        conn = db_util.get_connection()
+        try:
+            row = conn.execute("SELECT markdown FROM download_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        self._record_access('download', cache_key)
+        return self._decompress(row['markdown'])
+    
+    def get_download_report_path(self, cache_key):
+        # Markdown 存在数据库中，没有可直接发送的文件
+        return None
+    
+    def _delete_download_report(self, cache_key):
+        conn = db_util.get_connection()
+        try:
+            cur = conn.execute("DELETE FROM download_cache WHERE cache_key = ?", (cache_key,))
+            conn.commit()
+            return (cur.rowcount or 0) > 0
+        finally:
+            conn.close()
+    
+    _TIER_TABLES = {'analysis': 'analysis_cache', 'download': 'download_cache'}
+    
+    def _touch_cache_entry(self, tier, cache_key):
+        # 只更新 accessed_at，updated_at（版本标记）保持不变
+        conn = db_util.get_connection()
+        try:
+            conn.execute(
+                f"UPDATE {self._TIER_TABLES[tier]} SET accessed_at = ? WHERE cache_key = ?",
+                (int(time.time()), cache_key),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def list_cache_entries(self):
+        conn = db_util.get_connection()
+        try:
+            analysis_rows = conn.execute(
+                "SELECT cache_key, length(payload) + length(video_urls) AS size, "
+                "COALESCE(accessed_at, timestamp) AS last_access FROM analysis_cache"
+            ).fetchall()
+            download_rows = conn.execute(
+                "SELECT cache_key, length(markdown) AS size, "
+                "COALESCE(accessed_at, timestamp) AS last_access FROM download_cache"
+            ).fetchall()
+        finally:
+            conn.close()
+        return (
+            [dict(row, tier='analysis') for row in analysis_rows]
+            + [dict(row, tier='download') for row in download_rows]
+        )
+    
+    def import_from_directory(self, overwrite=False):
+        """从 JSON/Markdown 缓存目录批量导入
+        
+        Args:
+            overwrite: 数据库中已存在相同 cache_key 时是否覆盖
+        
+        Returns:
+            dict: 导入统计
+        """
+        stats = {'analysis': 0, 'download': 0, 'skipped': 0, 'failed': 0}
+        verb = 'INSERT OR REPLACE' if overwrite else 'INSERT OR IGNORE'
         
-        if os.path.exists(cache_file):
-            print(f"缓存文件存在，尝试读取")
+        analysis_rows = []
+        for entry in os.scandir(self.analysis_cache_dir):
+            if not entry.name.endswith(('.json', '.json.gz', '.json.zst')):
+                continue
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    result = cache_data.get('analysis_result')
-                    print(f"成功读取缓存数据，有结果: {result is not None}")
-                    return result
+                with open(entry.path, 'rb') as f:
+                    cache_data, _ = cache_codec.decode_cache_data(f.read())
+                cache_key = cache_data.get('cache_key') or entry.name.split('.', 1)[0]
+                payload = self._encode_payload(cache_data['analysis_result'])
+                analysis_rows.append((
+                    cache_key,
+                    json.dumps(cache_data.get('video_urls', []), ensure_ascii=False),
+                    payload,
+                    cache_data.get('timestamp') or int(entry.stat().st_mtime),
+                    time.time_ns(),
+                ))
             except Exception as e:
-                print(f"读取缓存文件失败: {e}")
-                return None
-        else:
-            print(f"缓存文件不存在: {cache_file}")
+                print(f"导入分析缓存 {entry.name} 失败: {e}")
+                stats['failed'] += 1
+        
+        download_rows = []
+        for entry in os.scandir(self.download_cache_dir):
+            if not entry.name.endswith('.md'):
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    markdown_content = f.read()
+                download_rows.append((
+                    entry.name[:-len('.md')],
+                    self._compress(markdown_content),
+                    int(entry.stat().st_mtime),
+                ))
+            except Exception as e:
+                print(f"导入下载缓存 {entry.name} 失败: {e}")
+                stats['failed'] += 1
         
-        return None
\ No newline at end of file
+        conn = db_util.get_connection()
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                f"{verb} INTO analysis_cache (cache_key, video_urls, payload, timestamp, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                analysis_rows,
+            )
+            stats['analysis'] = conn.total_changes - before
+            
+            before = conn.total_changes
+            conn.executemany(
+                f"{verb} INTO download_cache (cache_key, markdown, timestamp) VALUES (?, ?, ?)",
+                download_rows,
+            )
+            stats['download'] = conn.total_changes - before
+            conn.commit()
+        finally:
+            conn.close()
+        
+        stats['skipped'] = len(analysis_rows) + len(download_rows) - stats['analysis'] - stats['download']
+        return stats
+
+
+def create_cache_service(cache_dir='cache'):
+    """按 Config.CACHE_BACKEND 创建缓存服务（file / sqlite）"""
+    if Config.CACHE_BACKEND == 'sqlite':
+        return SQLiteCacheService(cache_dir)
+    return CacheService(cache_dir)
@@ -0,0 +1,214 @@
+"""图表渲染进程池：在独立的工作进程中用 Matplotlib 渲染股票走势图
+
+- pyplot 的全局状态不是线程安全的，放到工作进程中渲染后，多个图表可在多核上并行，
+  也不会与请求线程争用 GIL
+- 工作进程启动时完成 Agg 后端与中文字体设置，并预先渲染一张空图以加载字体缓存
+- 任务只传入序列化的股票数据（dict），返回 SVG/PNG 字节，由调用方负责写入文件
+- 绘图只使用面向对象的 Figure API，不依赖 pyplot 全局状态；SVG 中文字保留为文本
+  （svg.fonttype=none），体积远小于 300 DPI 的 PNG，由浏览器按需缩放
+- 排队任务数有上限（CHART_RENDER_QUEUE），等待结果有超时（CHART_RENDER_TIMEOUT）
+- CHART_RENDER_WORKERS=0 时退化为在当前进程内串行渲染
+
+工作进程由 forkserver 派生（见 worker_context），进程池在工作进程异常退出后重建时也不会 fork 多线程的 Web 进程；
+进程池在首次提交任务时创建，只导入本模块或创建 ChartRenderPool 不会启动任何进程。
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from config.settings import Config
+from services.worker_context import get_worker_context
+
+_worker_ready = False
+
+
+class ChartRenderQueueFullError(Exception):
+    """图表渲染队列已满"""
+
+
+def _init_worker() -> None:
+    """工作进程初始化：设置后端与字体并预热。"""
+    global _worker_ready
+    if _worker_ready:
+        return
+    import matplotlib
+    matplotlib.use('Agg')  # 使用非交互式后端
+    from matplotlib.figure import Figure
+
+    # 设置中文字体
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    # SVG：文字保留为文本而不是路径；固定ID盐值，相同内容输出相同字节
+    matplotlib.rcParams['svg.fonttype'] = 'none'
+    matplotlib.rcParams['svg.hashsalt'] = 'stock-chart'
+
+    # 预先渲染一次，加载字体缓存
+    fig = Figure(figsize=(1, 1))
+    fig.text(0.5, 0.5, '预热')
+    fig.savefig(io.BytesIO(), format='png')
+    _worker_ready = True
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def render_price_chart(stock_data: Dict[str, Any], chart_format: str = 'svg', dpi: int = 300) -> bytes:
+    """渲染价格走势图，返回 SVG 或 PNG 字节。"""
+    _init_worker()
+    import matplotlib.dates as mdates
+    from matplotlib.figure import Figure
+    import pandas as pd
+
+    # 准备数据
+    df = pd.DataFrame(stock_data['historical_data'])
+    df['date'] = pd.to_datetime(df['date'], format='%Y%m%d')
+    df = df.sort_values('date')
+
+    # 创建图表
+    fig = Figure(figsize=(12, 8))
+    ax1, ax2 = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]})
+
+    # 价格图
+    ax1.plot(df['date'], df['close'], linewidth=2, color='#1f77b4', label='收盘价')
+    ax1.fill_between(df['date'], df['low'], df['high'], alpha=0.3, color='#1f77b4', label='日内波动')
+
+    ax1.set_title(f'{stock_data["symbol"]} 股价走势图', fontsize=16, fontweight='bold')
+    ax1.set_ylabel('价格 ($)', fontsize=12)
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    # 格式化日期轴
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+    ax1.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(df)//10)))
+
+    # 成交量图
+    colors = ['red' if close < open_price else 'green'
+              for close, open_price in zip(df['close'], df['open'])]
+    ax2.bar(df['date'], df['volume'], color=colors, alpha=0.7)
+    ax2.set_ylabel('成交量', fontsize=12)
+    ax2.set_xlabel('日期', fontsize=12)
+    ax2.grid(True, alpha=0.3)
+
+    # 格式化日期轴
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+    ax2.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(df)//10)))
+
+    # 调整布局
+    fig.tight_layout()
+
+    # 添加统计信息
+    stats_text = f'''当前价格: ${stock_data["latest_price"]:.2f}
+涨跌幅: {stock_data["pct_change"]:+.2f}%
+价格趋势: {stock_data["price_trend"]}
+波动率: {stock_data["volatility"]}%'''
+    ax1.text(0.02, 0.98, stats_text, transform=ax1.transAxes,
+             fontsize=10, verticalalignment='top',
+             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+
+    buffer = io.BytesIO()
+    # 去掉元数据中的生成时间，保证输出可复现
+    metadata = {'Date': None} if chart_format == 'svg' else None
+    fig.savefig(buffer, format=chart_format, dpi=dpi, bbox_inches='tight', facecolor='white', metadata=metadata)
+    return buffer.getvalue()
+
+
+class ChartRenderPool:
+    """图表渲染进程池"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.max_workers = Config.CHART_RENDER_WORKERS if max_workers is None else max_workers
+        self.max_pending = Config.CHART_RENDER_QUEUE if max_pending is None else max_pending
+        self.timeout = Config.CHART_RENDER_TIMEOUT if timeout is None else timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 进程内渲染时串行执行（pyplot 非线程安全）
+        self._inline_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.max_workers) + self.max_pending)
+
+    def start(self) -> None:
+        """启动并预热工作进程。"""
+        if self.max_workers <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_ping)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, stock_data: Dict[str, Any], chart_format: str = 'svg', dpi: int = 300) -> Future:
+        """提交渲染任务，返回结果为图表字节的 Future。
+
+        Raises:
+            ChartRenderQueueFullError: 进行中与排队中的任务数超过上限
+        """
+        if self.max_workers <= 0:
+            future: Future = Future()
+            try:
+                with self._inline_lock:
+                    future.set_result(render_price_chart(stock_data, chart_format, dpi))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self._slots.acquire(blocking=False):
+            raise ChartRenderQueueFullError("图表渲染队列已满，请稍后再试")
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(render_price_chart, stock_data, chart_format, dpi)
+            except BrokenProcessPool:
+                # 工作进程异常退出（如被OOM杀死）后重建进程池
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(render_price_chart, stock_data, chart_format, dpi)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._on_done(done, executor))
+        return future
+
+    def result(self, future: Future) -> bytes:
+        """等待渲染结果（超时抛出 concurrent.futures.TimeoutError）。"""
+        return future.result(timeout=self.timeout)
+
+    def render(self, stock_data: Dict[str, Any], chart_format: str = 'svg', dpi: int = 300) -> bytes:
+        """提交并等待渲染结果。"""
+        return self.result(self.submit(stock_data, chart_format, dpi))
+
+    def _on_done(self, future: Future, executor: ProcessPoolExecutor) -> None:
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._reset_executor(executor)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=get_worker_context(),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池（若已被其他线程重建则不处理）。"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
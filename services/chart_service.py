@@ -1,34 +1,45 @@
-import matplotlib
-matplotlib.use('Agg')  # 使用非交互式后端
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, timedelta
-import pandas as pd
 import os
-import base64
-import io
+import re
+import json
+import hashlib
 from services.stock_service import StockService
+from services.chart_renderer import ChartRenderPool
+from utils.file_utils import atomic_write_bytes, touch_atime
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+from config.settings import Config
+
+# 图表样式版本：修改 chart_renderer.render_price_chart 的绘图样式后递增，使旧的缓存图表失效
+CHART_STYLE_VERSION = 1
+
+# 支持的图表格式：svg 体积小、浏览器矢量缩放；png 用于需要位图的场景
+CHART_FORMATS = ('svg', 'png')
 
 class ChartService:
     """图表生成服务"""
     
-    def __init__(self):
-        self.stock_service = StockService()
+    def __init__(self, stock_service=None, render_pool=None):
+        # 复用外部传入的股票服务（共享本地日线存储与拉取锁）
+        self.stock_service = stock_service or StockService()
         self.chart_dir = 'web/static/charts'
         # 确保图表目录存在
         os.makedirs(self.chart_dir, exist_ok=True)
+        # Matplotlib 渲染在独立进程中执行，工作进程在首次生成图表时启动
+        self.render_pool = render_pool or ChartRenderPool()
+        self.chart_format = Config.CHART_FORMAT if Config.CHART_FORMAT in CHART_FORMATS else 'svg'
+    
+    def _resolve_format(self, chart_format):
+        """校验图表格式，未指定或不支持时使用默认格式"""
+        return chart_format if chart_format in CHART_FORMATS else self.chart_format
     
-    def generate_stock_chart(self, symbol, days=30):
+    def generate_stock_chart(self, symbol, days=30, chart_format=None):
         """
         生成股票走势图
         
         Args:
             symbol: 股票代码
             days: 天数
+            chart_format: 图表格式（svg/png），默认 Config.CHART_FORMAT
             
         Returns:
             dict: 包含图表信息的字典
@@ -36,20 +47,20 @@ class ChartService:
         try:
             # 获取股票数据
             stock_data = self.stock_service.get_stock_data(symbol, days)
-            
-            # 创建图表
-            chart_filename = self._create_price_chart(stock_data)
-            
+        except Exception as e:
             return {
-                'success': True,
+                'success': False,
                 'symbol': symbol,
-                'name': self._get_company_name(symbol),
-                'period': f'最近{days}天',
-                'current_price': stock_data['latest_price'],
-                'price_change': stock_data['pct_change'],
-                'chart_url': f'/static/charts/{chart_filename}',
-                'chart_filename': chart_filename
+                'error': str(e)
             }
+        return self._render_chart(symbol, stock_data, days, chart_format)
+    
+    def _render_chart(self, symbol, stock_data, days, chart_format=None):
+        """根据已获取的股票数据生成最近N天走势图"""
+        try:
+            # 创建图表
+            chart_filename = self._create_price_chart(stock_data, chart_format)
+            return self._describe_chart(symbol, stock_data, chart_filename, days)
             
         except Exception as e:
             return {
@@ -58,7 +69,20 @@ class ChartService:
                 'error': str(e)
             }
     
-    def generate_stock_chart_by_date_range(self, symbol, start_date, end_date):
+    def _describe_chart(self, symbol, stock_data, chart_filename, days):
+        """最近N天走势图的返回信息"""
+        return {
+            'success': True,
+            'symbol': symbol,
+            'name': self._get_company_name(symbol),
+            'period': f'最近{days}天',
+            'current_price': stock_data['latest_price'],
+            'price_change': stock_data['pct_change'],
+            'chart_url': f'/static/charts/{chart_filename}',
+            'chart_filename': chart_filename
+        }
+    
+    def generate_stock_chart_by_date_range(self, symbol, start_date, end_date, chart_format=None):
         """
         按日期范围生成股票走势图
         
@@ -66,6 +90,7 @@ class ChartService:
             symbol: 股票代码
             start_date: 开始日期 (YYYY-MM-DD格式)
             end_date: 结束日期 (YYYY-MM-DD格式)
+            chart_format: 图表格式（svg/png），默认 Config.CHART_FORMAT
             
         Returns:
             dict: 包含图表信息的字典
@@ -73,22 +98,20 @@ class ChartService:
         try:
             # 获取股票数据
             stock_data = self.stock_service.get_stock_data_by_date_range(symbol, start_date, end_date)
-            
-            # 创建图表
-            chart_filename = self._create_price_chart(stock_data)
-            
+        except Exception as e:
             return {
-                'success': True,
+                'success': False,
                 'symbol': symbol,
-                'name': self._get_company_name(symbol),
-                'period': f'{start_date} 至 {end_date}',
-                'current_price': stock_data['latest_price'],
-                'price_change': stock_data['pct_change'],
-                'chart_url': f'/static/charts/{chart_filename}',
-                'chart_filename': chart_filename,
-                'start_date': start_date,
-                'end_date': end_date
+                'error': str(e)
             }
+        return self._render_chart_by_date_range(symbol, stock_data, start_date, end_date, chart_format)
+    
+    def _render_chart_by_date_range(self, symbol, stock_data, start_date, end_date, chart_format=None):
+        """根据已获取的股票数据生成日期范围走势图"""
+        try:
+            # 创建图表
+            chart_filename = self._create_price_chart(stock_data, chart_format)
+            return self._describe_chart_by_date_range(symbol, stock_data, chart_filename, start_date, end_date)
             
         except Exception as e:
             return {
@@ -97,68 +120,63 @@ class ChartService:
                 'error': str(e)
             }
     
-    def _create_price_chart(self, stock_data):
-        """创建价格走势图"""
-        # 准备数据
-        df = pd.DataFrame(stock_data['historical_data'])
-        df['date'] = pd.to_datetime(df['date'], format='%Y%m%d')
-        df = df.sort_values('date')
-        
-        # 创建图表
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), 
-                                       gridspec_kw={'height_ratios': [3, 1]})
-        
-        # 价格图
-        ax1.plot(df['date'], df['close'], linewidth=2, color='#1f77b4', label='收盘价')
-        ax1.fill_between(df['date'], df['low'], df['high'], alpha=0.3, color='#1f77b4', label='日内波动')
-        
-        ax1.set_title(f'{stock_data["symbol"]} 股价走势图', fontsize=16, fontweight='bold')
-        ax1.set_ylabel('价格 ($)', fontsize=12)
-        ax1.grid(True, alpha=0.3)
-        ax1.legend()
-        
-        # 格式化日期轴
-        ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-        ax1.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(df)//10)))
-        
-        # 成交量图
-        colors = ['red' if close < open_price else 'green' 
-                  for close, open_price in zip(df['close'], df['open'])]
-        ax2.bar(df['date'], df['volume'], color=colors, alpha=0.7)
-        ax2.set_ylabel('成交量', fontsize=12)
-        ax2.set_xlabel('日期', fontsize=12)
-        ax2.grid(True, alpha=0.3)
-        
-        # 格式化日期轴
-        ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-        ax2.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(df)//10)))
-        
-        # 调整布局
-        plt.tight_layout()
-        
-        # 添加统计信息
-        self._add_stats_text(ax1, stock_data)
-        
-        # 保存图表
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'{stock_data["symbol"]}_{timestamp}.png'
-        filepath = os.path.join(self.chart_dir, filename)
-        
-        plt.savefig(filepath, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
+    def _describe_chart_by_date_range(self, symbol, stock_data, chart_filename, start_date, end_date):
+        """日期范围走势图的返回信息"""
+        return {
+            'success': True,
+            'symbol': symbol,
+            'name': self._get_company_name(symbol),
+            'period': f'{start_date} 至 {end_date}',
+            'current_price': stock_data['latest_price'],
+            'price_change': stock_data['pct_change'],
+            'chart_url': f'/static/charts/{chart_filename}',
+            'chart_filename': chart_filename,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+    
+    def _get_chart_filename(self, stock_data, chart_format):
+        """按 (股票代码, 区间, K线数据, 统计信息, 样式版本) 的哈希生成图表文件名，扩展名为图表格式
         
+        内容相同的图表文件名相同，可在请求与用户之间复用，也可被浏览器永久缓存。
+        """
+        content = {
+            'symbol': stock_data['symbol'],
+            'period': stock_data.get('period'),
+            'historical_data': stock_data['historical_data'],
+            'latest_price': stock_data['latest_price'],
+            'pct_change': stock_data['pct_change'],
+            'price_trend': stock_data['price_trend'],
+            'volatility': stock_data['volatility'],
+            'style_version': CHART_STYLE_VERSION,
+        }
+        digest = hashlib.sha256(
+            json.dumps(content, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        ).hexdigest()[:20]
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', str(stock_data['symbol']))
+        return f'{safe_symbol}_{digest}.{chart_format}'
+    
+    def _start_price_chart(self, stock_data, chart_format=None):
+        """开始生成价格走势图，返回 (文件名, 渲染任务)；内容相同的图表已存在时渲染任务为 None"""
+        chart_format = self._resolve_format(chart_format)
+        filename = self._get_chart_filename(stock_data, chart_format)
+        try:
+            # 记录最近使用时间，清理时按此判断
+            touch_atime(os.path.join(self.chart_dir, filename))
+            return filename, None
+        except FileNotFoundError:
+            pass
+        return filename, self.render_pool.submit(stock_data, chart_format)
+    
+    def _finish_price_chart(self, filename, future):
+        """等待渲染完成并原子写入图表文件（并发请求不会读到半个文件）"""
+        if future is not None:
+            atomic_write_bytes(os.path.join(self.chart_dir, filename), self.render_pool.result(future))
         return filename
     
-    def _add_stats_text(self, ax, stock_data):
-        """添加统计信息文本"""
-        stats_text = f'''当前价格: ${stock_data["latest_price"]:.2f}
-涨跌幅: {stock_data["pct_change"]:+.2f}%
-价格趋势: {stock_data["price_trend"]}
-波动率: {stock_data["volatility"]}%'''
-        
-        ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, 
-                fontsize=10, verticalalignment='top',
-                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+    def _create_price_chart(self, stock_data, chart_format=None):
+        """创建价格走势图"""
+        return self._finish_price_chart(*self._start_price_chart(stock_data, chart_format))
     
     def _get_company_name(self, symbol):
         """获取公司名称（简化版）"""
@@ -177,22 +195,60 @@ class ChartService:
         }
         return company_names.get(symbol, f'{symbol} Corporation')
     
-    def generate_multiple_charts(self, symbols, days=30):
-        """批量生成股票图表"""
-        results = []
-        for symbol in symbols:
-            result = self.generate_stock_chart(symbol, days)
-            results.append(result)
+    def generate_multiple_charts(self, symbols, days=30, chart_format=None):
+        """批量生成股票图表（批量预取 + 并发获取数据 + 多进程渲染，按 symbols 顺序返回）"""
+        self.stock_service.prefetch_by_date_range(
+            symbols,
+            (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
+            datetime.now().strftime('%Y-%m-%d'),
+        )
+        return self._generate_charts(
+            symbols,
+            self.stock_service.get_stock_data, (days,), chart_format,
+            lambda symbol, stock_data, chart_filename: self._describe_chart(symbol, stock_data, chart_filename, days),
+        )
+    
+    def generate_charts_by_date_range(self, symbols, start_date, end_date, chart_format=None):
+        """按日期范围批量生成股票图表（批量预取 + 并发获取数据 + 多进程渲染，按 symbols 顺序返回）"""
+        self.stock_service.prefetch_by_date_range(symbols, start_date, end_date)
+        return self._generate_charts(
+            symbols,
+            self.stock_service.get_stock_data_by_date_range, (start_date, end_date), chart_format,
+            lambda symbol, stock_data, chart_filename: self._describe_chart_by_date_range(
+                symbol, stock_data, chart_filename, start_date, end_date
+            ),
+        )
+    
+    def _generate_charts(self, symbols, fetch, fetch_args, chart_format, describe):
+        """数据在线程池中并发获取，每只股票数据到达后立即提交到渲染进程池，最后统一等待渲染结果"""
+        results = [None] * len(symbols)
+        pending = []
+        for index, symbol, stock_data, error in self.stock_service.iter_stock_data(symbols, fetch, *fetch_args):
+            if error is None:
+                try:
+                    pending.append((index, symbol, stock_data) + self._start_price_chart(stock_data, chart_format))
+                    continue
+                except Exception as e:
+                    error = str(e)
+            results[index] = {'success': False, 'symbol': symbol, 'error': error}
+        
+        for index, symbol, stock_data, chart_filename, future in pending:
+            try:
+                self._finish_price_chart(chart_filename, future)
+                results[index] = describe(symbol, stock_data, chart_filename)
+            except Exception as e:
+                results[index] = {'success': False, 'symbol': symbol, 'error': str(e) or type(e).__name__}
         return results
     
     def cleanup_old_charts(self, max_age_hours=24):
-        """清理旧的图表文件"""
+        """清理长时间未使用的图表文件（按最近使用时间）"""
         try:
             current_time = datetime.now()
             for filename in os.listdir(self.chart_dir):
-                if filename.endswith('.png'):
+                if filename.endswith(tuple(f'.{chart_format}' for chart_format in CHART_FORMATS)):
                     filepath = os.path.join(self.chart_dir, filename)
-                    file_time = datetime.fromtimestamp(os.path.getctime(filepath))
+                    stat = os.stat(filepath)
+                    file_time = datetime.fromtimestamp(max(stat.st_atime, stat.st_mtime))
                     if (current_time - file_time).total_seconds() > max_age_hours * 3600:
                         os.remove(filepath)
                         print(f"已清理旧图表: {filename}")
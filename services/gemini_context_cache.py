@@ -0,0 +1,162 @@
+"""Gemini 上下文缓存：同一视频的多次请求复用 cachedContents，视频只需处理一次
+
+- 请求内容包含视频（file_data）时，按 (模型, 视频URL) 创建一个只含视频的缓存上下文，
+  之后的请求只发送提示词并引用 cachedContent；报告分析、股票提取、一次请求的组合分析
+  以及不同语言的报告共用同一个上下文
+- 提示词不放入缓存：各任务、各语言的提示词不同，放入后会把同一视频拆成多个缓存，
+  且提示词只有几千 token，远小于视频本身
+- 缓存句柄记录在本进程内存中，剩余有效期不足 CONTEXT_CACHE_MIN_REMAINING 秒时重新创建；
+  有效期由 GEMINI_CONTEXT_CACHE_TTL 控制
+- 创建失败（如视频过短未达到最小 token 数、接口不支持该视频）时不使用缓存，
+  并在 GEMINI_CONTEXT_CACHE_RETRY 秒内不再尝试；引用缓存的请求被拒绝时由调用方改回内联视频重试
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from config.settings import Config
+from utils.http_client import get_timeout
+
+# 缓存剩余有效期少于该值（秒）时不再引用，避免请求处理过程中缓存过期
+CONTEXT_CACHE_MIN_REMAINING = 120
+
+ContextKey = Tuple[str, Tuple[str, ...]]
+
+
+class GeminiContextCache:
+    """cachedContents 句柄管理"""
+
+    def __init__(self, session, base_url, api_key, ttl=None, retry_after=None, enabled=None):
+        self.session = session
+        self.base_url = base_url
+        self.api_key = api_key
+        self.ttl = Config.GEMINI_CONTEXT_CACHE_TTL if ttl is None else ttl
+        self.retry_after = Config.GEMINI_CONTEXT_CACHE_RETRY if retry_after is None else retry_after
+        self.enabled = Config.GEMINI_CONTEXT_CACHE if enabled is None else enabled
+
+        # key -> (缓存名称, 过期时间)；创建失败的记录名称为 None，过期时间为可重试时间
+        self._handles: Dict[ContextKey, Tuple[Optional[str], float]] = {}
+        self._lock = threading.Lock()
+        # 同一视频的创建串行执行，避免并发请求重复创建
+        self._key_locks: Dict[ContextKey, threading.Lock] = {}
+        self._stats = {'hits': 0, 'created': 0, 'failures': 0, 'invalidated': 0}
+
+    def apply(self, model: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[ContextKey]]:
+        """把包含视频的请求体改为引用缓存上下文。
+
+        Returns:
+            (请求体, 缓存键)；未使用缓存时返回原请求体与 None
+        """
+        if not self.enabled or self.ttl <= 0:
+            return payload, None
+        contents = payload.get('contents') or []
+        if len(contents) != 1 or 'cachedContent' in payload or 'systemInstruction' in payload:
+            return payload, None
+
+        parts = contents[0].get('parts', [])
+        video_uris = tuple(part['file_data']['file_uri'] for part in parts if 'file_data' in part)
+        if not video_uris:
+            return payload, None
+
+        key = (model, video_uris)
+        name = self._get_or_create(key)
+        if name is None:
+            return payload, None
+
+        cached_payload = dict(payload)
+        cached_payload['cachedContent'] = name
+        cached_payload['contents'] = [{
+            'role': 'user',
+            'parts': [part for part in parts if 'file_data' not in part]
+        }]
+        return cached_payload, key
+
+    def invalidate(self, key: ContextKey) -> None:
+        """丢弃失效的缓存句柄（下次请求重新创建）。"""
+        with self._lock:
+            if self._handles.pop(key, None) is not None:
+                self._stats['invalidated'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            active = sum(1 for name, expires_at in self._handles.values() if name and expires_at > now)
+            return dict(self._stats, enabled=self.enabled, active=active)
+
+    def _lookup(self, key: ContextKey) -> Tuple[bool, Optional[str]]:
+        """返回 (是否有可用记录, 缓存名称)。"""
+        now = time.time()
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is None:
+                return False, None
+            name, expires_at = entry
+            if name is None:
+                if now < expires_at:
+                    return True, None
+            elif expires_at - now > CONTEXT_CACHE_MIN_REMAINING:
+                self._stats['hits'] += 1
+                return True, name
+            del self._handles[key]
+        return False, None
+
+    def _get_or_create(self, key: ContextKey) -> Optional[str]:
+        found, name = self._lookup(key)
+        if found:
+            return name
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            found, name = self._lookup(key)
+            if found:
+                return name
+            # 以发起创建的时间计算过期时间，略早于服务端的实际过期时间
+            created_at = time.time()
+            try:
+                name = self._create(*key)
+            except (requests.RequestException, ValueError) as e:
+                print(f"创建Gemini上下文缓存失败，改为直接发送视频: {e}")
+                with self._lock:
+                    self._handles[key] = (None, created_at + self.retry_after)
+                    self._stats['failures'] += 1
+                    self._key_locks.pop(key, None)
+                return None
+            with self._lock:
+                self._handles[key] = (name, created_at + self.ttl)
+                self._stats['created'] += 1
+                self._key_locks.pop(key, None)
+            print(f"已创建Gemini上下文缓存 {name}（{len(key[1])} 个视频，有效期 {self.ttl} 秒）")
+            return name
+
+    def _create(self, model: str, video_uris: Tuple[str, ...]) -> str:
+        """
+        调用 cachedContents 创建只含视频的缓存上下文，返回缓存名称
+
+        Raises:
+            requests.RequestException: 请求失败
+            ValueError: 返回结果缺少缓存名称
+        """
+        headers = {
+            'x-goog-api-key': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            'model': f'models/{model}',
+            'contents': [{
+                'role': 'user',
+                'parts': [{'file_data': {'file_uri': uri}} for uri in video_uris]
+            }],
+            'ttl': f'{int(self.ttl)}s'
+        }
+        # 创建时服务端需要处理整段视频，使用视频分析的超时
+        response = self.session.post(f"{self.base_url}/cachedContents", headers=headers, json=payload,
+                                     timeout=get_timeout(Config.GEMINI_VIDEO_TIMEOUT))
+        response.raise_for_status()
+        name = response.json().get('name')
+        if not name:
+            raise ValueError("cachedContents 返回结果缺少 name")
+        return name
@@ -1,17 +1,87 @@
 import requests
 import json
-import re
 from datetime import datetime
 from config.settings import Config
+from utils.http_client import get_session, get_timeout
+from utils.json_schema import extract_json, validate
+from services.gemini_context_cache import GeminiContextCache
+
+# 股票提取结果中单只股票的结构（Gemini responseSchema，OpenAPI 子集）
+STOCK_ITEM_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'symbol': {'type': 'STRING', 'description': '美股代码，如 AAPL'},
+        'name': {'type': 'STRING'},
+        'confidence': {'type': 'STRING', 'enum': ['high', 'medium', 'low']},
+        'sentiment': {'type': 'STRING', 'enum': ['positive', 'negative', 'neutral']},
+        'discussion_points': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+    },
+    'required': ['symbol', 'name', 'confidence', 'sentiment', 'discussion_points'],
+    'propertyOrdering': ['symbol', 'name', 'confidence', 'sentiment', 'discussion_points'],
+}
+
+# 视频股票提取的返回结构
+STOCK_EXTRACTION_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'extracted_stocks': {'type': 'ARRAY', 'items': STOCK_ITEM_SCHEMA},
+        'summary': {'type': 'STRING'},
+    },
+    'required': ['extracted_stocks', 'summary'],
+    'propertyOrdering': ['extracted_stocks', 'summary'],
+}
+
+# 从报告文本中提取股票的返回结构
+REPORT_STOCKS_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'stocks': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'symbol': {'type': 'STRING'},
+                    'name': {'type': 'STRING'},
+                    'confidence': {'type': 'STRING', 'enum': ['high', 'medium', 'low']},
+                    'recommendation': {'type': 'STRING'},
+                    'context': {'type': 'STRING'},
+                },
+                'required': ['symbol', 'name', 'confidence', 'recommendation'],
+                'propertyOrdering': ['symbol', 'name', 'confidence', 'recommendation', 'context'],
+            },
+        },
+    },
+    'required': ['stocks'],
+}
+
+# 分析报告与股票提取合并为一次请求时的返回结构
+COMBINED_ANALYSIS_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'report_markdown': {'type': 'STRING'},
+        'extracted_stocks': {'type': 'ARRAY', 'items': STOCK_ITEM_SCHEMA},
+        'summary': {'type': 'STRING'},
+    },
+    'required': ['report_markdown', 'extracted_stocks', 'summary'],
+    'propertyOrdering': ['report_markdown', 'extracted_stocks', 'summary'],
+}
+
+class StructuredOutputError(Exception):
+    """模型返回内容经修复重试后仍不符合要求的结构"""
+
 
 class GeminiService:
     """Gemini AI服务"""
     
-    def __init__(self):
+    def __init__(self, session=None):
         self.api_key = Config.GEMINI_API_KEY
         self.base_url = Config.GEMINI_BASE_URL
+        # 共享连接池，避免每次请求重新握手
+        self.session = session or get_session()
+        # 同一视频的多次请求复用 cachedContents
+        self.context_cache = GeminiContextCache(self.session, self.base_url, self.api_key)
         
-    def analyze_video_with_logging(self, video_url, prompt=None, log_callback=None, language='en'):
+    def analyze_video_with_logging(self, video_url, prompt=None, log_callback=None, language='en', stream=None):
         """
         使用Gemini分析YouTube视频（带日志回调）
         
@@ -19,15 +89,271 @@ class GeminiService:
             video_url: YouTube视频URL
             prompt: 自定义分析提示词
             log_callback: 日志回调函数
+            stream: 是否使用流式接口，默认读取 Config.GEMINI_STREAMING
         """
+        if stream is None:
+            stream = Config.GEMINI_STREAMING
         if log_callback:
             yield log_callback("开始分析视频内容...", "step")
             
         if not prompt:
-            # 根据语言设置日期格式和提示词
-            if language == 'en':
-                current_date = datetime.now().strftime('%B %d, %Y')
-                prompt = f"""
+            prompt = self._build_analysis_prompt(language)
+        
+        if log_callback:
+            yield log_callback("正在连接LLM API...", "info")
+            
+        url = f"{self.base_url}/models/gemini-2.5-pro:generateContent"
+        stream_url = f"{self.base_url}/models/gemini-2.5-pro:streamGenerateContent"
+        
+        headers = {
+            'x-goog-api-key': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        
+        payload = {
+            'contents': [{
+                'parts': [
+                    {'text': prompt},
+                    {
+                        'file_data': {
+                            'file_uri': video_url
+                        }
+                    }
+                ]
+            }]
+        }
+        
+        try:
+            if log_callback:
+                yield log_callback("正在处理视频分析...", "info")
+            
+            content = None
+            if stream:
+                # 流式接收，边生成边把Markdown片段推送给前端
+                chunks = []
+                for chunk in self._stream_generate_content(stream_url, headers, payload, 'gemini-2.5-pro'):
+                    chunks.append(chunk)
+                    if log_callback:
+                        yield log_callback("正在生成分析报告...", "streaming", chunk)
+                content = ''.join(chunks) or None
+            else:
+                response = self._post_generate_content(url, 'gemini-2.5-pro', headers, payload,
+                                                       timeout=get_timeout(Config.GEMINI_VIDEO_TIMEOUT))
+                
+                if log_callback:
+                    yield log_callback("正在解析分析结果...", "info")
+                
+                data = response.json()
+                if 'candidates' in data and len(data['candidates']) > 0:
+                    content = data['candidates'][0]['content']['parts'][0]['text']
+            
+            # 提取生成的内容
+            if content:
+                if log_callback:
+                    yield log_callback("视频分析完成", "success")
+                
+                yield self._build_video_analysis(content)
+            else:
+                if log_callback:
+                    yield log_callback("Gemini API返回了空的分析结果", "error")
+                raise Exception("Gemini API返回了空的分析结果")
+                
+        except requests.RequestException as e:
+            if log_callback:
+                yield log_callback(f"Gemini API请求失败: {str(e)}", "error")
+            raise Exception(f"Gemini视频分析失败: {str(e)}")
+    
+    def _build_video_analysis(self, content):
+        """由报告正文构建分析结果，同时提供原始内容和结构化数据"""
+        analysis_result = {
+            'raw_content': content,
+            'summary': content  # 保持兼容性
+        }
+        
+        # 解析出结构化数据以便后续处理
+        try:
+            parsed_result = self._parse_analysis_result(content)
+            analysis_result.update(parsed_result)
+        except Exception as e:
+            # 如果解析失败，至少保证基本字段存在
+            analysis_result.update({
+                'companies': [],
+                'market_events': [],
+                'investment_views': [],
+                'risks': []
+            })
+        return analysis_result
+    
+    def analyze_video_with_stocks_with_logging(self, video_url, log_callback=None, language='en'):
+        """
+        一次请求同时生成分析报告并提取股票（结构化输出，视频只需处理一次）
+        
+        Args:
+            video_url: YouTube视频URL
+            log_callback: 日志回调函数
+            language: 报告语言
+        
+        Yields:
+            日志；最后产出 (video_analysis, stock_extraction)，格式与
+            analyze_video_with_logging、extract_stocks_from_video_with_logging 的结果相同
+        
+        Raises:
+            Exception: 请求失败或返回内容不符合结构（调用方可改用分两次请求的流程）
+        """
+        if log_callback:
+            yield log_callback("开始分析视频内容并提取股票信息...", "step")
+        
+        prompt = self._build_analysis_prompt(language) + """
+
+**# 输出格式**
+以JSON对象返回，包含以下字段：
+- report_markdown：上述完整的Markdown分析报告（语言、结构与篇幅要求不变）
+- extracted_stocks：视频中明确提到的股票或公司，每项包含 symbol（美股代码，如AAPL）、name（公司名称）、
+  confidence（在视频中的重要性和讨论深度：high/medium/low）、sentiment（观点倾向：positive/negative/neutral）、
+  discussion_points（讨论要点）
+- summary：视频中股票讨论的总体摘要
+如果视频中没有明确提到具体股票，extracted_stocks 返回空数组。
+"""
+        
+        if log_callback:
+            yield log_callback("正在处理视频分析与股票提取...", "info")
+        
+        try:
+            data = self.generate_structured(
+                [{'text': prompt}, {'file_data': {'file_uri': video_url}}],
+                COMBINED_ANALYSIS_SCHEMA,
+                timeout=Config.GEMINI_VIDEO_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            if log_callback:
+                yield log_callback(f"Gemini API请求失败: {str(e)}", "error")
+            raise Exception(f"Gemini视频分析失败: {str(e)}")
+        
+        report = data['report_markdown']
+        if not report.strip():
+            raise StructuredOutputError("返回结果缺少分析报告")
+        stock_extraction = {
+            'extracted_stocks': self._normalize_extracted_stocks(data.get('extracted_stocks')),
+            'summary': data.get('summary') or ''
+        }
+        
+        if log_callback:
+            yield log_callback("视频分析与股票提取完成", "success")
+        yield self._build_video_analysis(report), stock_extraction
+    
+    def generate_structured(self, parts, schema, timeout=None, model='gemini-2.5-pro'):
+        """
+        按 responseSchema 生成结构化结果，返回校验通过的JSON对象
+        
+        Args:
+            parts: 请求内容 parts（文本、视频等）
+            schema: 返回结构（responseSchema）
+            timeout: 读超时（秒），默认 Config.GEMINI_TEXT_TIMEOUT
+            model: 模型名称
+        
+        Returns:
+            dict: 符合 schema 的JSON对象
+        
+        Raises:
+            requests.RequestException: 请求失败
+            StructuredOutputError: 返回内容经修复重试后仍不符合结构
+        """
+        try:
+            text = self._request_json(parts, schema, timeout or Config.GEMINI_TEXT_TIMEOUT, model)
+        except ValueError as e:
+            raise StructuredOutputError(str(e))
+        return self._parse_structured(text, schema)
+    
+    def _parse_structured(self, text, schema):
+        """
+        解析并校验结构化结果；不符合结构时用纯文本请求修复一次（不重新处理视频）
+        
+        Raises:
+            StructuredOutputError: 修复后仍不符合结构
+        """
+        try:
+            data = extract_json(text)
+            validate(data, schema)
+            return data
+        except ValueError as e:
+            error = e
+        
+        print(f"结构化结果校验失败，尝试修复: {error}")
+        try:
+            repaired = self._repair_json(text, schema, error)
+            data = extract_json(repaired)
+            validate(data, schema)
+        except (ValueError, requests.RequestException) as e:
+            raise StructuredOutputError(f"AI返回结果解析失败: {e}")
+        return data
+    
+    def _repair_json(self, text, schema, error):
+        """用轻量模型把不符合结构的回复修复为有效JSON（只处理文本）"""
+        prompt = f"""下面的内容应当是符合指定结构的JSON，但校验失败：{error}
+请将其修复为符合结构的有效JSON。只保留原文中已有的信息，不要补充新内容。
+
+{text or ''}"""
+        return self._request_json(
+            [{'text': prompt}], schema, Config.GEMINI_TEXT_TIMEOUT, Config.GEMINI_REPAIR_MODEL
+        )
+    
+    def _request_json(self, parts, schema, timeout, model):
+        """
+        调用 generateContent，要求返回JSON（schema 为 None 时不限定结构），返回回复文本
+        
+        Raises:
+            requests.RequestException: 请求失败
+            ValueError: 返回了空结果
+        """
+        url = f"{self.base_url}/models/{model}:generateContent"
+        headers = {
+            'x-goog-api-key': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        generation_config = {'responseMimeType': 'application/json'}
+        if schema is not None:
+            generation_config['responseSchema'] = schema
+        payload = {
+            'contents': [{'parts': parts}],
+            'generationConfig': generation_config
+        }
+        
+        response = self._post_generate_content(url, model, headers, payload, timeout=get_timeout(timeout))
+        
+        candidates = response.json().get('candidates') or []
+        if not candidates:
+            raise ValueError("Gemini API返回了空结果")
+        return ''.join(
+            part.get('text', '') for part in candidates[0].get('content', {}).get('parts', [])
+            if not part.get('thought')
+        )
+    
+    def _normalize_extracted_stocks(self, stocks):
+        """规范化提取的股票列表：代码转大写，去掉无代码与重复项"""
+        normalized = []
+        seen = set()
+        for stock in stocks or []:
+            if not isinstance(stock, dict):
+                continue
+            symbol = str(stock.get('symbol') or '').strip().upper()
+            if not symbol or symbol in seen:
+                continue
+            seen.add(symbol)
+            normalized.append({
+                'symbol': symbol,
+                'name': stock.get('name') or '',
+                'confidence': stock.get('confidence') or 'medium',
+                'sentiment': stock.get('sentiment') or 'neutral',
+                'discussion_points': list(stock.get('discussion_points') or [])
+            })
+        return normalized
+    
+    def _build_analysis_prompt(self, language='en'):
+        """生成视频投资分析报告的提示词"""
+        # 根据语言设置日期格式和提示词
+        if language == 'en':
+            current_date = datetime.now().strftime('%B %d, %Y')
+            return f"""
 ### **【YouTube Video Investment Analysis Report Generation】**
 
 **# Important Notes**
@@ -99,9 +425,9 @@ Conduct in-depth analysis of **each** investment target or theme mentioned in th
 - **Format:** Strictly use Markdown format, including appropriate titles, lists, bold text, etc.
 - **Date Format:** The date in the report header must use: {current_date}
 """
-            else:  # 默认中文
-                current_date = datetime.now().strftime('%Y年%m月%d日')
-                prompt = f"""
+        else:  # 默认中文
+            current_date = datetime.now().strftime('%Y年%m月%d日')
+            return f"""
 ### **【YouTube视频投资分析报告生成】**
 
 **# 重要说明**
@@ -180,77 +506,59 @@ Conduct in-depth analysis of **each** investment target or theme mentioned in th
 
 **请开始分析视频内容。**
             """
+    
+    def _post_generate_content(self, url, model, headers, payload, **kwargs):
+        """
+        发送生成请求；内容包含视频时引用上下文缓存，缓存被服务端拒绝（已过期或删除）时改为内联视频重试一次
         
-        if log_callback:
-            yield log_callback("正在连接LLM API...", "info")
-            
-        url = f"{self.base_url}/models/gemini-2.5-pro:generateContent"
-        
-        headers = {
-            'x-goog-api-key': self.api_key,
-            'Content-Type': 'application/json'
-        }
+        Args:
+            url: generateContent/streamGenerateContent 接口地址
+            model: 模型名称（上下文缓存按模型区分）
+            headers: 请求头
+            payload: 请求体（视频以 file_data 内联）
+            **kwargs: 传给 session.post 的其他参数
         
-        payload = {
-            'contents': [{
-                'parts': [
-                    {'text': prompt},
-                    {
-                        'file_data': {
-                            'file_uri': video_url
-                        }
-                    }
-                ]
-            }]
-        }
+        Raises:
+            requests.RequestException: 请求失败
+        """
+        request_payload, context_key = self.context_cache.apply(model, payload)
+        response = self.session.post(url, headers=headers, json=request_payload, **kwargs)
+        if context_key is not None and response.status_code in (400, 403, 404):
+            print(f"Gemini上下文缓存不可用（HTTP {response.status_code}），改为直接发送视频")
+            response.close()
+            self.context_cache.invalidate(context_key)
+            response = self.session.post(url, headers=headers, json=payload, **kwargs)
+        response.raise_for_status()
+        return response
+    
+    def _stream_generate_content(self, url, headers, payload, model):
+        """
+        调用 streamGenerateContent（SSE），逐段产出生成的文本
         
-        try:
-            if log_callback:
-                yield log_callback("正在处理视频分析...", "info")
-                
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            if log_callback:
-                yield log_callback("正在解析分析结果...", "info")
-            
-            data = response.json()
+        Args:
+            url: streamGenerateContent 接口地址
+            headers: 请求头
+            payload: 请求体
+            model: 模型名称
+        """
+        with self._post_generate_content(url, model, headers, payload, params={'alt': 'sse'}, stream=True,
+                                         timeout=get_timeout(Config.GEMINI_VIDEO_TIMEOUT)) as response:
+            # SSE响应通常不带charset，显式指定避免中文乱码
+            response.encoding = 'utf-8'
             
-            # 提取生成的内容
-            if 'candidates' in data and len(data['candidates']) > 0:
-                content = data['candidates'][0]['content']['parts'][0]['text']
-                if log_callback:
-                    yield log_callback("视频分析完成", "success")
-                
-                # 返回完整的分析结果，同时提供原始内容和结构化数据
-                analysis_result = {
-                    'raw_content': content,
-                    'summary': content  # 保持兼容性
-                }
-                
-                # 解析出结构化数据以便后续处理
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
                 try:
-                    parsed_result = self._parse_analysis_result(content)
-                    analysis_result.update(parsed_result)
-                except Exception as e:
-                    # 如果解析失败，至少保证基本字段存在
-                    analysis_result.update({
-                        'companies': [],
-                        'market_events': [],
-                        'investment_views': [],
-                        'risks': []
-                    })
+                    event = json.loads(line[5:].strip())
+                except json.JSONDecodeError:
+                    continue
                 
-                yield analysis_result
-            else:
-                if log_callback:
-                    yield log_callback("Gemini API返回了空的分析结果", "error")
-                raise Exception("Gemini API返回了空的分析结果")
-                
-        except requests.RequestException as e:
-            if log_callback:
-                yield log_callback(f"Gemini API请求失败: {str(e)}", "error")
-            raise Exception(f"Gemini视频分析失败: {str(e)}")
+                for candidate in event.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        # 跳过思考过程，仅输出正文
+                        if part.get('text') and not part.get('thought'):
+                            yield part['text']
     
     def extract_stocks_from_video_with_logging(self, video_url, log_callback=None):
         """
@@ -290,54 +598,33 @@ Conduct in-depth analysis of **each** investment target or theme mentioned in th
         
         if log_callback:
             yield log_callback("正在连接Gemini API进行股票提取...", "info")
-            
-        url = f"{self.base_url}/models/gemini-2.5-pro:generateContent"
-        
-        headers = {
-            'x-goog-api-key': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
-        payload = {
-            'contents': [{
-                'parts': [
-                    {'text': prompt},
-                    {
-                        'file_data': {
-                            'file_uri': video_url
-                        }
-                    }
-                ]
-            }]
-        }
         
         try:
             if log_callback:
                 yield log_callback("正在处理股票提取...", "info")
-                
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
             
-            if log_callback:
-                yield log_callback("正在解析提取结果...", "info")
+            # 按结构返回JSON，解析失败时只对文本做一次修复重试，不重新处理视频
+            data = self.generate_structured(
+                [{'text': prompt}, {'file_data': {'file_uri': video_url}}],
+                STOCK_EXTRACTION_SCHEMA,
+                timeout=Config.GEMINI_VIDEO_TIMEOUT,
+            )
             
-            data = response.json()
-            
-            # 提取生成的内容
-            if 'candidates' in data and len(data['candidates']) > 0:
-                content = data['candidates'][0]['content']['parts'][0]['text']
-                if log_callback:
-                    yield log_callback("股票提取完成", "success")
-                yield self._parse_stock_extraction_result(content)
-            else:
-                if log_callback:
-                    yield log_callback("Gemini API返回了空的股票提取结果", "error")
-                raise Exception("Gemini API返回了空的股票提取结果")
+            if log_callback:
+                yield log_callback("股票提取完成", "success")
+            yield {
+                'extracted_stocks': self._normalize_extracted_stocks(data['extracted_stocks']),
+                'summary': data['summary']
+            }
                 
         except requests.RequestException as e:
             if log_callback:
                 yield log_callback(f"股票提取失败: {str(e)}", "error")
             raise Exception(f"Gemini股票提取失败: {str(e)}")
+        except StructuredOutputError as e:
+            if log_callback:
+                yield log_callback(f"股票提取结果解析失败: {str(e)}", "error")
+            raise
 
     def analyze_video(self, video_url, prompt=None):
         """
@@ -363,40 +650,6 @@ Conduct in-depth analysis of **each** investment target or theme mentioned in th
                 return result
         return None
     
-    def _parse_stock_extraction_result(self, content):
-        """解析股票提取结果"""
-        try:
-            # 尝试解析JSON格式的回复
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return result
-        except:
-            pass
-        
-        # 如果JSON解析失败，使用备用解析方法
-        extracted_stocks = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            # 简单的股票代码识别
-            stock_symbols = re.findall(r'\b[A-Z]{1,5}\b', line)
-            for symbol in stock_symbols:
-                if len(symbol) >= 2 and symbol in ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META', 'NFLX', 'AMD', 'INTC']:
-                    extracted_stocks.append({
-                        'symbol': symbol,
-                        'name': '',
-                        'confidence': 'medium',
-                        'sentiment': 'neutral',
-                        'discussion_points': []
-                    })
-        
-        return {
-            'extracted_stocks': extracted_stocks,
-            'summary': content[:200]
-        }
-    
     def _parse_analysis_result(self, content):
         """解析Gemini分析结果"""
         return {
@@ -491,61 +744,7 @@ Conduct in-depth analysis of **each** investment target or theme mentioned in th
             if any(keyword in line for keyword in view_keywords):
                 views.append(line.strip())
         return views[:3]
-    
-
-    def _parse_batch_analysis_result(self, content, videos):
-        """解析批量分析结果"""
-        try:
-            # 尝试解析JSON格式的回复
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                # 添加视频信息到结果中
-                if 'individual_analyses' in result:
-                    for i, analysis in enumerate(result['individual_analyses']):
-                        if i < len(videos):
-                            analysis['video_info'] = videos[i]
-                return result
-        except:
-            pass
         
-        # 如果JSON解析失败，使用备用解析方法
-        return self._fallback_batch_analysis(content, videos)
-    
-    def _fallback_batch_analysis(self, content, videos):
-        """备用的批量分析解析方法"""
-        return {
-            'batch_summary': {
-                'total_videos': len(videos),
-                'analysis_date': datetime.now().strftime('%Y-%m-%d'),
-                'main_themes': ['投资分析', '市场观点'],
-                'overall_sentiment': '中性',
-                'key_insights': [content[:200] + '...' if len(content) > 200 else content]
-            },
-            'individual_analyses': [
-                {
-                    'video_index': i + 1,
-                    'video_info': video,
-                    'core_message': f'视频{i+1}的核心观点',
-                    'investment_thesis': '待分析',
-                    'mentioned_companies': [],
-                    'key_points': ['内容分析中'],
-                    'sentiment': '中性',
-                    'confidence_level': '中'
-                }
-                for i, video in enumerate(videos)
-            ],
-            'consolidated_insights': {
-                'common_themes': ['投资主题'],
-                'consensus_views': ['市场观点'],
-                'divergent_opinions': [],
-                'investment_opportunities': [],
-                'risk_factors': []
-            },
-            'raw_content': content
-        }
-    
     def analyze_batch_videos(self, video_urls, log_callback=None, language='en'):
         """
         批量分析多个YouTube视频（最多10个）
@@ -734,8 +933,8 @@ Brief analysis of each video:
             if log_callback:
                 yield log_callback("正在处理批量视频分析...", "info")
                 
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
+            response = self._post_generate_content(url, 'gemini-2.5-pro', headers, payload,
+                                                   timeout=get_timeout(Config.GEMINI_VIDEO_TIMEOUT))
             
             if log_callback:
                 yield log_callback("正在解析批量分析结果...", "info")
@@ -774,6 +973,42 @@ Brief analysis of each video:
                 risks.append(line.strip())
         return risks[:3]
     
+    def extract_stocks_from_text(self, content):
+        """
+        从报告文本中提取美股股票信息（结构化输出，不使用搜索工具）
+        
+        提取只依据传入的报告文本，不需要外部信息；代码有效性由调用方按格式校验，
+        并在拉取行情时由 Tushare 确认。此外 gemini-2.5 系列不支持在同一请求中
+        同时使用 google_search 工具与 responseSchema，保留搜索就无法按结构返回。
+        
+        Args:
+            content: 报告内容
+        
+        Returns:
+            list: 股票列表，每项含 symbol、name、confidence、recommendation、context
+        
+        Raises:
+            requests.RequestException: 请求失败
+            StructuredOutputError: 修复重试后仍无法解析
+        """
+        prompt = f"""
+作为专业的金融分析师，请仔细分析以下投资报告内容，提取其中提到的所有美股股票信息。
+
+**分析内容：**
+{content}
+
+**重要要求：**
+1. 只提取在美国交易所(NYSE, NASDAQ)交易的股票
+2. symbol 必须是标准的1-5位大写字母股票代码(如AAPL)，name 为公司全名(如Apple Inc.)
+3. confidence根据在报告中的重要程度设置：详细分析的为high，简单提及的为medium，模糊提及的为low
+4. recommendation根据报告的实际建议设置(买入/卖出/持有)，如果没有明确建议就写"无明确建议"
+5. context 为在报告中的相关描述(不超过100字)
+6. 如果没有找到任何股票，返回空的stocks数组
+7. 最多返回10只股票
+"""
+        data = self.generate_structured([{'text': prompt}], REPORT_STOCKS_SCHEMA)
+        return data['stocks']
+    
     def generate_text(self, prompt):
         """
         使用Gemini生成文本内容
@@ -812,7 +1047,8 @@ Brief analysis of each video:
             }
             
             print("📡 正在调用Gemini API (启用搜索工具)...")
-            response = requests.post(url, headers=headers, json=data, timeout=180)  # 增加超时时间以支持搜索工具
+            response = self.session.post(url, headers=headers, json=data,
+                                         timeout=get_timeout(Config.GEMINI_TEXT_TIMEOUT))  # 搜索工具需要较长超时
             
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,214 @@
+"""后台任务服务：在有界线程池中执行耗时的视频分析流程
+
+职责：
+- 提交任务立即返回 job_id，分析在工作线程中执行，与HTTP请求线程解耦
+- 每个任务的进度事件写入环形缓冲区，客户端可随时附着/重新附着事件流
+- 浏览器断开或刷新不会中断分析，也不会重复触发付费的Gemini调用
+- 单飞去重：相同 key（缓存键）的任务进行中时，后来的请求直接订阅该任务
+
+任务目标约定与 GeminiService 的 *_with_logging 生成器一致：
+- 产出 str：SSE 事件（形如 "data: {...}\\n\\n"），写入事件缓冲区
+- 产出其他对象：视为任务最终结果，保存在 job.result
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config.settings import Config
+
+
+class JobQueueFullError(Exception):
+    """任务队列已满"""
+
+
+class Job:
+    """单个后台任务的状态与事件缓冲区"""
+
+    def __init__(self, job_id: str, name: str, buffer_size: int, key: Optional[str] = None) -> None:
+        self.id = job_id
+        self.name = name
+        self.key = key
+        self.subscribers = 1
+        self.status = 'queued'  # queued/running/done/failed
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # 环形缓冲区：(序号, 事件文本)
+        self.events: deque = deque(maxlen=buffer_size)
+        self.last_seq = 0
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def append_event(self, payload: str) -> None:
+        """追加一条事件并唤醒等待中的订阅者。"""
+        with self.condition:
+            self.last_seq += 1
+            self.events.append((self.last_seq, payload))
+            self.condition.notify_all()
+
+    def start(self) -> None:
+        """标记任务开始执行并唤醒订阅者。"""
+        with self.condition:
+            self.status = 'running'
+            self.condition.notify_all()
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        """标记任务结束并唤醒所有订阅者。"""
+        with self.condition:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.condition.notify_all()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态摘要（不含事件内容）。"""
+        return {
+            'job_id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'error': self.error,
+            'subscribers': self.subscribers,
+            'last_event_id': self.last_seq,
+            'created_at': int(self.created_at),
+            'finished_at': int(self.finished_at) if self.finished_at else None,
+        }
+
+
+class JobService:
+    """后台分析任务服务"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        buffer_size: Optional[int] = None,
+        result_ttl: Optional[int] = None,
+    ) -> None:
+        self.max_workers = max_workers or Config.ANALYSIS_WORKERS
+        self.max_pending = max_pending or Config.ANALYSIS_QUEUE_SIZE
+        self.buffer_size = buffer_size or Config.JOB_EVENT_BUFFER
+        self.result_ttl = result_ttl or Config.JOB_RESULT_TTL
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis-job')
+        self._jobs: Dict[str, Job] = {}
+        # 进行中的任务：key -> Job（单飞去重）
+        self._inflight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        name: str,
+        target: Callable[..., Iterator[Any]],
+        *args,
+        key: Optional[str] = None,
+        **kwargs,
+    ) -> Job:
+        """提交任务，返回 Job。
+
+        若传入 key 且已有相同 key 的任务尚未结束，则不再新建任务，
+        直接返回该任务（订阅者计数加一），调用方订阅其进度与结果即可。
+
+        Args:
+            name: 任务类型名称（用于状态查询）
+            target: 生成器函数，按模块说明的约定产出事件与结果
+            *args, **kwargs: 传给 target 的参数
+            key: 去重键，通常为 CacheService._generate_cache_key 的结果
+
+        Raises:
+            JobQueueFullError: 运行中与排队中的任务数超过上限
+        """
+        with self._lock:
+            if key:
+                inflight = self._inflight.get(key)
+                if inflight and not inflight.finished:
+                    inflight.subscribers += 1
+                    return inflight
+
+            self._purge_expired()
+            unfinished = sum(1 for job in self._jobs.values() if not job.finished)
+            if unfinished >= self.max_workers + self.max_pending:
+                raise JobQueueFullError("分析任务队列已满，请稍后再试")
+
+            job = Job(uuid.uuid4().hex, name, self.buffer_size, key)
+            self._jobs[job.id] = job
+            if key:
+                self._inflight[key] = job
+
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按ID获取任务。"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stream(self, job: Job, after: int = 0, keepalive: float = 15.0) -> Iterator[str]:
+        """订阅任务事件流。
+
+        先补发缓冲区中序号大于 after 的事件，然后持续推送新事件直到任务结束。
+        每条事件带 SSE 的 id 行，便于客户端断线后从 Last-Event-ID 续传。
+
+        Args:
+            job: 任务
+            after: 已收到的最后事件序号
+            keepalive: 无新事件时发送心跳注释的间隔（秒）
+        """
+        while True:
+            with job.condition:
+                pending = [(seq, payload) for seq, payload in job.events if seq > after]
+                if not pending and not job.finished:
+                    job.condition.wait(keepalive)
+                    pending = [(seq, payload) for seq, payload in job.events if seq > after]
+                finished = job.finished
+
+            if pending:
+                for seq, payload in pending:
+                    after = seq
+                    yield f"id: {seq}\n{payload}"
+            elif finished:
+                return
+            else:
+                yield ": keep-alive\n\n"
+
+    def _run(self, job: Job, target: Callable[..., Iterator[Any]], args, kwargs) -> None:
+        """工作线程：执行任务并收集事件。"""
+        job.start()
+        try:
+            for item in target(*args, **kwargs):
+                if isinstance(item, str):
+                    job.append_event(item)
+                else:
+                    job.result = item
+            job.finish('done')
+        except Exception as e:
+            error_data = {
+                'type': 'error',
+                'message': str(e),
+                'timestamp': int(time.time() * 1000)
+            }
+            job.append_event(f"data: {json.dumps(error_data)}\n\n")
+            job.finish('failed', str(e))
+        finally:
+            if job.key:
+                with self._lock:
+                    if self._inflight.get(job.key) is job:
+                        del self._inflight[job.key]
+
+    def _purge_expired(self) -> None:
+        """清理已结束且超过保留时间的任务（调用方持有锁）。"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,292 @@
+"""PDF渲染进程池：在常驻的工作进程中用 WeasyPrint 生成PDF
+
+- 工作进程启动时解析一次报告样式表（约190行CSS）并预热字体加载，之后每个任务只做HTML排版，
+  不再每次请求重新解析 CSS
+- 排版在工作进程中执行，并发下载不会占住 Web 线程，也不会抢占主进程的 GIL 与内存
+- 带样式渲染失败时在同一任务内改用纯文本HTML重试，调用方只需提交一次
+- 单个任务有超时（PDF_RENDER_TIMEOUT）：工作进程内用定时器信号中断排版；
+  若超过宽限时间仍未返回（卡在原生代码中），由负责该进程的线程结束这一个工作进程并另起一个，
+  其他工作进程中的任务与排队中的任务不受影响
+- 工作进程的内存有上限（PDF_RENDER_MEMORY_MB，在进程启动时的虚拟内存基础上增加的额度），
+  超出时任务以 MemoryError 失败，不会拖垮整机
+- 排队任务数有上限（PDF_RENDER_QUEUE）；PDF_RENDER_WORKERS=0 时在当前进程内串行渲染
+
+每个工作进程由一个调度线程独占，任务经管道发送；工作进程由 forkserver 派生（见 worker_context），
+替换退出的工作进程时不会 fork 多线程的 Web 进程。调度线程与工作进程在首次提交任务时启动，
+只导入本模块或创建 PdfRenderPool 不会启动任何进程。
+"""
+
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import List, Optional
+
+from config.settings import Config
+from services.worker_context import get_worker_context
+
+# 超时信号未能中断任务时，再等待该时间（秒）后结束工作进程
+_HARD_TIMEOUT_GRACE = 10
+
+_stylesheets: Optional[List] = None
+_stylesheets_lock = threading.Lock()
+
+
+class PdfRenderQueueFullError(Exception):
+    """PDF渲染队列已满"""
+
+
+class PdfRenderTimeoutError(Exception):
+    """PDF渲染超时"""
+
+
+class PdfRenderWorkerError(Exception):
+    """PDF工作进程异常退出"""
+
+
+def _limit_memory(limit_mb: int) -> None:
+    """限制当前进程可再申请的虚拟内存（在已有用量基础上增加 limit_mb）。"""
+    import resource
+
+    with open('/proc/self/statm') as f:
+        current_bytes = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    limit = current_bytes + limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _load_stylesheets(css_content: str) -> List:
+    """解析样式表（每个进程只解析一次）。"""
+    global _stylesheets
+    with _stylesheets_lock:
+        if _stylesheets is None:
+            from weasyprint import CSS
+            _stylesheets = [CSS(string=css_content)]
+        return _stylesheets
+
+
+def _init_worker(css_content: str, memory_limit_mb: int) -> None:
+    """工作进程初始化：限制内存、解析样式表并预热。"""
+    if memory_limit_mb > 0:
+        try:
+            _limit_memory(memory_limit_mb)
+        except (OSError, ValueError) as e:
+            print(f"设置PDF工作进程内存上限失败: {e}")
+    from weasyprint import HTML
+
+    stylesheets = _load_stylesheets(css_content)
+    # 预先渲染一次，加载字体
+    HTML(string='<p>预热</p>').write_pdf(stylesheets=stylesheets)
+
+
+@contextmanager
+def _job_timeout(timeout: float):
+    """在工作进程（主线程）内用定时器信号限制任务时长；非主线程（进程内渲染）中不生效。"""
+    if timeout <= 0 or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise PdfRenderTimeoutError(f"PDF渲染超过 {timeout:g} 秒")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def render_pdf(html_content: str, fallback_html: Optional[str] = None, timeout: float = 0) -> bytes:
+    """渲染PDF，带样式渲染失败时改用 fallback_html（不带样式）重试，返回PDF字节。"""
+    from weasyprint import HTML
+
+    with _job_timeout(timeout):
+        try:
+            pdf_bytes = HTML(string=html_content).write_pdf(stylesheets=_stylesheets)
+            print("成功生成带样式的PDF")
+        except (PdfRenderTimeoutError, MemoryError):
+            raise
+        except Exception as style_error:
+            if fallback_html is None:
+                raise
+            print(f"样式PDF生成失败，使用纯文本方案: {style_error}")
+            pdf_bytes = HTML(string=fallback_html).write_pdf()
+            print("成功生成纯文本PDF")
+    return pdf_bytes
+
+
+def _worker_main(conn, css_content: str, memory_limit_mb: int) -> None:
+    """工作进程主循环：逐个接收任务并返回 ('ok', PDF字节) 或 ('error', 异常)，父进程关闭管道后退出。"""
+    _init_worker(css_content, memory_limit_mb)
+    while True:
+        try:
+            html_content, fallback_html, timeout = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = ('ok', render_pdf(html_content, fallback_html, timeout))
+        except (PdfRenderTimeoutError, MemoryError) as e:
+            reply = ('error', e)
+        except Exception as e:
+            # 第三方异常不一定能在父进程中还原，只传递类型与信息
+            reply = ('error', RuntimeError(f"{type(e).__name__}: {e}"))
+        conn.send(reply)
+
+
+class _RenderWorker:
+    """一个PDF工作进程及其管道（只由一个调度线程使用）"""
+
+    def __init__(self, css_content: str, memory_limit_mb: int) -> None:
+        context = get_worker_context()
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, css_content, memory_limit_mb),
+            name='pdf-render-worker',
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def render(self, html_content: str, fallback_html: Optional[str], timeout: float) -> bytes:
+        """
+        Raises:
+            PdfRenderTimeoutError: 任务超时（超过宽限时间时工作进程已被结束）
+            PdfRenderWorkerError: 工作进程异常退出（如超出内存上限被系统终止）
+        """
+        try:
+            self.conn.send((html_content, fallback_html, timeout))
+            # 正常情况下工作进程内的定时器信号会先中断任务并返回超时错误
+            if not self.conn.poll(timeout + _HARD_TIMEOUT_GRACE if timeout > 0 else None):
+                self.stop()
+                raise PdfRenderTimeoutError(f"PDF渲染超过 {timeout:g} 秒，已结束工作进程")
+            status, value = self.conn.recv()
+        except (EOFError, OSError):
+            self.stop()
+            raise PdfRenderWorkerError("PDF渲染进程异常退出")
+        if status == 'error':
+            raise value
+        return value
+
+    def stop(self) -> None:
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+
+
+class PdfRenderPool:
+    """PDF渲染进程池"""
+
+    def __init__(
+        self,
+        css_content: str,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+    ) -> None:
+        self.css_content = css_content
+        self.max_workers = Config.PDF_RENDER_WORKERS if max_workers is None else max_workers
+        self.max_pending = Config.PDF_RENDER_QUEUE if max_pending is None else max_pending
+        self.timeout = Config.PDF_RENDER_TIMEOUT if timeout is None else timeout
+        self.memory_limit_mb = Config.PDF_RENDER_MEMORY_MB if memory_limit_mb is None else memory_limit_mb
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # 进程内渲染时串行执行，避免多个请求线程同时排版占用内存
+        self._inline_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.max_workers) + self.max_pending)
+
+    def start(self) -> None:
+        """启动调度线程与工作进程（工作进程启动时完成预热）。"""
+        if self.max_workers <= 0:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.max_workers):
+                thread = threading.Thread(target=self._dispatch, name=f'pdf-render-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def submit(self, html_content: str, fallback_html: Optional[str] = None) -> Future:
+        """提交渲染任务，返回结果为PDF字节的 Future。
+
+        Raises:
+            PdfRenderQueueFullError: 进行中与排队中的任务数超过上限
+        """
+        future: Future = Future()
+        if self.max_workers <= 0:
+            try:
+                _load_stylesheets(self.css_content)
+                with self._inline_lock:
+                    future.set_result(render_pdf(html_content, fallback_html))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self._slots.acquire(blocking=False):
+            raise PdfRenderQueueFullError("PDF生成队列已满，请稍后再试")
+        future.add_done_callback(lambda _: self._slots.release())
+        self.start()
+        self._jobs.put((future, html_content, fallback_html))
+        return future
+
+    def result(self, future: Future) -> bytes:
+        """等待渲染结果（超时由调度线程保证，任务最终会完成或报错）。
+
+        Raises:
+            PdfRenderTimeoutError: 任务超过 PDF_RENDER_TIMEOUT
+            PdfRenderWorkerError: 工作进程异常退出
+        """
+        return future.result()
+
+    def render(self, html_content: str, fallback_html: Optional[str] = None) -> bytes:
+        """提交并等待渲染结果。"""
+        return self.result(self.submit(html_content, fallback_html))
+
+    def _dispatch(self) -> None:
+        """调度线程：独占一个工作进程，逐个执行队列中的任务；工作进程退出后另起一个。"""
+        worker = None
+        try:
+            while True:
+                if worker is None or not worker.is_alive():
+                    if worker is not None:
+                        worker.stop()
+                    try:
+                        worker = _RenderWorker(self.css_content, self.memory_limit_mb)
+                    except Exception as e:
+                        print(f"启动PDF工作进程失败: {e}")
+                        worker = None
+
+                item = self._jobs.get()
+                if item is None:
+                    return
+                future, html_content, fallback_html = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if worker is None:
+                        raise PdfRenderWorkerError("PDF工作进程不可用")
+                    future.set_result(worker.render(html_content, fallback_html, self.timeout))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            if worker is not None:
+                worker.stop()
@@ -12,7 +12,7 @@
 - 创建时间 created_at（UTC）
 """
 
-from typing import Optional
+from typing import Optional, Set
 
 from services.youtube_service import YouTubeService
 from utils import db as db_util
@@ -22,10 +22,11 @@ import sqlite3
 class RecordService:
     """分析记录服务"""
 
-    def __init__(self) -> None:
+    def __init__(self, youtube_service: Optional[YouTubeService] = None) -> None:
         # 确保表已初始化
         db_util.init_db()
-        self.youtube_service = YouTubeService()
+        # 复用外部传入的服务实例（共享同一连接池）
+        self.youtube_service = youtube_service or YouTubeService()
 
     def add_record(
         self,
@@ -93,6 +94,16 @@ class RecordService:
         finally:
             conn.close()
 
+    def list_cache_keys(self) -> Set[str]:
+        """返回分析记录中仍引用的全部 cache_key（缓存淘汰时保留这些条目）。"""
+        conn: sqlite3.Connection = db_util.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT DISTINCT cache_key FROM analysis_records WHERE cache_key IS NOT NULL")
+            return {row["cache_key"] for row in cur.fetchall()}
+        finally:
+            conn.close()
+
     def delete_by_cache_key(self, cache_key: str) -> int:
         """根据 cache_key 删除记录，返回删除行数。"""
         conn: sqlite3.Connection = db_util.get_connection()
@@ -1,16 +1,111 @@
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
-import markdown
-from weasyprint import HTML, CSS
+import threading
+from config.settings import Config
+from services.pdf_renderer import PdfRenderPool
+from utils.file_utils import atomic_write_bytes, touch_atime
+from utils.markdown_utils import render_markdown
 
 
 class ReportService:
     """投资报告生成服务"""
 
-    def __init__(self):
+    def __init__(self, pdf_dir='cache/pdf'):
         # 不使用FontConfiguration，避免字体问题
         self.font_config = None
+        self.pdf_dir = pdf_dir
+        # 同一报告的PDF生成串行执行，并发下载只渲染一次
+        self._pdf_locks = {}
+        self._pdf_locks_guard = threading.Lock()
+        # 后台预生成PDF的线程池
+        self._prerender_executor = ThreadPoolExecutor(
+            max_workers=max(1, Config.PDF_PRERENDER_WORKERS), thread_name_prefix='pdf-prerender'
+        )
+        # PDF排版在常驻工作进程中执行，样式表只在进程启动时解析一次；工作进程在首次生成PDF时启动
+        self.pdf_pool = PdfRenderPool(css_content=self._get_pdf_styles())
+
+    def get_pdf_path(self, cache_key):
+        """获取PDF缓存文件路径"""
+        return os.path.join(self.pdf_dir, f'{cache_key}.pdf')
+
+    def get_cached_pdf(self, cache_key, min_timestamp=None):
+        """
+        获取仍然有效的缓存PDF
+
+        有效条件：文件以 %PDF- 开头，且修改时间不早于分析结果的保存时间
+
+        Args:
+            cache_key: 缓存键
+            min_timestamp: 分析结果的保存时间（秒），早于此时间生成的PDF视为过期
+
+        Returns:
+            str: PDF文件路径；不存在或已过期返回 None
+        """
+        pdf_file = self.get_pdf_path(cache_key)
+        try:
+            stat = os.stat(pdf_file)
+            if stat.st_size == 0 or (min_timestamp and stat.st_mtime < min_timestamp):
+                return None
+            with open(pdf_file, 'rb') as f:
+                if f.read(5) != b'%PDF-':
+                    return None
+        except FileNotFoundError:
+            return None
+        return pdf_file
+
+    def get_or_generate_pdf_report(self, cache_key, load_report, min_timestamp=None):
+        """
+        获取PDF报告：有效的缓存PDF直接返回，否则生成
+
+        Args:
+            cache_key: 缓存键
+            load_report: 无参函数，返回 (cached_data, video_urls)，仅在需要生成时调用
+            min_timestamp: 分析结果的保存时间（秒）
+
+        Returns:
+            str: PDF文件路径
+        """
+        pdf_file = self.get_cached_pdf(cache_key, min_timestamp)
+        if pdf_file:
+            try:
+                # 记录访问时间，供缓存淘汰按LRU判断
+                touch_atime(pdf_file)
+            except OSError:
+                pass
+            return pdf_file
+
+        with self._get_pdf_lock(cache_key):
+            # 等锁期间可能已由其他请求生成
+            pdf_file = self.get_cached_pdf(cache_key, min_timestamp)
+            if pdf_file:
+                return pdf_file
+            cached_data, video_urls = load_report()
+            return self.generate_pdf_report(cache_key, cached_data, video_urls)
+
+    def prerender_in_background(self, render, *args):
+        """
+        提交后台PDF预生成任务（Config.PDF_PRERENDER 关闭时不执行）
+
+        Args:
+            render: 生成函数，如 main._get_pdf_report
+            *args: 传给 render 的参数
+        """
+        if not Config.PDF_PRERENDER:
+            return None
+
+        def _run():
+            try:
+                render(*args)
+            except Exception as e:
+                print(f"后台预生成PDF失败: {e}")
+
+        return self._prerender_executor.submit(_run)
+
+    def _get_pdf_lock(self, cache_key):
+        with self._pdf_locks_guard:
+            return self._pdf_locks.setdefault(cache_key, threading.Lock())
 
     def generate_pdf_report(self, cache_key, cached_data, video_urls):
         """
@@ -26,33 +121,22 @@ class ReportService:
         """
         try:
             # 创建PDF目录
-            pdf_dir = 'cache/pdf'
-            os.makedirs(pdf_dir, exist_ok=True)
+            os.makedirs(self.pdf_dir, exist_ok=True)
 
             # 生成PDF文件路径
-            pdf_file = os.path.join(pdf_dir, f'{cache_key}.pdf')
+            pdf_file = self.get_pdf_path(cache_key)
 
             # 生成HTML内容
             html_content = self._generate_html_content(cached_data, video_urls)
 
-            # 生成CSS样式
-            css_content = self._get_pdf_styles()
+            # 纯文本HTML，带样式生成失败时由工作进程在同一任务内改用
+            text_html = self._generate_text_pdf_content(cached_data, video_urls)
 
-            # 按优先级尝试不同的PDF生成方式
-            try:
-                # 方法1: 先尝试带样式的生成
-                html_doc = HTML(string=html_content)
-                css_doc = CSS(string=css_content)
-                html_doc.write_pdf(pdf_file, stylesheets=[css_doc])
-                print("成功生成带样式的PDF")
-            except Exception as style_error:
-                print(f"样式PDF生成失败，使用纯文本方案: {style_error}")
-                # 方法2: 直接使用纯文本PDF
-                text_html = self._generate_text_pdf_content(cached_data, video_urls)
-                html_doc = HTML(string=text_html)
-                html_doc.write_pdf(pdf_file)
-                print("成功生成纯文本PDF")
+            # 在PDF工作进程中渲染（样式表已预先解析）
+            pdf_bytes = self.pdf_pool.render(html_content, text_html)
 
+            # 原子写入，下载请求不会读到写了一半的PDF
+            atomic_write_bytes(pdf_file, pdf_bytes)
             return pdf_file
 
         except Exception as e:
@@ -365,12 +449,30 @@ class ReportService:
             return '<p>暂无内容</p>'
 
         try:
-            html = markdown.markdown(markdown_text, extensions=['extra', 'codehilite'])
-            return html
+            return render_markdown(markdown_text)
         except Exception as e:
             print(f"Markdown转换失败: {e}")
             return f'<p>{markdown_text}</p>'
 
+    def with_rendered_html(self, result):
+        """返回附带报告HTML（report.raw_markdown_html）的结果副本，供页面直接展示
+
+        HTML 不随分析结果保存，每次返回结果时经渲染缓存生成，同一份报告只解析一次。
+        """
+        report = result.get('report') if isinstance(result, dict) else None
+        if not isinstance(report, dict) or not report.get('raw_markdown_content'):
+            return result
+        html = self._render_report_html(report['raw_markdown_content'])
+        return dict(result, report=dict(report, raw_markdown_html=html))
+
+    def _render_report_html(self, markdown_text):
+        """渲染报告HTML，失败时返回 None（前端改为自行解析Markdown）"""
+        try:
+            return render_markdown(markdown_text)
+        except Exception as e:
+            print(f"Markdown预渲染失败: {e}")
+            return None
+
     def _get_analysis_type_name(self, analysis_type):
         """获取分析类型中文名称"""
         type_names = {
@@ -0,0 +1,104 @@
+"""股票指标计算：基于 NumPy/pandas 的列式计算
+
+输入为 Tushare us_daily 格式的 DataFrame（按交易日倒序），一次遍历各列得到：
+- 价格趋势（最新收盘价相对约一周前）、波动率（日涨跌幅标准差）
+- 区间收益率、年化波动率、均线、ATR、最大回撤、区间高低点、平均成交量
+历史记录通过整列类型转换 + to_dict('records') 批量生成，不再逐行 iterrows。
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOWS = (5, 10, 20, 50)
+ATR_WINDOW = 14
+TRADING_DAYS_PER_YEAR = 252
+
+
+def classify_trend(change_pct: float) -> str:
+    """按涨跌幅划分价格趋势。"""
+    if change_pct > 5:
+        return "强势上涨"
+    elif change_pct > 2:
+        return "温和上涨"
+    elif change_pct > -2:
+        return "横盘整理"
+    elif change_pct > -5:
+        return "温和下跌"
+    else:
+        return "大幅下跌"
+
+
+def _finite_or_none(value: Any) -> Any:
+    """NaN/inf 转为 None（jsonify 会输出浏览器 JSON.parse 无法解析的 NaN）。"""
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def to_historical_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """将日线转换为历史记录列表（保持输入顺序）。"""
+    records = pd.DataFrame({
+        'date': df['trade_date'].astype(str),
+        'open': df['open'].astype(float),
+        'high': df['high'].astype(float),
+        'low': df['low'].astype(float),
+        'close': df['close'].astype(float),
+        'volume': df['vol'].fillna(0).astype('int64'),
+        'pct_change': df['pct_change'].astype(float),
+    })
+    return records.to_dict('records')
+
+
+def compute_indicators(df: pd.DataFrame) -> Dict[str, Any]:
+    """计算价格趋势、波动率与扩展指标。
+
+    Returns:
+        dict: price_trend、volatility（与原有字段含义一致）以及 indicators（扩展指标）
+    """
+    n = len(df)
+    if n < 2:
+        return {'price_trend': "数据不足", 'volatility': 0, 'indicators': {}}
+
+    # 倒序 -> 正序，便于计算累计指标
+    close = df['close'].to_numpy(dtype=float)[::-1]
+    high = df['high'].to_numpy(dtype=float)[::-1]
+    low = df['low'].to_numpy(dtype=float)[::-1]
+    pct_change = df['pct_change'].to_numpy(dtype=float)
+    volume = df['vol'].to_numpy(dtype=float)
+
+    # 价格趋势：最新收盘价相对第 7 个交易日前（不足时取最早一天）
+    base_price = close[-1 - min(7, n - 1)]
+    trend_change = (close[-1] - base_price) / base_price * 100
+
+    daily_returns = close[1:] / close[:-1] - 1
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce([
+        high[1:] - low[1:],
+        np.abs(high[1:] - prev_close),
+        np.abs(low[1:] - prev_close),
+    ])
+    drawdown = close / np.maximum.accumulate(close) - 1
+
+    indicators = {
+        'period_return_pct': round(float((close[-1] / close[0] - 1) * 100), 2),
+        'annualized_volatility_pct': round(
+            float(np.nanstd(daily_returns, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100), 2
+        ) if n > 2 else 0.0,
+        'max_drawdown_pct': round(float(np.nanmin(drawdown) * 100), 2),
+        'period_high': float(np.nanmax(high)),
+        'period_low': float(np.nanmin(low)),
+        'avg_volume': int(np.nanmean(volume)) if not np.isnan(volume).all() else 0,
+        'atr': round(float(np.nanmean(true_range[-ATR_WINDOW:])), 4)
+        if n > 1 and not np.isnan(true_range[-ATR_WINDOW:]).all() else None,
+    }
+    for window in MA_WINDOWS:
+        indicators[f'ma{window}'] = round(float(close[-window:].mean()), 4) if n >= window else None
+
+    volatility = _finite_or_none(round(float(np.nanstd(pct_change)), 2)) if not np.isnan(pct_change).all() else None
+    return {
+        'price_trend': classify_trend(trend_change),
+        'volatility': 0 if volatility is None else volatility,
+        'indicators': {key: _finite_or_none(value) for key, value in indicators.items()},
+    }
@@ -1,6 +1,13 @@
 import tushare as ts
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from config.settings import Config
+from services.stock_store import StockBarStore
+from services.stock_indicators import compute_indicators, to_historical_records
+from utils.rate_limiter import RateLimiter
+
+# 进程内所有 StockService 共享的 Tushare 限流器
+_tushare_limiter = RateLimiter(Config.TUSHARE_RATE_LIMIT, 60)
 
 class StockService:
     """股票数据服务"""
@@ -12,6 +19,41 @@ class StockService:
             self.pro = ts.pro_api()
         else:
             raise Exception("未配置Tushare Token")
+        
+        # 本地日线存储：只拉取缺失的日期区间
+        self.bar_store = StockBarStore(
+            self._fetch_us_daily,
+            bulk_fetcher=self._fetch_us_daily_bulk if Config.TUSHARE_BULK_QUERY else None,
+        )
+    
+    def _fetch_us_daily(self, ts_code, start_date, end_date):
+        """调用 Tushare us_daily（日期为 YYYYMMDD），受每分钟调用次数限制"""
+        _tushare_limiter.acquire()
+        return self.pro.us_daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
+    
+    def _fetch_us_daily_bulk(self, ts_codes, start_date, end_date):
+        """一次 us_daily 请求获取多只股票（ts_code 逗号拼接）"""
+        _tushare_limiter.acquire()
+        return self.pro.us_daily(ts_code=','.join(ts_codes), start_date=start_date, end_date=end_date)
+    
+    def prefetch_by_date_range(self, symbols, start_date, end_date):
+        """
+        批量预取多只股票的日线到本地存储，之后的单只查询直接命中本地数据
+        
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期 (YYYY-MM-DD格式)
+            end_date: 结束日期 (YYYY-MM-DD格式)
+        """
+        try:
+            self.bar_store.prefetch_daily_bars(
+                symbols,
+                datetime.strptime(start_date, '%Y-%m-%d').strftime('%Y%m%d'),
+                datetime.strptime(end_date, '%Y-%m-%d').strftime('%Y%m%d'),
+            )
+        except Exception as e:
+            # 预取只是优化，失败时由单只获取兜底
+            print(f"批量预取股票数据失败: {e}")
     
     def get_stock_data(self, symbol, days=30):
         """
@@ -25,16 +67,15 @@ class StockService:
         start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
         
         try:
-            # 获取美股数据
-            df = self.pro.us_daily(
-                ts_code=symbol,
-                start_date=start_date,
-                end_date=end_date
-            )
+            # 获取美股数据（优先本地存储）
+            df = self.bar_store.get_daily_bars(symbol, start_date, end_date)
             
             if df.empty:
                 raise Exception(f"未找到股票代码 {symbol} 的数据")
             
+            # 一次列式计算全部指标
+            metrics = compute_indicators(df)
+            
             # 转换为字典格式
             stock_data = {
                 'symbol': symbol,
@@ -44,9 +85,10 @@ class StockService:
                 'price_change': float(df.iloc[0]['change']) if 'change' in df.columns else 0,
                 'pct_change': float(df.iloc[0]['pct_change']),
                 'volume': int(df.iloc[0]['vol']),
-                'historical_data': self._format_historical_data(df),
-                'price_trend': self._analyze_price_trend(df),
-                'volatility': self._calculate_volatility(df)
+                'historical_data': to_historical_records(df),
+                'price_trend': metrics['price_trend'],
+                'volatility': metrics['volatility'],
+                'indicators': metrics['indicators']
             }
             
             return stock_data
@@ -58,55 +100,6 @@ class StockService:
             else:
                 raise Exception(f"获取股票数据失败: {error_msg}")
     
-    def _format_historical_data(self, df):
-        """格式化历史数据"""
-        data = []
-        for _, row in df.iterrows():
-            data.append({
-                'date': row['trade_date'],
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': int(row['vol']),
-                'pct_change': float(row['pct_change'])
-            })
-        return data
-    
-    def _analyze_price_trend(self, df):
-        """分析价格趋势"""
-        if len(df) < 2:
-            return "数据不足"
-        
-        latest_price = df.iloc[0]['close']
-        week_ago_price = df.iloc[min(7, len(df)-1)]['close']
-        
-        change_pct = ((latest_price - week_ago_price) / week_ago_price) * 100
-        
-        if change_pct > 5:
-            return "强势上涨"
-        elif change_pct > 2:
-            return "温和上涨"
-        elif change_pct > -2:
-            return "横盘整理"
-        elif change_pct > -5:
-            return "温和下跌"
-        else:
-            return "大幅下跌"
-    
-    def _calculate_volatility(self, df):
-        """计算波动率"""
-        if len(df) < 2:
-            return 0
-        
-        pct_changes = df['pct_change'].tolist()
-        # 计算标准差作为波动率指标
-        mean_change = sum(pct_changes) / len(pct_changes)
-        variance = sum((x - mean_change) ** 2 for x in pct_changes) / len(pct_changes)
-        volatility = variance ** 0.5
-        
-        return round(volatility, 2)
-    
     def get_stock_data_by_date_range(self, symbol, start_date, end_date):
         """
         按日期范围获取美股历史数据
@@ -121,12 +114,8 @@ class StockService:
             start_date_formatted = datetime.strptime(start_date, '%Y-%m-%d').strftime('%Y%m%d')
             end_date_formatted = datetime.strptime(end_date, '%Y-%m-%d').strftime('%Y%m%d')
             
-            # 获取美股数据
-            df = self.pro.us_daily(
-                ts_code=symbol,
-                start_date=start_date_formatted,
-                end_date=end_date_formatted
-            )
+            # 获取美股数据（优先本地存储）
+            df = self.bar_store.get_daily_bars(symbol, start_date_formatted, end_date_formatted)
             
             if df.empty:
                 raise Exception(f"未找到股票代码 {symbol} 在 {start_date} 到 {end_date} 期间的数据")
@@ -136,6 +125,9 @@ class StockService:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
             days = (end_dt - start_dt).days
             
+            # 一次列式计算全部指标
+            metrics = compute_indicators(df)
+            
             # 转换为字典格式
             stock_data = {
                 'symbol': symbol,
@@ -146,9 +138,10 @@ class StockService:
                 'price_change': float(df.iloc[0]['change']) if 'change' in df.columns else 0,
                 'pct_change': float(df.iloc[0]['pct_change']),
                 'volume': int(df.iloc[0]['vol']),
-                'historical_data': self._format_historical_data(df),
-                'price_trend': self._analyze_price_trend(df),
-                'volatility': self._calculate_volatility(df),
+                'historical_data': to_historical_records(df),
+                'price_trend': metrics['price_trend'],
+                'volatility': metrics['volatility'],
+                'indicators': metrics['indicators'],
                 'start_date': start_date,
                 'end_date': end_date
             }
@@ -162,12 +155,42 @@ class StockService:
             else:
                 raise Exception(f"获取股票数据失败: {error_msg}")
 
+    def iter_stock_data(self, symbols, fetch, *args, max_workers=None):
+        """
+        并发获取多只股票数据，按完成顺序产出结果
+        
+        Args:
+            symbols: 股票代码列表
+            fetch: 单只股票的获取方法，如 self.get_stock_data_by_date_range
+            *args: 传给 fetch 的其他参数
+            max_workers: 并发数，默认 Config.STOCK_FETCH_WORKERS
+            
+        Yields:
+            tuple: (在 symbols 中的序号, 股票代码, 股票数据或None, 错误信息或None)
+        """
+        if not symbols:
+            return
+        workers = min(max_workers or Config.STOCK_FETCH_WORKERS, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stock-fetch') as executor:
+            futures = {
+                executor.submit(fetch, symbol, *args): (index, symbol)
+                for index, symbol in enumerate(symbols)
+            }
+            for future in as_completed(futures):
+                index, symbol = futures[future]
+                try:
+                    yield index, symbol, future.result(), None
+                except Exception as e:
+                    yield index, symbol, None, str(e)
+    
     def get_multiple_stocks(self, symbols, days=30):
-        """获取多只股票数据"""
+        """获取多只股票数据（并发）"""
+        self.prefetch_by_date_range(
+            symbols,
+            (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
+            datetime.now().strftime('%Y-%m-%d'),
+        )
         results = {}
-        for symbol in symbols:
-            try:
-                results[symbol] = self.get_stock_data(symbol, days)
-            except Exception as e:
-                results[symbol] = {'error': str(e)}
-        return results
\ No newline at end of file
+        for _, symbol, stock_data, error in self.iter_stock_data(symbols, self.get_stock_data, days):
+            results[symbol] = stock_data if error is None else {'error': error}
+        return {symbol: results[symbol] for symbol in symbols}
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""股票日线本地存储：按 (ts_code, trade_date) 持久化到SQLite，只向Tushare拉取缺失的日期区间
+
+- 已拉取过的日期区间记录在 stock_bar_coverage 中（包括周末、节假日等没有K线的区间），
+  重叠的请求直接从本地读取，不再重复调用 Tushare
+- 早于 Config.STOCK_BAR_SETTLE_DAYS 天的区间视为已稳定，永久有效；
+  更近的区间以及没有返回任何K线的区间仅在 Config.STOCK_BAR_RECENT_TTL 秒内有效，之后重新拉取
+- 拉取失败（如达到每日访问上限）时，若本地已有该区间的部分数据则降级返回，保证分析仍可进行
+- 写入通过 db.execute_write 串行执行并在数据库被锁定时重试；仍然失败时本次直接返回拉取到的数据，
+  该区间不记录为已拉取，下次请求重新拉取
+- prefetch_daily_bars：缺失区间相同的多只股票合并为一次批量请求（ts_code 逗号拼接），
+  按 ts_code 拆分后分别入库；批量结果中没有数据的股票留给单只拉取兜底
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config.settings import Config
+from utils import db as db_util
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'pre_close', 'change', 'pct_change', 'vol', 'amount', 'vwap')
+
+DateRange = Tuple[date, date]
+
+
+def _to_date(value: str) -> date:
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def _to_str(value: date) -> str:
+    return value.strftime('%Y%m%d')
+
+
+def missing_ranges(covered: List[DateRange], start: date, end: date) -> List[DateRange]:
+    """返回 [start, end] 中未被 covered 覆盖的日期区间（闭区间）。"""
+    gaps = []
+    cursor = start
+    for range_start, range_end in sorted(covered):
+        if range_end < cursor:
+            continue
+        if range_start > end:
+            break
+        if range_start > cursor:
+            gaps.append((cursor, min(end, range_start - timedelta(days=1))))
+        cursor = max(cursor, range_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """合并重叠或相邻的日期区间。"""
+    merged: List[DateRange] = []
+    for range_start, range_end in sorted(ranges):
+        if merged and range_start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+
+def _combine_bars(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """合并本地数据与未能入库的拉取结果，列与排序和 _load_bars 一致。"""
+    df = pd.concat([frame for frame in frames if not frame.empty], ignore_index=True)
+    if df.empty:
+        return df
+    df['trade_date'] = df['trade_date'].astype(str)
+    columns = [column for column in ('ts_code', 'trade_date') + BAR_COLUMNS if column in df.columns]
+    df = df[columns].drop_duplicates('trade_date', keep='last')
+    return df.sort_values('trade_date', ascending=False, ignore_index=True).dropna(axis=1, how='all')
+
+
+class StockBarStore:
+    """美股日线本地存储"""
+
+    def __init__(
+        self,
+        fetcher: Callable[[str, str, str], pd.DataFrame],
+        settle_days: Optional[int] = None,
+        recent_ttl: Optional[int] = None,
+        bulk_fetcher: Optional[Callable[[Sequence[str], str, str], pd.DataFrame]] = None,
+        max_rows: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            fetcher: 远程拉取函数 fetcher(ts_code, start_date, end_date)，日期为 YYYYMMDD，
+                返回与 Tushare us_daily 相同列的 DataFrame
+            settle_days: 多少天前的数据视为已稳定
+            recent_ttl: 近期数据的复用时间（秒）
+            bulk_fetcher: 批量拉取函数 bulk_fetcher(ts_codes, start_date, end_date)，结果需含 ts_code 列
+            max_rows: 远程接口单次返回的最大行数，批量请求据此分批
+        """
+        db_util.init_stock_tables()
+        self.fetcher = fetcher
+        self.bulk_fetcher = bulk_fetcher
+        self.max_rows = Config.TUSHARE_MAX_ROWS if max_rows is None else max_rows
+        self.settle_days = Config.STOCK_BAR_SETTLE_DAYS if settle_days is None else settle_days
+        self.recent_ttl = Config.STOCK_BAR_RECENT_TTL if recent_ttl is None else recent_ttl
+        # 同一股票的缺口拉取串行执行，避免并发请求重复消耗配额
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        self._symbol_locks_guard = threading.Lock()
+
+    def get_daily_bars(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """获取 [start_date, end_date]（YYYYMMDD）的日线，按交易日倒序（与 us_daily 一致）。
+
+        Raises:
+            Exception: 拉取缺失区间失败且本地没有任何该区间的数据
+        """
+        start, end = _to_date(start_date), _to_date(end_date)
+        unsaved: List[pd.DataFrame] = []
+        with self._get_symbol_lock(ts_code):
+            gaps = missing_ranges(self._load_coverage(ts_code), start, end)
+            for gap_start, gap_end in gaps:
+                try:
+                    df = self.fetcher(ts_code, _to_str(gap_start), _to_str(gap_end))
+                except Exception as e:
+                    df_local = self._load_bars(ts_code, start_date, end_date)
+                    if df_local.empty:
+                        raise
+                    print(f"拉取 {ts_code} {_to_str(gap_start)}-{_to_str(gap_end)} 失败，使用本地数据: {e}")
+                    return df_local
+                try:
+                    self._save_bars(ts_code, df, gap_start, gap_end)
+                except sqlite3.OperationalError as e:
+                    print(f"保存 {ts_code} {_to_str(gap_start)}-{_to_str(gap_end)} 日线失败，本次直接使用拉取结果: {e}")
+                    if df is not None and not df.empty:
+                        unsaved.append(df)
+            if gaps:
+                print(f"{ts_code}: 从Tushare补齐 {len(gaps)} 个缺失区间")
+        df_local = self._load_bars(ts_code, start_date, end_date)
+        if not unsaved:
+            return df_local
+        return _combine_bars([df_local] + unsaved)
+
+    def prefetch_daily_bars(self, ts_codes: Sequence[str], start_date: str, end_date: str) -> int:
+        """批量补齐多只股票在 [start_date, end_date] 的缺失区间，返回批量请求次数。
+
+        缺失区间相同的股票合并请求；请求失败或某只股票没有返回数据时不记录其覆盖区间，
+        之后的 get_daily_bars 会对这些股票单独拉取。
+        """
+        codes = sorted(set(ts_codes))
+        if self.bulk_fetcher is None or len(codes) < 2:
+            return 0
+        start, end = _to_date(start_date), _to_date(end_date)
+        requests_made = 0
+        with ExitStack() as stack:
+            # 按固定顺序获取各股票的锁，避免与其他批量请求互相等待
+            for code in codes:
+                stack.enter_context(self._get_symbol_lock(code))
+
+            groups: Dict[DateRange, List[str]] = {}
+            for code in codes:
+                for gap in missing_ranges(self._load_coverage(code), start, end):
+                    groups.setdefault(gap, []).append(code)
+
+            for (gap_start, gap_end), group in groups.items():
+                if len(group) < 2:
+                    continue
+                for batch in self._split_batches(group, gap_start, gap_end):
+                    if len(batch) < 2:
+                        continue
+                    requests_made += 1
+                    try:
+                        df = self.bulk_fetcher(batch, _to_str(gap_start), _to_str(gap_end))
+                    except Exception as e:
+                        print(f"批量拉取 {','.join(batch)} 失败，改为单只拉取: {e}")
+                        continue
+                    if df is None or df.empty or 'ts_code' not in df.columns:
+                        continue
+                    if len(df) >= self.max_rows:
+                        # 结果可能被截断，交给单只拉取
+                        print(f"批量拉取 {','.join(batch)} 结果达到行数上限，改为单只拉取")
+                        continue
+                    for code, code_df in df.groupby('ts_code'):
+                        if code in batch:
+                            self._save_bars(code, code_df, gap_start, gap_end)
+                    print(f"批量拉取 {len(batch)} 只股票 {_to_str(gap_start)}-{_to_str(gap_end)}")
+        return requests_made
+
+    def _split_batches(self, codes: List[str], gap_start: date, gap_end: date) -> List[List[str]]:
+        """按估算的返回行数把股票分批，保证单次请求不超过 max_rows。"""
+        calendar_days = (gap_end - gap_start).days + 1
+        estimated_rows = calendar_days * 5 // 7 + 2
+        batch_size = max(1, self.max_rows // estimated_rows)
+        return [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+
+    def _get_symbol_lock(self, ts_code: str) -> threading.Lock:
+        with self._symbol_locks_guard:
+            return self._symbol_locks.setdefault(ts_code, threading.Lock())
+
+    def _load_coverage(self, ts_code: str) -> List[DateRange]:
+        """读取仍然有效的已拉取区间。"""
+        min_fetched_at = int(time.time()) - self.recent_ttl
+        conn = db_util.get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT start_date, end_date FROM stock_bar_coverage "
+                "WHERE ts_code = ? AND (fetched_at = 0 OR fetched_at >= ?)",
+                (ts_code, min_fetched_at),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(_to_date(row['start_date']), _to_date(row['end_date'])) for row in rows]
+
+    def _load_bars(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        conn = db_util.get_connection()
+        try:
+            df = pd.read_sql_query(
+                f"SELECT ts_code, trade_date, {', '.join(BAR_COLUMNS)} FROM stock_daily_bars "
+                "WHERE ts_code = ? AND trade_date BETWEEN ? AND ? ORDER BY trade_date DESC",
+                conn,
+                params=(ts_code, start_date, end_date),
+            )
+        finally:
+            conn.close()
+        # Tushare 未返回的列（全为空）直接去掉，保持与接口原始结果一致
+        return df.dropna(axis=1, how='all')
+
+    def _save_bars(self, ts_code: str, df: pd.DataFrame, gap_start: date, gap_end: date) -> None:
+        """写入K线并记录已拉取区间（稳定部分与近期部分分开记录）。
+
+        Raises:
+            sqlite3.OperationalError: 重试后数据库仍被锁定
+        """
+        rows = []
+        if df is not None and not df.empty:
+            columns = [column for column in BAR_COLUMNS if column in df.columns]
+            for record in df[['trade_date'] + columns].itertuples(index=False):
+                values = dict(zip(['trade_date'] + columns, record))
+                rows.append(
+                    (ts_code, str(values['trade_date']))
+                    + tuple(None if pd.isna(values[column]) else float(values[column]) for column in columns)
+                )
+            insert_columns = ['ts_code', 'trade_date'] + columns
+        else:
+            insert_columns = []
+
+        settled_end = date.today() - timedelta(days=self.settle_days)
+        if not rows:
+            # 空结果可能是接口的临时异常，整个区间按近期数据处理，过期后重新拉取
+            settled_end = gap_start - timedelta(days=1)
+        now = int(time.time())
+
+        def write(conn):
+            if rows:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO stock_daily_bars ({', '.join(insert_columns)}) "
+                    f"VALUES ({', '.join('?' * len(insert_columns))})",
+                    rows,
+                )
+
+            if gap_start <= settled_end:
+                # 稳定区间与已有的稳定区间合并，保持每只股票只有少量行
+                settled = [
+                    (_to_date(row['start_date']), _to_date(row['end_date']))
+                    for row in conn.execute(
+                        "SELECT start_date, end_date FROM stock_bar_coverage WHERE ts_code = ? AND fetched_at = 0",
+                        (ts_code,),
+                    )
+                ]
+                settled.append((gap_start, min(gap_end, settled_end)))
+                conn.execute("DELETE FROM stock_bar_coverage WHERE ts_code = ? AND fetched_at = 0", (ts_code,))
+                conn.executemany(
+                    "INSERT INTO stock_bar_coverage (ts_code, start_date, end_date, fetched_at) VALUES (?, ?, ?, 0)",
+                    [(ts_code, _to_str(s), _to_str(e)) for s, e in merge_ranges(settled)],
+                )
+
+            if gap_end > settled_end:
+                conn.execute(
+                    "DELETE FROM stock_bar_coverage WHERE ts_code = ? AND fetched_at > 0 AND fetched_at < ?",
+                    (ts_code, now - self.recent_ttl),
+                )
+                conn.execute(
+                    "INSERT INTO stock_bar_coverage (ts_code, start_date, end_date, fetched_at) VALUES (?, ?, ?, ?)",
+                    (ts_code, _to_str(max(gap_start, settled_end + timedelta(days=1))), _to_str(gap_end), now),
+                )
+
+        db_util.execute_write(write)
@@ -0,0 +1,53 @@
+"""渲染工作进程的启动方式：图表与PDF进程池共用的 forkserver 上下文
+
+- Web 进程运行后有请求线程、后台任务线程、缓存清理线程以及进程池自身的管理线程，
+  从这样的多线程进程 fork 出的子进程可能继承被其他线程持有的锁而死锁；
+  工作进程改由 forkserver 派生：forkserver 是首次启动工作进程时单独执行的干净解释器，
+  之后进程池扩容或在工作进程退出后重建，都不会再 fork Web 进程
+- forkserver 预加载两个渲染模块，这些模块只依赖标准库与配置，不导入 Flask 与各项服务
+- 工作进程会按 multiprocessing 的常规方式重新导入父进程的 __main__（如 python main.py 启动时的 main.py）；
+  进程池只在首次提交任务时创建，重新导入不会再启动进程池，
+  其余只应在 Web 进程中运行的后台任务用 is_worker_process() 判断
+- 不支持 forkserver 的平台（Windows）使用 spawn
+"""
+
+import multiprocessing
+import os
+import threading
+
+FORKSERVER_PRELOAD = ['services.chart_renderer', 'services.pdf_renderer']
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def _export_project_path() -> None:
+    """让 forkserver 能导入 services 包（Python 3.11 的 forkserver 不继承父进程的 sys.path）。"""
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = [path for path in os.environ.get('PYTHONPATH', '').split(os.pathsep) if path]
+    if project_dir not in paths:
+        os.environ['PYTHONPATH'] = os.pathsep.join([project_dir] + paths)
+
+
+def is_worker_process() -> bool:
+    """当前进程是否为 multiprocessing 启动的子进程（如渲染工作进程）。
+
+    子进程在重新导入 __main__ 之前已设置好进程名，parent_process() 此时尚未设置，因此按进程名判断。
+    """
+    return multiprocessing.current_process().name != 'MainProcess'
+
+
+def get_worker_context():
+    """返回启动渲染工作进程使用的 multiprocessing 上下文。"""
+    global _context
+    with _context_lock:
+        if _context is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                _export_project_path()
+                context = multiprocessing.get_context('forkserver')
+                # 只在 forkserver 尚未启动时生效，因此在第一个进程池启动前设置
+                context.set_forkserver_preload(FORKSERVER_PRELOAD)
+            else:
+                context = multiprocessing.get_context('spawn')
+            _context = context
+        return _context
@@ -1,13 +1,16 @@
 import requests
 from config.settings import Config
+from utils.http_client import get_session, get_timeout
 
 
 class YouTubeService:
     """YouTube数据服务"""
 
-    def __init__(self):
+    def __init__(self, session=None):
         self.api_key = Config.TIKHUB_API_KEY
         self.base_url = Config.TIKHUB_BASE_URL
+        # 共享连接池，避免每次请求重新握手
+        self.session = session or get_session()
 
     def get_channel_videos(self, channel_id, count=20, next_token='', sort_by='newest'):
         """
@@ -34,7 +37,8 @@ class YouTubeService:
         }
 
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = self.session.get(url, params=params, headers=headers,
+                                        timeout=get_timeout(Config.TIKHUB_TIMEOUT))
             response.raise_for_status()
 
             data = response.json()
@@ -97,13 +101,15 @@ class YouTubeService:
         :param video_id:
         :return:
         """
-        url = 'https://api.tikhub.io/api/v1/youtube/web/get_video_info_v2?video_id=' + video_id
+        url = f"{self.base_url}/youtube/web/get_video_info_v2"
+        params = {'video_id': video_id}
         headers = {
             'Authorization': f'Bearer {self.api_key}'
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(url, params=params, headers=headers,
+                                        timeout=get_timeout(Config.TIKHUB_TIMEOUT))
             response.raise_for_status()
 
             data = response.json()
@@ -0,0 +1,85 @@
+"""cache_codec 编解码与报告正文去重的单元测试"""
+
+import copy
+import gzip
+import json
+import unittest
+from unittest import mock
+
+from config.settings import Config
+from utils import cache_codec
+
+REPORT_TEXT = '# 报告\n\nAAPL 看好'
+
+
+def make_cache_data():
+    return {
+        'cache_key': 'abc',
+        'video_urls': ['https://www.youtube.com/watch?v=1'],
+        'timestamp': 1700000000,
+        'analysis_result': {
+            'analysis_type': 'content_only',
+            'report': {'raw_markdown_content': REPORT_TEXT, 'title': 't'},
+            'video_analysis': {'raw_content': REPORT_TEXT, 'summary': REPORT_TEXT},
+        },
+    }
+
+
+class CacheCodecTest(unittest.TestCase):
+
+    def test_round_trip_for_each_compression(self):
+        methods = ['none', 'gzip'] + (['zstd'] if cache_codec.zstandard is not None else [])
+        for method in methods:
+            with self.subTest(method=method), mock.patch.object(Config, 'CACHE_COMPRESSION', method):
+                cache_data = make_cache_data()
+                decoded, size = cache_codec.decode_cache_data(cache_codec.encode_cache_data(cache_data))
+                self.assertEqual(decoded['analysis_result'], cache_data['analysis_result'])
+                self.assertEqual(decoded['format_version'], cache_codec.CACHE_FORMAT_VERSION)
+                self.assertGreater(size, 0)
+
+    def test_duplicate_report_text_is_stored_once(self):
+        with mock.patch.object(Config, 'CACHE_COMPRESSION', 'none'):
+            raw = cache_codec.encode_cache_data(make_cache_data())
+        stored = json.loads(raw.decode('utf-8'))['analysis_result']
+        self.assertEqual(stored['report']['raw_markdown_content'], REPORT_TEXT)
+        self.assertEqual(stored['video_analysis']['raw_content'], {'$same_as': 'report.raw_markdown_content'})
+        self.assertEqual(stored['video_analysis']['summary'], {'$same_as': 'report.raw_markdown_content'})
+
+    def test_different_text_is_not_deduplicated(self):
+        result = make_cache_data()['analysis_result']
+        result['video_analysis']['summary'] = '不同的摘要'
+        deduped = cache_codec.dedupe_analysis_result(result)
+        self.assertEqual(deduped['video_analysis']['summary'], '不同的摘要')
+        self.assertEqual(deduped['video_analysis']['raw_content'], {'$same_as': 'report.raw_markdown_content'})
+
+    def test_dedupe_does_not_modify_input(self):
+        result = make_cache_data()['analysis_result']
+        original = copy.deepcopy(result)
+        cache_codec.dedupe_analysis_result(result)
+        self.assertEqual(result, original)
+
+    def test_decodes_legacy_indented_json(self):
+        legacy = make_cache_data()
+        raw = json.dumps(legacy, ensure_ascii=False, indent=2).encode('utf-8')
+        decoded, _ = cache_codec.decode_cache_data(raw)
+        self.assertEqual(decoded, legacy)
+
+    def test_legacy_data_keeps_same_as_like_values(self):
+        # 旧版本（format_version 1）没有引用标记，不做还原
+        legacy = make_cache_data()
+        legacy['analysis_result']['video_analysis']['summary'] = {'$same_as': 'report.raw_markdown_content'}
+        decoded, _ = cache_codec.decode_cache_data(json.dumps(legacy).encode('utf-8'))
+        self.assertEqual(decoded['analysis_result']['video_analysis']['summary'],
+                         {'$same_as': 'report.raw_markdown_content'})
+
+    def test_corrupt_data_raises_decode_error(self):
+        with mock.patch.object(Config, 'CACHE_COMPRESSION', 'gzip'):
+            raw = cache_codec.encode_cache_data(make_cache_data())
+        for corrupt in (raw[:len(raw) // 2], b'{"cache_key": ', gzip.compress(b'not json')):
+            with self.subTest(corrupt=corrupt[:8]):
+                with self.assertRaises(cache_codec.CacheDecodeError):
+                    cache_codec.decode_cache_data(corrupt)
+
+
+if __name__ == '__main__':
+    unittest.main()
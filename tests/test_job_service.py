@@ -0,0 +1,99 @@
+"""JobService 单飞去重、队列上限与失败处理的单元测试"""
+
+import json
+import threading
+import unittest
+
+from services.job_service import JobQueueFullError, JobService
+
+TIMEOUT = 5
+
+
+def wait_finished(job):
+    with job.condition:
+        job.condition.wait_for(lambda: job.finished, TIMEOUT)
+    return job.finished
+
+
+class JobServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = JobService(max_workers=1, max_pending=1, buffer_size=10, result_ttl=60)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocking_job(self, value='result'):
+        """等待 release 后产出一条事件和结果"""
+        yield 'data: {"type": "log"}\n\n'
+        self.release.wait(TIMEOUT)
+        yield {'value': value}
+
+    def test_same_key_joins_running_job(self):
+        first = self.service.submit('single_video', self.blocking_job, key='k|content_only|en||')
+        second = self.service.submit('single_video', self.blocking_job, key='k|content_only|en||')
+        self.assertIs(second, first)
+        self.assertEqual(first.subscribers, 2)
+
+        self.release.set()
+        self.assertTrue(wait_finished(first))
+        self.assertEqual(first.status, 'done')
+        self.assertEqual(first.result, {'value': 'result'})
+
+    def test_different_keys_create_separate_jobs(self):
+        first = self.service.submit('single_video', self.blocking_job, key='k|content_only|en||')
+        second = self.service.submit('single_video', self.blocking_job, key='k|content_only|zh||')
+        self.assertIsNot(second, first)
+        self.assertEqual(second.subscribers, 1)
+
+    def test_finished_job_is_not_joined(self):
+        self.release.set()
+        first = self.service.submit('single_video', self.blocking_job, key='k')
+        self.assertTrue(wait_finished(first))
+        second = self.service.submit('single_video', self.blocking_job, key='k')
+        self.assertIsNot(second, first)
+
+    def test_queue_limit(self):
+        # max_workers=1、max_pending=1：最多两个未结束的任务
+        self.service.submit('a', self.blocking_job)
+        self.service.submit('b', self.blocking_job)
+        with self.assertRaises(JobQueueFullError):
+            self.service.submit('c', self.blocking_job)
+
+    def test_joining_existing_job_ignores_queue_limit(self):
+        running = self.service.submit('a', self.blocking_job, key='k')
+        self.service.submit('b', self.blocking_job)
+        self.assertIs(self.service.submit('a', self.blocking_job, key='k'), running)
+
+    def test_slot_is_freed_after_job_finishes(self):
+        first = self.service.submit('a', self.blocking_job)
+        self.service.submit('b', self.blocking_job)
+        self.release.set()
+        self.assertTrue(wait_finished(first))
+        self.service.submit('c', self.blocking_job)
+
+    def test_failed_job_emits_error_event(self):
+        def failing_job():
+            yield 'data: {"type": "log"}\n\n'
+            raise RuntimeError('分析失败')
+
+        job = self.service.submit('single_video', failing_job, key='k')
+        self.assertTrue(wait_finished(job))
+        self.assertEqual((job.status, job.error), ('failed', '分析失败'))
+
+        events = list(self.service.stream(job))
+        self.assertEqual(len(events), 2)
+        error = json.loads(events[-1].split('data: ', 1)[1])
+        self.assertEqual((error['type'], error['message']), ('error', '分析失败'))
+        # 失败的任务不再占用去重键
+        self.assertIsNot(self.service.submit('single_video', failing_job, key='k'), job)
+
+    def test_stream_resumes_after_last_event_id(self):
+        self.release.set()
+        job = self.service.submit('single_video', self.blocking_job)
+        self.assertTrue(wait_finished(job))
+        self.assertEqual(len(list(self.service.stream(job))), 1)
+        self.assertEqual(list(self.service.stream(job, after=job.last_seq)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""json_schema 解析与结构校验的单元测试"""
+
+import unittest
+
+from utils.json_schema import extract_json, validate
+
+STOCK_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'stocks': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'symbol': {'type': 'STRING'},
+                    'confidence': {'type': 'STRING', 'enum': ['high', 'medium', 'low']},
+                    'price': {'type': 'NUMBER', 'nullable': True},
+                },
+                'required': ['symbol', 'confidence'],
+            },
+        },
+        'count': {'type': 'INTEGER'},
+    },
+    'required': ['stocks'],
+}
+
+
+class ExtractJsonTest(unittest.TestCase):
+
+    def test_plain_json(self):
+        self.assertEqual(extract_json('{"a": 1}'), {'a': 1})
+        self.assertEqual(extract_json('  [1, 2]\n'), [1, 2])
+
+    def test_fenced_code_block(self):
+        self.assertEqual(extract_json('```json\n{"a": [1, 2]}\n```'), {'a': [1, 2]})
+        self.assertEqual(extract_json('```\n{"a": 1}\n```'), {'a': 1})
+
+    def test_surrounding_prose_is_ignored(self):
+        text = '以下是结果：\n{"a": {"b": "}"}}\n以上为全部内容，如有 {疑问} 请告知'
+        self.assertEqual(extract_json(text), {'a': {'b': '}'}})
+
+    def test_empty_reply(self):
+        for text in ('', '   \n', None):
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, '为空'):
+                    extract_json(text)
+
+    def test_no_json_object(self):
+        with self.assertRaisesRegex(ValueError, '未找到JSON对象'):
+            extract_json('模型没有返回结构化内容')
+
+    def test_truncated_json(self):
+        with self.assertRaisesRegex(ValueError, 'JSON解析失败'):
+            extract_json('结果：{"a": [1, 2')
+
+
+class ValidateTest(unittest.TestCase):
+
+    def test_valid_data(self):
+        validate({'stocks': [{'symbol': 'AAPL', 'confidence': 'high', 'price': None}], 'count': 1}, STOCK_SCHEMA)
+
+    def test_missing_required_field_reports_path(self):
+        with self.assertRaisesRegex(ValueError, r'^\$\.stocks\[0\]: 缺少字段 confidence$'):
+            validate({'stocks': [{'symbol': 'AAPL'}]}, STOCK_SCHEMA)
+
+    def test_enum(self):
+        with self.assertRaisesRegex(ValueError, r'\$\.stocks\[0\]\.confidence'):
+            validate({'stocks': [{'symbol': 'AAPL', 'confidence': 'very high'}]}, STOCK_SCHEMA)
+
+    def test_type_mismatch(self):
+        with self.assertRaisesRegex(ValueError, r'\$\.stocks: 应为 ARRAY'):
+            validate({'stocks': 'AAPL'}, STOCK_SCHEMA)
+
+    def test_bool_is_not_a_number(self):
+        with self.assertRaisesRegex(ValueError, r'\$\.count: 应为 INTEGER'):
+            validate({'stocks': [], 'count': True}, STOCK_SCHEMA)
+
+    def test_null_only_allowed_when_nullable(self):
+        with self.assertRaisesRegex(ValueError, r'\$\.stocks\[0\]\.symbol: 不能为空'):
+            validate({'stocks': [{'symbol': None, 'confidence': 'low'}]}, STOCK_SCHEMA)
+
+    def test_without_schema_requires_object(self):
+        validate({'anything': 1}, None)
+        with self.assertRaisesRegex(ValueError, '应为JSON对象'):
+            validate([1, 2], None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""MemoryLRUCache 按字节淘汰与版本校验的单元测试"""
+
+import unittest
+
+from utils.memory_cache import MemoryLRUCache
+
+
+class MemoryLRUCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used_when_over_budget(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        self.assertEqual(cache.get('a'), 'A')  # a 变为最近使用
+        cache.put('c', 'C', 40)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.get('c'), 'C')
+        self.assertEqual(cache.current_bytes, 80)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_several_entries_for_a_large_one(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        for key in 'abcd':
+            cache.put(key, key, 25)
+        cache.put('big', 'big', 70)
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertEqual(cache.get('d'), 'd')
+        self.assertEqual(cache.get('big'), 'big')
+        self.assertEqual(cache.current_bytes, 95)
+
+    def test_entry_larger_than_budget_is_not_cached(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        cache.put('a', 'A', 50)
+        cache.put('huge', 'H', 101)
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.current_bytes, 50)
+
+    def test_replacing_entry_updates_size(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        cache.put('a', 'A1', 60)
+        cache.put('a', 'A2', 30)
+        self.assertEqual(cache.get('a'), 'A2')
+        self.assertEqual(cache.current_bytes, 30)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_version_mismatch_is_a_miss_and_drops_entry(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        cache.put('a', 'A', 10, version=1)
+        self.assertEqual(cache.get('a', version=1), 'A')
+        self.assertIsNone(cache.get('a', version=2))
+        self.assertEqual(cache.current_bytes, 0)
+        self.assertIsNone(cache.get('a', version=1))
+
+    def test_invalidate_clear_and_stats(self):
+        cache = MemoryLRUCache(max_bytes=100)
+        cache.put('a', 'A', 10)
+        cache.put('b', 'B', 20)
+        cache.invalidate('a')
+        self.assertEqual(cache.current_bytes, 20)
+        cache.get('b')
+        cache.get('a')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+        cache.clear()
+        self.assertEqual((cache.stats()['entries'], cache.current_bytes), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
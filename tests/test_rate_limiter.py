@@ -0,0 +1,88 @@
+"""RateLimiter 滑动窗口限流的单元测试（用模拟时钟，不实际等待）"""
+
+import threading
+import unittest
+from unittest import mock
+
+from utils import rate_limiter
+from utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """替换 rate_limiter 中的 time 模块：sleep 只推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limiter, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_calls_within_limit_do_not_wait(self):
+        limiter = RateLimiter(3, period=60)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_until_oldest_call_leaves_window(self):
+        limiter = RateLimiter(2, period=60)
+        limiter.acquire()
+        self.clock.now += 10
+        limiter.acquire()
+        limiter.acquire()
+        # 第一次调用在 60 秒后移出窗口，此时距第一次调用仅过去 10 秒
+        self.assertEqual(self.clock.sleeps, [50])
+        self.assertEqual(self.clock.now, 1060)
+
+    def test_window_slides(self):
+        limiter = RateLimiter(2, period=60)
+        limiter.acquire()
+        limiter.acquire()
+        self.clock.now += 61
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_zero_means_unlimited(self):
+        limiter = RateLimiter(0, period=60)
+        for _ in range(100):
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class RateLimiterConcurrencyTest(unittest.TestCase):
+
+    def test_concurrent_callers_share_the_limit(self):
+        limiter = RateLimiter(5, period=60)
+        granted = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter.acquire()
+            with lock:
+                granted.append(1)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(0.5)
+        # 窗口 60 秒内只放行 5 次，其余线程仍在等待
+        self.assertEqual(len(granted), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
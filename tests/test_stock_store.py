@@ -0,0 +1,63 @@
+"""stock_store 日期区间计算的单元测试"""
+
+import unittest
+from datetime import date
+
+from services.stock_store import merge_ranges, missing_ranges
+
+
+def d(day: int) -> date:
+    return date(2024, 1, day)
+
+
+class MissingRangesTest(unittest.TestCase):
+
+    def test_no_coverage_returns_whole_range(self):
+        self.assertEqual(missing_ranges([], d(1), d(10)), [(d(1), d(10))])
+
+    def test_fully_covered(self):
+        self.assertEqual(missing_ranges([(d(1), d(31))], d(5), d(10)), [])
+
+    def test_gaps_before_between_and_after(self):
+        covered = [(d(3), d(4)), (d(7), d(8))]
+        self.assertEqual(
+            missing_ranges(covered, d(1), d(10)),
+            [(d(1), d(2)), (d(5), d(6)), (d(9), d(10))],
+        )
+
+    def test_unsorted_and_overlapping_coverage(self):
+        covered = [(d(6), d(9)), (d(2), d(7))]
+        self.assertEqual(missing_ranges(covered, d(1), d(10)), [(d(1), d(1)), (d(10), d(10))])
+
+    def test_coverage_outside_range_is_ignored(self):
+        covered = [(date(2023, 12, 1), date(2023, 12, 31)), (d(20), d(25))]
+        self.assertEqual(missing_ranges(covered, d(1), d(10)), [(d(1), d(10))])
+
+    def test_single_day(self):
+        self.assertEqual(missing_ranges([], d(5), d(5)), [(d(5), d(5))])
+        self.assertEqual(missing_ranges([(d(5), d(5))], d(5), d(5)), [])
+
+
+class MergeRangesTest(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(merge_ranges([]), [])
+
+    def test_overlapping_and_adjacent_are_merged(self):
+        ranges = [(d(8), d(10)), (d(1), d(3)), (d(4), d(5)), (d(2), d(4))]
+        self.assertEqual(merge_ranges(ranges), [(d(1), d(5)), (d(8), d(10))])
+
+    def test_contained_range(self):
+        self.assertEqual(merge_ranges([(d(1), d(10)), (d(3), d(4))]), [(d(1), d(10))])
+
+    def test_separated_ranges_are_kept(self):
+        ranges = [(d(1), d(2)), (d(4), d(5))]
+        self.assertEqual(merge_ranges(ranges), ranges)
+
+    def test_merged_coverage_has_no_gaps(self):
+        merged = merge_ranges([(d(1), d(3)), (d(4), d(6)), (d(5), d(9))])
+        self.assertEqual(missing_ranges(merged, d(1), d(9)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""缓存编码工具：紧凑序列化、报告正文去重与透明压缩
+
+缓存格式版本 2：
+- JSON 不缩进、使用紧凑分隔符
+- 报告正文在 report.raw_markdown_content、video_analysis.raw_content、
+  video_analysis.summary 中常常完全相同，仅保留第一份，其余替换为引用标记
+- 压缩优先使用 zstd（需安装 zstandard），否则回退到 gzip
+
+读取时按魔数自动识别 zstd / gzip / zlib / 纯文本，兼容旧的缩进JSON文件。
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import Config
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+CACHE_FORMAT_VERSION = 2
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# 可能重复的报告正文字段，按优先级排列：第一个存在的作为原文
+_DEDUP_PATHS = (
+    ('report', 'raw_markdown_content'),
+    ('video_analysis', 'raw_content'),
+    ('video_analysis', 'summary'),
+)
+_REF_KEY = '$same_as'
+
+
+class CacheDecodeError(ValueError):
+    """缓存内容无法解压或解析（文件损坏或写入不完整）"""
+
+
+def get_compression() -> str:
+    """返回实际使用的压缩算法：zstd / gzip / none。"""
+    method = Config.CACHE_COMPRESSION
+    if method == 'none':
+        return 'none'
+    if method in ('auto', 'zstd') and zstandard is not None:
+        return 'zstd'
+    return 'gzip'
+
+
+def get_file_suffix() -> str:
+    """返回当前压缩算法对应的文件后缀。"""
+    return {'zstd': '.zst', 'gzip': '.gz'}.get(get_compression(), '')
+
+
+def compress_bytes(data: bytes) -> bytes:
+    """按配置压缩字节串。"""
+    method = get_compression()
+    level = Config.CACHE_COMPRESS_LEVEL
+    if method == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if method == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return data
+
+
+def decompress_bytes(raw: bytes) -> bytes:
+    """按魔数识别压缩格式并解压，未压缩的数据原样返回。"""
+    if raw.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("缓存为zstd压缩格式，但未安装zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    if raw.startswith(_GZIP_MAGIC):
+        return gzip.decompress(raw)
+    if len(raw) >= 2 and raw[0] == 0x78 and (raw[0] * 256 + raw[1]) % 31 == 0:
+        try:
+            return zlib.decompress(raw)
+        except zlib.error:
+            pass
+    return raw
+
+
+def dedupe_analysis_result(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """将重复的报告正文替换为引用标记（不修改入参）。"""
+    if not isinstance(analysis_result, dict):
+        return analysis_result
+
+    result = dict(analysis_result)
+    original_path: Optional[Tuple[str, str]] = None
+    original_text = None
+    for section, field in _DEDUP_PATHS:
+        container = result.get(section)
+        if not isinstance(container, dict):
+            continue
+        value = container.get(field)
+        if not isinstance(value, str) or not value:
+            continue
+        if original_path is None:
+            original_path, original_text = (section, field), value
+        elif value == original_text:
+            if container is analysis_result.get(section):
+                container = result[section] = dict(container)
+            container[field] = {_REF_KEY: '.'.join(original_path)}
+    return result
+
+
+def restore_analysis_result(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """还原 dedupe_analysis_result 写入的引用标记（原地修改并返回）。"""
+    if not isinstance(analysis_result, dict):
+        return analysis_result
+
+    for section, field in _DEDUP_PATHS:
+        container = analysis_result.get(section)
+        if not isinstance(container, dict):
+            continue
+        value = container.get(field)
+        if isinstance(value, dict) and _REF_KEY in value:
+            ref_section, ref_field = value[_REF_KEY].split('.', 1)
+            container[field] = (analysis_result.get(ref_section) or {}).get(ref_field, '')
+    return analysis_result
+
+
+def encode_cache_data(cache_data: Dict[str, Any]) -> bytes:
+    """编码缓存条目：去重 + 紧凑JSON + 压缩。"""
+    data = dict(cache_data)
+    data['format_version'] = CACHE_FORMAT_VERSION
+    if 'analysis_result' in data:
+        data['analysis_result'] = dedupe_analysis_result(data['analysis_result'])
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return compress_bytes(text.encode('utf-8'))
+
+
+def decode_cache_data(raw: bytes) -> Tuple[Dict[str, Any], int]:
+    """解码缓存条目，兼容旧版缩进JSON。
+
+    Returns:
+        tuple: (缓存内容, 解压后的JSON字节数)
+
+    Raises:
+        CacheDecodeError: 内容损坏或不完整
+    """
+    try:
+        text = decompress_bytes(raw)
+        cache_data = json.loads(text.decode('utf-8'))
+    except (ValueError, EOFError, OSError, zlib.error) as e:
+        raise CacheDecodeError(f"缓存内容解析失败: {e}") from e
+    if cache_data.get('format_version', 1) >= 2 and 'analysis_result' in cache_data:
+        restore_analysis_result(cache_data['analysis_result'])
+    return cache_data, len(text)
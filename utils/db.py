@@ -1,19 +1,23 @@
 """SQLite 数据库工具
 
 职责：
-- 提供全局的SQLite连接获取方法
-- 初始化分析记录表（幂等）
+- 提供全局的SQLite连接获取方法；连接在数据库被其他连接锁定时最多等待 SQLITE_BUSY_TIMEOUT 秒
+- execute_write：在立即加写锁的事务中执行写操作，仍被锁定时重试
+- 初始化分析记录表、缓存存储表与股票日线表（幂等）
 
 依赖：使用内置 sqlite3，遵循 PEP 8
 """
 
 import os
 import sqlite3
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 from config.settings import Config
 
+T = TypeVar('T')
+
 
 def get_connection() -> sqlite3.Connection:
     """获取SQLite连接，自动创建数据库文件所在目录。
@@ -23,11 +27,46 @@ def get_connection() -> sqlite3.Connection:
     """
     db_path = Config.SQLITE_DB_PATH
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # timeout 即 SQLite 的 busy_timeout：写锁被占用时等待而不是立即报 database is locked
+    conn = sqlite3.connect(db_path, timeout=Config.SQLITE_BUSY_TIMEOUT, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def execute_write(operation: Callable[[sqlite3.Connection], T], retries: Optional[int] = None) -> T:
+    """在 BEGIN IMMEDIATE 事务中执行写操作并提交。
+
+    事务开始即获取写锁，多个进程/线程的写入按顺序执行，不会在事务中途因锁升级失败；
+    等待超过 busy_timeout 仍被锁定时回滚并重试。
+
+    Args:
+        operation: 接收连接并执行写入的函数，不需要自行提交
+        retries: 重试次数，默认 Config.SQLITE_WRITE_RETRIES
+
+    Returns:
+        operation 的返回值
+
+    Raises:
+        sqlite3.OperationalError: 重试后数据库仍被锁定，或其他数据库错误
+    """
+    retries = Config.SQLITE_WRITE_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        conn = get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            result = operation(conn)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            if 'locked' not in str(e) or attempt >= retries:
+                raise
+            print(f"SQLite数据库被锁定，第 {attempt + 1} 次重试写入: {e}")
+        finally:
+            conn.close()
+        time.sleep(0.1 * (attempt + 1))
+
+
 def init_db() -> None:
     """初始化数据库表（幂等）。"""
     conn = get_connection()
@@ -54,6 +93,95 @@ def init_db() -> None:
         conn.close()
 
 
+def init_cache_tables() -> None:
+    """初始化缓存存储表（幂等）。
+
+    - analysis_cache：分析结果（压缩的 JSON）、视频URL列表、时间戳
+    - download_cache：下载用 Markdown（压缩）
+    - accessed_at：最近访问时间（秒），缓存淘汰按此排序
+    两表均以 cache_key 为主键并使用 WITHOUT ROWID，按键查找即走聚簇索引。
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # WAL 模式允许读写并发，适合多 worker 部署
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                video_urls TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                timestamp INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS download_cache (
+                cache_key TEXT PRIMARY KEY,
+                markdown BLOB NOT NULL,
+                timestamp INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        # 最近访问时间（供缓存淘汰按LRU排序），旧库按需补列
+        for table in ('analysis_cache', 'download_cache'):
+            columns = {row['name'] for row in cur.execute(f"PRAGMA table_info({table})")}
+            if 'accessed_at' not in columns:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN accessed_at INTEGER")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def init_stock_tables() -> None:
+    """初始化股票日线本地存储表（幂等）。
+
+    - stock_daily_bars：按 (ts_code, trade_date) 存放日线行情，trade_date 为 YYYYMMDD
+    - stock_bar_coverage：已向 Tushare 拉取过的日期区间（含无交易日的区间），
+      fetched_at 为 0 表示数据已稳定，否则为近期数据的拉取时间（秒）
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_daily_bars (
+                ts_code TEXT NOT NULL,
+                trade_date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                pre_close REAL,
+                change REAL,
+                pct_change REAL,
+                vol REAL,
+                amount REAL,
+                vwap REAL,
+                PRIMARY KEY (ts_code, trade_date)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_bar_coverage (
+                ts_code TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_stock_bar_coverage_code ON stock_bar_coverage (ts_code)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def insert_record(
     video_title: Optional[str],
     video_url: str,
@@ -0,0 +1,76 @@
+"""文件工具：原子写入与写者间的建议锁
+
+- atomic_write_bytes / atomic_write_text：先写同目录临时文件，fsync 后 os.replace，
+  读者只会看到旧的完整文件或新的完整文件，不会读到写了一半的内容
+- file_lock：基于 fcntl.flock 的进程间建议锁，用于串行化同一目录的写入
+  （非 POSIX 平台上退化为仅进程内的线程锁）
+- touch_atime：只更新访问时间、保持 mtime 不变，用于记录缓存条目的最近访问
+"""
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """原子写入字节内容到 path。"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path: str, text: str, encoding: str = 'utf-8') -> None:
+    """原子写入文本内容到 path。"""
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def touch_atime(path: str) -> None:
+    """将 path 的访问时间设为当前时间，mtime 保持不变。
+
+    通过文件描述符操作，避免与并发的 os.replace 交错时把旧 mtime 写到新文件上。
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        mtime_ns = os.fstat(fd).st_mtime_ns
+        target = fd if os.utime in os.supports_fd else path
+        os.utime(target, ns=(time.time_ns(), mtime_ns))
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def file_lock(lock_path: str) -> Iterator[None]:
+    """获取 lock_path 上的排他锁（进程内线程锁 + 进程间 flock）。"""
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
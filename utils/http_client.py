@@ -0,0 +1,66 @@
+"""HTTP 客户端工具
+
+职责：
+- 提供进程内共享的 requests.Session，按主机复用连接池并保持 keep-alive
+- 统一连接池大小与各外部端点的超时配置
+
+说明：requests/urllib3 仅支持 HTTP/1.1，连接复用已能省去重复的 TCP+TLS 握手。
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import Config
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+) -> requests.Session:
+    """创建带连接池的 Session。
+
+    Args:
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 单个主机连接池的最大连接数
+
+    Returns:
+        requests.Session: 已挂载连接池适配器的 Session
+    """
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections or Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or Config.HTTP_POOL_MAXSIZE,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取全局共享的 Session（懒加载，线程安全）。"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get_timeout(read_timeout: Optional[float]) -> Tuple[float, Optional[float]]:
+    """组装 (连接超时, 读取超时) 元组。
+
+    Args:
+        read_timeout: 读取超时（秒），None 表示不限制
+
+    Returns:
+        tuple: 可直接传给 requests 的 timeout 参数
+    """
+    return (Config.HTTP_CONNECT_TIMEOUT, read_timeout)
@@ -0,0 +1,84 @@
+"""结构化输出工具：从模型回复中取出JSON，并按 Gemini responseSchema 校验
+
+responseSchema 使用 OpenAPI 子集（type 为 OBJECT/ARRAY/STRING/INTEGER/NUMBER/BOOLEAN，
+支持 properties、required、items、enum、nullable），这里按同一份结构校验返回结果，
+结构不符时抛出 ValueError，错误信息包含字段路径，便于修复重试时告诉模型哪里出错。
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+_TYPES = {
+    'OBJECT': dict,
+    'ARRAY': list,
+    'STRING': str,
+    'INTEGER': int,
+    'NUMBER': (int, float),
+    'BOOLEAN': bool,
+}
+
+
+def extract_json(text: str) -> Any:
+    """从回复文本中解析JSON（兼容 ```json 代码块与前后附带说明文字）。
+
+    Raises:
+        ValueError: 找不到有效的JSON
+    """
+    if not text or not text.strip():
+        raise ValueError("回复内容为空")
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        text = text.rsplit('```', 1)[0]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    # 从第一个 { 开始只解析一个完整的JSON值，忽略其后的文字
+    start = text.find('{')
+    if start == -1:
+        raise ValueError("回复中未找到JSON对象")
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON解析失败: {e}")
+    return value
+
+
+def validate(data: Any, schema: Optional[Dict[str, Any]], path: str = '$') -> None:
+    """按 responseSchema 校验数据；schema 为 None 时只要求是JSON对象。
+
+    Raises:
+        ValueError: 数据不符合结构
+    """
+    if schema is None:
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: 应为JSON对象")
+        return
+
+    if data is None:
+        if schema.get('nullable'):
+            return
+        raise ValueError(f"{path}: 不能为空")
+
+    schema_type = str(schema.get('type', '')).upper()
+    expected = _TYPES.get(schema_type)
+    if expected is not None:
+        # bool 是 int 的子类，数值字段需排除
+        if not isinstance(data, expected) or (schema_type in ('INTEGER', 'NUMBER') and isinstance(data, bool)):
+            raise ValueError(f"{path}: 应为 {schema_type}，实际为 {type(data).__name__}")
+
+    if 'enum' in schema and data not in schema['enum']:
+        raise ValueError(f"{path}: 取值 {data!r} 不在 {schema['enum']} 中")
+
+    if schema_type == 'OBJECT':
+        for key in schema.get('required', []):
+            if key not in data:
+                raise ValueError(f"{path}: 缺少字段 {key}")
+        for key, sub_schema in schema.get('properties', {}).items():
+            if key in data:
+                validate(data[key], sub_schema, f"{path}.{key}")
+    elif schema_type == 'ARRAY' and 'items' in schema:
+        for index, item in enumerate(data):
+            validate(item, schema['items'], f"{path}[{index}]")
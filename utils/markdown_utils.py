@@ -0,0 +1,86 @@
+"""Markdown 渲染工具：复用解析器实例，并按内容哈希缓存渲染结果
+
+- 每个线程持有一个 markdown.Markdown 实例（实例非线程安全），每次转换前 reset()，
+  不再每次调用都重新加载 extra、codehilite 扩展
+- 渲染结果以 Markdown 文本的 SHA-256 为键放入按字节计费的LRU缓存（MARKDOWN_RENDER_CACHE_BYTES），
+  同一份报告在页面展示与PDF生成中只解析一次
+- 与前端 parseMarkdown 一致，渲染前去掉 script/iframe/object/embed 标签
+- 与前端 marked（breaks: true, gfm: true）的规则保持一致：单个换行保留为 <br>（nl2br），
+  紧跟在正文行后、前面没有空行的列表也识别为列表（渲染前补一个空行）
+"""
+
+import hashlib
+import re
+import threading
+
+import markdown
+
+from config.settings import Config
+from utils.memory_cache import MemoryLRUCache
+
+# nl2br、sane_lists 与前端 marked（breaks: true, gfm: true）的换行与列表规则一致
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'nl2br', 'sane_lists']
+
+_UNSAFE_TAG_PATTERN = re.compile(
+    r'<(script|iframe|object|embed)\b[^<]*(?:(?!</\1>)<[^<]*)*</\1>',
+    re.IGNORECASE,
+)
+
+_LIST_ITEM_PATTERN = re.compile(r'^ {0,3}(?:[-*+]|\d+[.)])\s+\S')
+_FENCE_PATTERN = re.compile(r'^ {0,3}(```|~~~)')
+
+_local = threading.local()
+_render_cache = MemoryLRUCache(Config.MARKDOWN_RENDER_CACHE_BYTES)
+
+
+def _get_markdown():
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.markdown = md
+    return md
+
+
+def _separate_lists(markdown_text):
+    """在紧跟正文行的列表前补空行（Python-Markdown 要求列表前有空行，GFM 不要求），代码块内不处理。"""
+    lines = markdown_text.split('\n')
+    result = []
+    in_fence = False
+    previous = ''
+    for line in lines:
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        elif (not in_fence and _LIST_ITEM_PATTERN.match(line) and previous.strip()
+              and not _LIST_ITEM_PATTERN.match(previous) and not previous.startswith((' ', '\t'))):
+            result.append('')
+        result.append(line)
+        previous = line
+    return '\n'.join(result)
+
+
+def render_markdown(markdown_text):
+    """将 Markdown 转换为HTML（带缓存）。
+
+    Raises:
+        Exception: Markdown 解析失败
+    """
+    if not markdown_text:
+        return ''
+
+    digest = hashlib.sha256(markdown_text.encode('utf-8')).hexdigest()
+    html = _render_cache.get(digest)
+    if html is not None:
+        return html
+
+    md = _get_markdown()
+    try:
+        html = md.convert(_separate_lists(_UNSAFE_TAG_PATTERN.sub('', markdown_text)))
+    finally:
+        md.reset()
+    _render_cache.put(digest, html, len(html.encode('utf-8')) + len(markdown_text.encode('utf-8')))
+    return html
+
+
+def get_render_cache_stats():
+    """获取渲染缓存的命中统计"""
+    return _render_cache.stats()
@@ -0,0 +1,92 @@
+"""内存缓存工具：按字节数限制容量的线程安全LRU缓存
+
+- 以调用方给出的字节数（通常为源文件大小）计算占用，超出预算时淘汰最久未使用的条目
+- 每个条目可附带版本标记（如文件 mtime），读取时版本不一致即视为失效
+- 记录命中/未命中次数，便于观察缓存效果
+
+仅使用标准库，避免额外依赖。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class MemoryLRUCache:
+    """按字节预算淘汰的LRU缓存"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (version, size, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        """读取缓存。
+
+        Args:
+            key: 缓存键
+            version: 期望的版本标记，与写入时不同则删除该条目并视为未命中
+
+        Returns:
+            缓存值；未命中返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any, size: int, version: Any = None) -> None:
+        """写入缓存，单个条目超过总预算时不缓存。"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, size, value)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定条目。"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """清空缓存（保留统计数据）。"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中率与容量统计。"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        """删除条目并更新占用（调用方持有锁）。"""
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
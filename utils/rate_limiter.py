@@ -0,0 +1,39 @@
+"""限流工具：线程安全的滑动窗口限流器
+
+用于遵守第三方接口（如 Tushare）的每分钟调用次数限制：
+任意 period 秒内最多放行 max_calls 次，超出时阻塞等待到最早一次调用移出窗口。
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """滑动窗口限流器"""
+
+    def __init__(self, max_calls: int, period: float = 60.0) -> None:
+        """
+        Args:
+            max_calls: 窗口内最多调用次数，<= 0 表示不限流
+            period: 窗口长度（秒）
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """获取一次调用许可，必要时阻塞等待。"""
+        if self.max_calls <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(max(wait, 0.01))
@@ -174,31 +174,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = '';
-            
-            while (true) {
-                const { value, done } = await reader.read();
-                if (done) break;
-                
-                buffer += decoder.decode(value, { stream: true });
-                
-                // 处理完整的数据行
-                const lines = buffer.split('\n');
-                buffer = lines.pop(); // 保留不完整的行
-                
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        try {
-                            const jsonData = JSON.parse(line.substring(6));
-                            handleStreamData(jsonData);
-                        } catch (e) {
-                            console.warn('解析流数据失败:', e);
-                        }
-                    }
-                }
-            }
+            await readStream(response);
             
         } catch (error) {
             console.error('流式分析错误:', error);
@@ -209,9 +185,64 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // 页面刷新后重新附着到仍在运行的后台分析任务
+    async function resumeAnalysisJob(jobId) {
+        const logsSection = document.getElementById('analysisLogs');
+        document.getElementById('logContent').innerHTML = '';
+        document.getElementById('progressFill').style.width = '0%';
+        logsSection.style.display = 'block';
+        startAnalysis();
+        
+        try {
+            const response = await fetch(`/api/jobs/${jobId}/events?after=0`);
+            if (!response.ok) {
+                // 任务已过期或不存在
+                sessionStorage.removeItem('analysisJobId');
+                logsSection.style.display = 'none';
+                return;
+            }
+            await readStream(response);
+        } catch (error) {
+            console.error('重新连接分析任务失败:', error);
+        } finally {
+            stopAnalysis();
+        }
+    }
+    
+    async function readStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            
+            // 处理完整的数据行
+            const lines = buffer.split('\n');
+            buffer = lines.pop(); // 保留不完整的行
+            
+            for (const line of lines) {
+                if (line.startsWith('data: ')) {
+                    try {
+                        const jsonData = JSON.parse(line.substring(6));
+                        handleStreamData(jsonData);
+                    } catch (e) {
+                        console.warn('解析流数据失败:', e);
+                    }
+                }
+            }
+        }
+    }
+    
     function handleStreamData(data) {
         console.log('收到流数据:', data); // 添加调试日志
         switch (data.type) {
+            case 'job':
+                sessionStorage.setItem('analysisJobId', data.job_id);
+                break;
             case 'status':
                 updateProgress(data.progress, data.message);
                 break;
@@ -220,9 +251,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 break;
             case 'result':
                 console.log('收到最终结果:', data); // 添加调试日志
+                sessionStorage.removeItem('analysisJobId');
                 handleFinalResult(data);
                 break;
             case 'error':
+                sessionStorage.removeItem('analysisJobId');
                 addLogEntry(data.message, 'error');
                 showError(data.message);
                 break;
@@ -242,6 +275,17 @@ document.addEventListener('DOMContentLoaded', function() {
         const logContent = document.getElementById('logContent');
         const timestamp = new Date().toLocaleTimeString();
         
+        // 连续的流式片段追加到同一个日志条目中
+        const lastEntry = logContent.lastElementChild;
+        if (streamingText && type === 'streaming' && lastEntry && lastEntry.classList.contains('streaming')) {
+            const chunk = document.createElement('span');
+            chunk.className = 'text-chunk';
+            chunk.textContent = streamingText;
+            lastEntry.querySelector('.streaming-content').appendChild(chunk);
+            logContent.scrollTop = logContent.scrollHeight;
+            return;
+        }
+        
         const logEntry = document.createElement('div');
         logEntry.className = `log-entry ${type}`;
         
@@ -249,10 +293,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // 显示流式文本
             logEntry.innerHTML = `
                 <div class="log-timestamp">[${timestamp}] ${message}</div>
-                <div class="streaming-content">
-                    <span class="text-chunk">${streamingText}</span>
-                </div>
+                <div class="streaming-content"><span class="text-chunk"></span></div>
             `;
+            logEntry.querySelector('.text-chunk').textContent = streamingText;
         } else {
             logEntry.innerHTML = `<span class="log-timestamp">[${timestamp}]</span> ${message}`;
         }
@@ -380,7 +423,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // 新的纯内容分析报告 - 直接显示AI的Markdown内容
             document.getElementById('executiveSummary').innerHTML = `
                 <div class="full-report-content">
-                    ${formatContent(report.raw_markdown_content)}
+                    ${report.raw_markdown_html || formatContent(report.raw_markdown_content)}
                 </div>
             `;
             
@@ -1014,6 +1057,12 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('Results section display:', results ? results.style.display : 'N/A');
         console.log('Current cache key:', window.currentCacheKey);
     };
+    
+    // 存在未完成的后台任务时自动重新附着（放在末尾，确保计时器等变量已初始化）
+    const pendingJobId = sessionStorage.getItem('analysisJobId');
+    if (pendingJobId) {
+        resumeAnalysisJob(pendingJobId);
+    }
 });
 
 // 安全的Markdown解析函数
@@ -276,7 +276,11 @@ document.addEventListener('DOMContentLoaded', function() {
             
             updateProgress(50, '正在分析视频内容...');
             
-            const result = await response.json();
+            let result = await response.json();
+            // 分析在后台任务中执行，轮询任务状态直到完成
+            if (response.status === 202 && result.job_id) {
+                result = await waitForJob(result.job_id);
+            }
             
             console.log('API响应:', result); // 调试日志
             
@@ -300,6 +304,24 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // 轮询后台任务，完成后返回分析结果
+    async function waitForJob(jobId) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 3000));
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!job.success) {
+                return job;
+            }
+            if (job.status === 'done') {
+                return job.result || { success: false, error: '批量分析失败' };
+            }
+            if (job.status === 'failed') {
+                return { success: false, error: job.error || '批量分析失败' };
+            }
+        }
+    }
+    
     // 设置搜索按钮加载状态
     function setSearchLoading(isLoading) {
         searchChannelBtn.disabled = isLoading;
@@ -406,7 +428,8 @@ document.addEventListener('DOMContentLoaded', function() {
         // 显示分析概览 - 使用AI返回的原始内容
         if (report.raw_markdown_content) {
             try {
-                const formattedContent = formatContent(report.raw_markdown_content);
+                // 优先使用服务端预渲染的HTML，无需再解析Markdown
+                const formattedContent = report.raw_markdown_html || formatContent(report.raw_markdown_content);
                 console.log('格式化后的内容:', formattedContent); // 调试日志
                 
                 document.getElementById('overviewSummary').innerHTML = `